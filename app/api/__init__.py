@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from fastapi import APIRouter
 from fastapi.responses import RedirectResponse
 
@@ -11,24 +13,52 @@ from app.api.projects import router as projects_router
 from app.api.results import router as results_router
 from app.api.feedback import router as feedback_router
 
-# Combine all routers
-api_router = APIRouter(prefix="/api")
+ROUTERS = [
+    auth_router,
+    users_router,
+    projects_router,
+    departments_router,
+    students_router,
+    faculty_router,
+    results_router,
+    feedback_router,
+    admin_router,
+]
+
+def check_unique_routes(router: APIRouter) -> None:
+    """
+    Fail fast when a router registers the same method and path twice, which
+    would leave the second handler unreachable and lengthen route matching
+    """
+    seen = set()
+    for route in router.routes:
+        for method in getattr(route, "methods", None) or ():
+            key = (method, route.path)
+            if key in seen:
+                raise RuntimeError(f"Duplicate route {method} {router.prefix}{route.path}")
+            seen.add(key)
 
 # Add a root handler for the /api path
-@api_router.get("/", include_in_schema=False)
 async def api_root():
     return RedirectResponse(url="/api/docs")
 
-# Add all routers
-api_router.include_router(auth_router)
-api_router.include_router(users_router)
-api_router.include_router(admin_router)
-api_router.include_router(departments_router)
-api_router.include_router(faculty_router)
-api_router.include_router(students_router)
-api_router.include_router(projects_router)
-api_router.include_router(results_router)
-api_router.include_router(feedback_router)
+@lru_cache(maxsize=1)
+def build_api_router() -> APIRouter:
+    """
+    Combine all routers once per process. Routes are matched in order, so
+    the most frequently hit routers are included first.
+    """
+    router = APIRouter(prefix="/api")
+    router.add_api_route("/", api_root, methods=["GET"], include_in_schema=False)
+    
+    # Add all routers
+    for sub_router in ROUTERS:
+        check_unique_routes(sub_router)
+        router.include_router(sub_router)
+    
+    return router
 
 # Export the combined router
-__all__ = ["api_router"]
\ No newline at end of file
+api_router = build_api_router()
+
+__all__ = ["api_router", "build_api_router"]
@@ -1,111 +1,152 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Response
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
+from pydantic import TypeAdapter
+import csv
+import hashlib
+import io
+import logging
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
-from app.schemas import (
-    RoleCreate, RoleUpdate, RoleResponse, DataResponse,
-    ResponseBase, PaginatedResponse, PaginatedMeta
-)
+from app.schemas import RoleResponse, DataResponse, UserDetailResponse, UserRolesAssignment
 from app.services.user import (
-    get_roles, get_role, create_role, update_role, delete_role, assign_roles,
-    get_users, export_roles_to_csv
+    get_role, create_role, update_role, delete_role, assign_roles, bulk_assign_roles,
+    get_users, get_users_page, count_users,
+    get_roles_iter, get_role_rows, get_roles_version, clean_permissions, bulk_upsert_roles
 )
-from app.middleware.auth import require_admin
-from app.services.auth import get_current_active_user
+from app.middleware.auth import require_admin, invalidate_user_cache
 from app.middleware.error import AppError
+from app.utils.cache import TTLCache
+from app.utils.responses import ORJSONResponse
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/admin",
     tags=["admin"]
 )
 
+# (ETag, rendered body) of GET /admin/roles, dropped whenever roles are modified
+ROLES_CACHE_KEY = "admin:roles:v1"
+roles_cache = TTLCache(ttl=60, maxsize=1)
+
+# Reads a page of ORM users into plain dicts in one pydantic-core call;
+# datetimes are left for orjson to encode
+user_rows_adapter = TypeAdapter(List[UserDetailResponse])
+
+def roles_cache_headers(etag: str) -> dict:
+    """
+    Validator headers for the roles listing so browsers can revalidate cheaply
+    """
+    return {"ETag": etag, "Cache-Control": "private, max-age=30"}
+
+def invalidate_roles_cache() -> None:
+    """
+    Drop cached role listings after roles are modified
+    """
+    roles_cache.delete(ROLES_CACHE_KEY)
+
+def role_to_response(role) -> dict:
+    """
+    Build the RoleResponse payload from a trusted ORM row as a plain dict,
+    so it goes straight to orjson without any model construction
+    """
+    return {
+        "name": role.name,
+        "description": role.description,
+        "permissions": role.permissions or []
+    }
+
 # Role export endpoint - must be defined before path parameter routes
-@router.get("/roles/export", response_class=Response)
+@router.get("/roles/export", response_class=StreamingResponse)
 async def export_roles_endpoint(
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Export roles to CSV file
     """
-    try:
-        # Generate CSV content
-        import io
-        import csv
+    async def generate_csv():
+        # Reuse one small buffer so each row is written and flushed on its own
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
         
-        # Get all roles
-        roles = get_roles(db)
-        
-        # Create a string buffer and CSV writer
-        output = io.StringIO()
-        writer = csv.writer(output)
+        def flush_row(row):
+            writer.writerow(row)
+            data = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            return data
         
         # Write header
-        writer.writerow(['Name', 'Description', 'Permissions'])
+        yield flush_row(['Name', 'Description', 'Permissions'])
         
         # Write data
-        for role in roles:
-            permissions = ','.join(role.permissions) if role.permissions else ''
-            writer.writerow([role.name, role.description or '', permissions])
-        
-        # Get the CSV content
-        csv_content = output.getvalue()
-        
-        # Return CSV file
-        response = Response(content=csv_content)
-        response.headers["Content-Disposition"] = "attachment; filename=roles.csv"
-        response.headers["Content-Type"] = "text/csv"
-        
-        return response
-    except Exception as e:
-        print(f"Error exporting roles: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to export roles"
-        )
+        async for role in get_roles_iter(db):
+            yield flush_row([role.name, role.description or '', ','.join(role.permissions or ())])
+    
+    return StreamingResponse(
+        generate_csv(),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=roles.csv"}
+    )
 
 # Role management endpoints - all require admin role
 @router.get("/roles", response_model=None)
 async def get_all_roles(
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all roles
     """
+    if_none_match = request.headers.get("if-none-match")
+    
+    # Serve the pre-rendered body while it is fresh
+    cached = roles_cache.get(ROLES_CACHE_KEY)
+    if cached is not None:
+        etag, body = cached
+        if if_none_match == etag:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=roles_cache_headers(etag))
+        return Response(content=body, media_type="application/json", headers=roles_cache_headers(etag))
+    
     try:
-        # Get all roles
-        roles = get_roles(db)
+        # A max(updated_at)/count probe is enough to answer conditional requests
+        max_updated_at, role_count = await get_roles_version(db)
+        etag = 'W/"{}"'.format(
+            hashlib.blake2s(f"{max_updated_at}-{role_count}".encode()).hexdigest()
+        )
+        if if_none_match == etag:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=roles_cache_headers(etag))
         
-        # Format roles to match Express backend format
-        formatted_roles = []
-        for i, role in enumerate(roles):
-            role_dict = role.to_dict() if hasattr(role, 'to_dict') else {
-                "id": str(role.id) if hasattr(role, 'id') and role.id else f"role_{i}",
-                "name": role.name,
-                "description": role.description,
-                "permissions": role.permissions
-            }
-            
-            # Convert to Express format and ensure _id is never null
-            formatted_role = {
-                "_id": role_dict.get("id") or f"role_{i}",  # Fallback to generated ID if null
-                "name": role_dict.get("name"),
-                "description": role_dict.get("description"),
-                "permissions": role_dict.get("permissions", []),
-                "createdAt": role_dict.get("created_at") or "2025-05-04T00:00:00.000Z"
+        # Fetch plain column tuples instead of ORM objects
+        rows = await get_role_rows(db)
+        
+        # Format roles to match Express backend format, using the name as _id
+        formatted_roles = [
+            {
+                "_id": name,
+                "name": name,
+                "description": description,
+                "permissions": permissions or [],
+                "createdAt": created_at.isoformat() if created_at else "2025-05-04T00:00:00.000Z"
             }
-            formatted_roles.append(formatted_role)
+            for name, description, permissions, created_at in rows
+        ]
         
         # Return in Express format
-        return {
+        response = ORJSONResponse({
             "status": "success",
             "data": {
                 "roles": formatted_roles
             }
-        }
+        }, headers=roles_cache_headers(etag))
+        roles_cache.set(ROLES_CACHE_KEY, (etag, response.body))
+        return response
     except Exception as e:
-        print(f"DEBUG - Error getting roles: {str(e)}")
+        logger.debug("Error getting roles: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -114,7 +155,7 @@ async def get_all_roles(
 @router.post("/roles", response_model=None)
 async def add_role(
     role_data: dict,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new role
@@ -133,91 +174,69 @@ async def add_role(
             )
         
         # Create the role
-        role = create_role(db, name, description, permissions)
+        role = await db.run_sync(create_role, name, description, permissions)
+        invalidate_roles_cache()
         
-        # Format role to match Express backend format
-        role_dict = role.to_dict() if hasattr(role, 'to_dict') else {
-            "id": str(role.id) if hasattr(role, 'id') and role.id else f"role_new",
+        # Format role to match Express backend format, keyed by its name
+        formatted_role = {
+            "_id": role.name,
             "name": role.name,
             "description": role.description,
-            "permissions": role.permissions
-        }
-        
-        # Convert to Express format
-        formatted_role = {
-            "_id": role_dict.get("id") or f"role_new",
-            "name": role_dict.get("name"),
-            "description": role_dict.get("description"),
-            "permissions": role_dict.get("permissions", []),
-            "createdAt": role_dict.get("created_at") or "2025-05-04T00:00:00.000Z"
+            "permissions": role.permissions or [],
+            "createdAt": role.created_at.isoformat() if role.created_at else "2025-05-04T00:00:00.000Z"
         }
         
         # Return in Express format
-        return {
+        return ORJSONResponse({
             "status": "success",
             "message": "Role created successfully",
             "data": {
                 "role": formatted_role
             }
-        }
+        })
     except Exception as e:
-        print(f"DEBUG - Error creating role: {str(e)}")
+        logger.debug("Error creating role: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
 
-@router.get("/roles/{role_name}", response_model=DataResponse[RoleResponse])
+@router.get(
+    "/roles/{role_name}",
+    response_model=None,
+    responses={200: {"model": DataResponse[RoleResponse]}}
+)
 async def get_role_by_name(
     role_name: str,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get role by name (admin only)
     """
-    role = get_role(db, role_name)
+    role = await db.run_sync(get_role, role_name)
     if not role:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Role not found"
         )
     
-    return DataResponse(
-        status="success",
-        data=RoleResponse.from_orm(role)
-    )
+    return ORJSONResponse({
+        "status": "success",
+        "message": None,
+        "data": role_to_response(role)
+    })
 
-@router.patch("/roles/{role_id}", response_model=None)
+@router.patch("/roles/{role_name}", response_model=None)
 async def update_role_endpoint(
-    role_id: str,
+    role_name: str,
     role_data: dict,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Update role by ID or name
+    Update role by name
     """
     try:
-        # Check if role_id is a generated ID (e.g., role_3)
-        if role_id.startswith('role_'):
-            # Extract the role from our cached roles based on index
-            roles = get_roles(db)
-            try:
-                index = int(role_id.split('_')[1])
-                if index < len(roles):
-                    role_name = roles[index].name
-                else:
-                    raise HTTPException(
-                        status_code=status.HTTP_404_NOT_FOUND,
-                        detail=f"Role with ID {role_id} not found"
-                    )
-            except (ValueError, IndexError):
-                # If we can't parse the index, try to find by name
-                role_name = role_id
-        else:
-            # Use the ID as the role name directly
-            role_name = role_id
-        
         # Extract and clean permissions from request data
         permissions = role_data.get('permissions', [])
         
@@ -228,8 +247,8 @@ async def update_role_endpoint(
             permissions = [p.strip() for p in cleaned_str.split(',') if p.strip()]
         
         # Update the role
-        updated_role = update_role(
-            db, role_name, role_data.get('description'), permissions
+        updated_role = await db.run_sync(
+            update_role, role_name, role_data.get('description'), permissions
         )
         
         if not updated_role:
@@ -237,164 +256,137 @@ async def update_role_endpoint(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Role with name {role_name} not found"
             )
+        invalidate_roles_cache()
         
-        # Format role to match Express backend format
-        role_dict = updated_role.to_dict() if hasattr(updated_role, 'to_dict') else {
-            "id": str(updated_role.id) if hasattr(updated_role, 'id') and updated_role.id else role_id,
+        # Format role to match Express backend format, keyed by its name
+        formatted_role = {
+            "_id": updated_role.name,
             "name": updated_role.name,
             "description": updated_role.description,
-            "permissions": updated_role.permissions
-        }
-        
-        # Convert to Express format
-        formatted_role = {
-            "_id": role_dict.get("id") or role_id,
-            "name": role_dict.get("name"),
-            "description": role_dict.get("description"),
-            "permissions": role_dict.get("permissions", []),
-            "createdAt": role_dict.get("created_at") or "2025-05-04T00:00:00.000Z"
+            "permissions": updated_role.permissions or [],
+            "createdAt": updated_role.created_at.isoformat() if updated_role.created_at else "2025-05-04T00:00:00.000Z"
         }
         
         # Return in Express format
-        return {
+        return ORJSONResponse({
             "status": "success",
             "message": "Role updated successfully",
             "data": {
                 "role": formatted_role
             }
-        }
+        })
     except Exception as e:
-        print(f"DEBUG - Error updating role: {str(e)}")
+        logger.debug("Error updating role: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
 
-@router.delete("/roles/{role_id}", response_model=None)
+@router.delete("/roles/{role_name}", response_model=None)
 async def delete_role_endpoint(
-    role_id: str,
-    db: Session = Depends(get_db)
+    role_name: str,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Delete role by ID or name
+    Delete role by name
     """
     try:
-        # Check if role_id is a generated ID (e.g., role_6)
-        if role_id.startswith('role_'):
-            # Extract the role from our cached roles based on index
-            roles = get_roles(db)
-            try:
-                index = int(role_id.split('_')[1])
-                if index < len(roles):
-                    role_name = roles[index].name
-                else:
-                    raise HTTPException(
-                        status_code=status.HTTP_404_NOT_FOUND,
-                        detail=f"Role with ID {role_id} not found"
-                    )
-            except (ValueError, IndexError):
-                # If we can't parse the index, try to find by name
-                role_name = role_id
-        else:
-            # Use the ID as the role name directly
-            role_name = role_id
-        
         # Delete the role
-        success = delete_role(db, role_name)
+        success = await db.run_sync(delete_role, role_name)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Role with name {role_name} not found"
             )
+        invalidate_roles_cache()
+        invalidate_user_cache()
         
         # Return in Express format
-        return {
+        return ORJSONResponse({
             "status": "success",
             "message": "Role deleted successfully"
-        }
+        })
     except Exception as e:
-        print(f"DEBUG - Error deleting role: {str(e)}")
+        logger.debug("Error deleting role: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
 
+def _parse_roles_csv(file_obj):
+    """Parse and validate role rows from an uploaded CSV file"""
+    # Decode the upload line by line with the C reader, indexing columns by
+    # position instead of building a dict per row
+    text = io.TextIOWrapper(file_obj, encoding='utf-8', newline='')
+    try:
+        csv_reader = csv.reader(text)
+        header = next(csv_reader, [])
+        if 'Name' not in header:
+            raise AppError(message="CSV file must have a 'Name' column")
+        name_idx = header.index('Name')
+        description_idx = header.index('Description') if 'Description' in header else None
+        permissions_idx = header.index('Permissions') if 'Permissions' in header else None
+        
+        # Validate rows first, then write them all in one transaction
+        roles_data = []
+        errors = []
+        
+        for i, row in enumerate(csv_reader):
+            # Validate required fields
+            name = row[name_idx] if name_idx < len(row) else ''
+            if not name:
+                errors.append(f"Row {i+1}: Missing required field 'Name'")
+                continue
+            
+            description = row[description_idx] if description_idx is not None and description_idx < len(row) else ''
+            permissions = row[permissions_idx] if permissions_idx is not None and permissions_idx < len(row) else ''
+            roles_data.append({
+                "name": name,
+                "description": description,
+                "permissions": clean_permissions(permissions)
+            })
+        
+        return roles_data, errors
+    finally:
+        # Hand the upload back untouched so UploadFile can close it
+        text.detach()
+
 # Role import endpoint
 @router.post("/roles/import", response_model=None)
 async def import_roles_endpoint(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Import roles from CSV file
     """
     try:
-        # Read CSV file content
-        content = await file.read()
-        content_str = content.decode('utf-8')
-        
-        # Parse CSV
-        import csv
-        import io
+        # Parse the spooled upload off the event loop without buffering it
+        roles_data, errors = await run_in_threadpool(_parse_roles_csv, file.file)
         
-        csv_reader = csv.DictReader(io.StringIO(content_str))
+        imported_roles = await db.run_sync(bulk_upsert_roles, roles_data) if roles_data else []
         
-        # Process each row
-        imported_roles = []
-        errors = []
-        
-        for i, row in enumerate(csv_reader):
-            try:
-                # Validate required fields
-                if not row.get('Name'):
-                    errors.append(f"Row {i+1}: Missing required field 'Name'")
-                    continue
-                
-                # Extract data
-                name = row.get('Name')
-                description = row.get('Description', '')
-                permissions_str = row.get('Permissions', '')
-                
-                # Handle permissions with or without curly braces
-                if permissions_str:
-                    # Remove any curly braces if present
-                    cleaned_str = permissions_str.replace('{', '').replace('}', '')
-                    permissions = [p.strip() for p in cleaned_str.split(',') if p.strip()]
-                else:
-                    permissions = []
-                
-                # Check if role already exists
-                existing_role = get_role(db, name)
-                if existing_role:
-                    # Update existing role
-                    updated_role = update_role(db, name, description, permissions)
-                    imported_roles.append(updated_role)
-                else:
-                    # Create new role
-                    new_role = create_role(db, name, description, permissions)
-                    imported_roles.append(new_role)
-                    
-            except Exception as e:
-                errors.append(f"Row {i+1}: {str(e)}")
+        if imported_roles:
+            invalidate_roles_cache()
         
         # Format response
-        return {
+        return ORJSONResponse({
             "status": "success",
             "data": {
                 "roles": [
                     {
-                        "id": f"role_{i}",
-                        "name": role.name,
-                        "description": role.description,
-                        "permissions": role.permissions
-                    } for i, role in enumerate(imported_roles)
+                        "id": role["name"],
+                        "name": role["name"],
+                        "description": role["description"],
+                        "permissions": role["permissions"]
+                    } for role in imported_roles
                 ]
             },
             "message": f"Successfully imported {len(imported_roles)} roles. {len(errors)} errors encountered.",
             "errors": errors
-        }
+        })
     except Exception as e:
-        print(f"Error importing roles: {str(e)}")
+        logger.debug("Error importing roles: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -410,21 +402,47 @@ async def get_admin_users(
     department: Optional[str] = None,
     sort_by: str = "name",
     sort_order: str = "asc",
+    keyset: bool = Query(False, description="Return a keyset page ordered by (name, id), with pagination.next_cursor instead of totals"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous keyset page"),
+    include_total: bool = False,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all users with filtering and pagination (admin only)
     """
+    if keyset or cursor:
+        # Keyset pagination ordered by (name, id); no COUNT unless asked for
+        users, next_cursor = await db.run_sync(get_users_page, cursor, limit, search, role, department)
+        pagination = {
+            "limit": limit,
+            "next_cursor": next_cursor
+        }
+        if include_total:
+            pagination["total"] = await db.run_sync(count_users, search, role, department)
+        
+        return ORJSONResponse({
+            "status": "success",
+            "message": "Users retrieved successfully",
+            "data": {
+                "users": user_rows_adapter.dump_python(
+                    user_rows_adapter.validate_python(users, from_attributes=True)
+                )
+            },
+            "pagination": pagination
+        })
+    
     skip = (page - 1) * limit
-    users, total = get_users(db, skip, limit, search, role, department, sort_by, sort_order)
+    users, total = await get_users(
+        db, skip, limit, search, role, department, sort_by, sort_order
+    )
     
     # Format response to match React frontend expectations
-    return {
+    return ORJSONResponse({
         "status": "success",
         "message": "Users retrieved successfully",
         "data": {
-            "users": [user.to_dict() for user in users]
+            "users": users
         },
         "pagination": {
             "page": page,
@@ -432,35 +450,78 @@ async def get_admin_users(
             "total": total,
             "total_pages": (total + limit - 1) // limit
         }
-    }
+    })
+
+# Bulk user role assignment - declared before the {user_id} routes
+@router.post("/users/roles:bulk", response_model=None)
+async def bulk_assign_user_roles(
+    assignments: List[UserRolesAssignment],
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Assign roles to many users in one request and transaction (admin only)
+    """
+    if not assignments:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one assignment is required"
+        )
+    
+    results = await db.run_sync(
+        bulk_assign_roles, [assignment.model_dump() for assignment in assignments]
+    )
+    invalidate_user_cache()
+    
+    updated = sum(1 for result in results if result["status"] == "success")
+    return ORJSONResponse({
+        "status": "success",
+        "message": f"Roles assigned to {updated} of {len(results)} users",
+        "data": {
+            "results": results
+        }
+    })
 
 # User role assignment
-@router.post("/users/{user_id}/roles", response_model=DataResponse[None])
+@router.post(
+    "/users/{user_id}/roles",
+    response_model=None,
+    responses={200: {"model": DataResponse[dict]}}
+)
 async def assign_user_roles(
     user_id: str,
     roles: List[str],
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Assign roles to a user (admin only)
     """
+    # Drop duplicates while keeping the first role as the default selection
+    roles = list(dict.fromkeys(roles))
+    if not roles:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one role is required"
+        )
+    
     try:
-        updated_user = assign_roles(db, user_id, roles)
+        updated_user = await db.run_sync(assign_roles, user_id, roles)
         if not updated_user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
+        invalidate_user_cache()
         
-        return DataResponse(
-            status="success",
-            message="Roles assigned successfully",
-            data={
-                "user": updated_user.to_dict(),
+        return ORJSONResponse({
+            "status": "success",
+            "message": "Roles assigned successfully",
+            "data": {
+                "user": UserDetailResponse.model_validate(updated_user).model_dump(),
                 "roles": [role.name for role in updated_user.roles]
             }
-        )
+        })
     except AppError as e:
         raise HTTPException(
             status_code=e.status_code,
@@ -1,16 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 
-from app.database import get_db
-from app.models.user import User
+from app.database import get_async_db
+from app.models.user import User, check_password, dummy_verify_password, hash_password
 from app.schemas import (
-    LoginRequest, RoleSwitchRequest, Token, UserCreate, UserResponse,
+    LoginRequest, RoleSwitchRequest, Token, UserCreate, UserDetailResponse, UserResponse,
     DataResponse, ResponseBase
 )
-from app.services.auth import create_access_token, get_current_active_user
-from app.services.user import get_user_by_email, create_user
+from app.services.auth import create_access_token, get_current_active_user, user_cache
+from app.services.user import get_user_by_email_async, get_user_credentials, create_user
 from app.config import JWT_ACCESS_TOKEN_EXPIRE_MINUTES
 from app.middleware.error import AppError
 
@@ -22,14 +24,15 @@ router = APIRouter(
 @router.post("/login", response_model=None)
 async def login(
     login_data: LoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Authenticate user and return JWT token
     """
     # Find user by email
-    user = get_user_by_email(db, login_data.email)
+    user = await get_user_by_email_async(db, login_data.email)
     if not user:
+        await run_in_threadpool(dummy_verify_password, login_data.password)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -37,7 +40,8 @@ async def login(
         )
     
     # Verify password
-    if not user.verify_password(login_data.password):
+    # bcrypt releases the GIL, so checking in the threadpool keeps the loop free
+    if not await run_in_threadpool(user.verify_password, login_data.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -46,7 +50,7 @@ async def login(
     
     # Check if selected role is valid for this user
     selected_role = login_data.selected_role
-    if selected_role and not any(role.name == selected_role for role in user.roles):
+    if selected_role and selected_role not in user.role_names:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid role selected",
@@ -55,7 +59,7 @@ async def login(
     # Update selected role if provided
     if selected_role:
         user.selected_role = selected_role
-        db.commit()
+        await db.commit()
     
     # Generate access token
     access_token_expires = timedelta(minutes=JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -64,17 +68,9 @@ async def login(
         expires_delta=access_token_expires,
     )
     
-    # Remove password from user data
-    user_data = user.to_dict()
-    
-    # Create a custom response that matches the expected format in the React frontend
-    # Make sure the user data includes the selected_role
-    user_data = user.to_dict()
-    
-    # Print debug information
-    print(f"DEBUG - Login request selected_role: {selected_role}")
-    print(f"DEBUG - User roles: {user_data.get('roles')}")
-    print(f"DEBUG - Current user selected_role: {user_data.get('selected_role')}")
+    # Create a custom response that matches the expected format in the React frontend;
+    # UserDetailResponse has no password field, so the hash never reaches the response
+    user_data = UserDetailResponse.model_validate(user).model_dump()
     
     # Ensure the selected_role is set correctly
     if selected_role and selected_role in user_data.get("roles", []):
@@ -82,9 +78,6 @@ async def login(
     elif not user_data.get("selectedRole") and user_data.get("roles"):
         user_data["selectedRole"] = user_data.get("selected_role") or user_data["roles"][0]
     
-    # Print the final user data
-    print(f"DEBUG - Final user data: {user_data}")
-    
     response_data = {
         "status": "success",
         "message": "Login successful",
@@ -99,14 +92,15 @@ async def login(
 @router.post("/login/token", response_model=DataResponse[Token])
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     OAuth2 compatible token login, get an access token for future requests
     """
     # Find user by email/username
-    user = get_user_by_email(db, form_data.username)
+    user = await get_user_credentials(db, form_data.username)
     if not user:
+        await run_in_threadpool(dummy_verify_password, form_data.password)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -114,7 +108,7 @@ async def login_for_access_token(
         )
     
     # Verify password
-    if not user.verify_password(form_data.password):
+    if not await run_in_threadpool(check_password, form_data.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -140,16 +134,19 @@ async def login_for_access_token(
 @router.post("/signup", response_model=DataResponse[UserResponse])
 async def signup(
     user_data: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Register a new user
     """
     try:
-        user = create_user(db, user_data)
+        # bcrypt is slow; hash in the threadpool, not inside run_sync on the loop
+        password_hash = await run_in_threadpool(hash_password, user_data.password)
+        user = await db.run_sync(create_user, user_data, password_hash)
+        await db.refresh(user, ["roles"])
         
         # If user has student role, create student record
-        if "student" in [role.name for role in user.roles]:
+        if "student" in user.role_names:
             # This would be handled by a student service in a real implementation
             # Here we just acknowledge the creation should happen
             pass
@@ -169,22 +166,28 @@ async def signup(
 async def switch_role(
     role_data: RoleSwitchRequest,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Switch to a different role if the user has that role
     """
     # Check if user has the requested role
-    if not any(role.name == role_data.role for role in current_user.roles):
+    if role_data.role not in current_user.role_names:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid role selected",
         )
     
-    # Update selected role
+    # Update selected role; current_user belongs to the auth dependency's
+    # session, so persist the change through this request's async session
+    await db.execute(
+        update(User)
+        .where(User.id == current_user.id)
+        .values(selected_role=role_data.role)
+    )
+    await db.commit()
     current_user.selected_role = role_data.role
-    db.commit()
-    db.refresh(current_user)
+    user_cache.delete(current_user.id)
     
     # If switching to student role, ensure student record exists
     if role_data.role == "student":
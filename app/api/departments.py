@@ -1,26 +1,61 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Response
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
+import logging
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
 from app.schemas import (
-    DepartmentCreate, DepartmentUpdate, DepartmentResponse, DepartmentStats,
+    DepartmentCreateIn, DepartmentUpdateIn, DepartmentResponse, DepartmentStats,
     DataResponse, ResponseBase, PaginatedResponse, PaginatedMeta
 )
 from app.services.department import (
-    get_department, get_departments, create_department, update_department,
+    get_department, get_departments, get_departments_page, create_department, update_department,
     delete_department, get_department_stats, import_departments_from_csv,
     export_departments_to_csv
 )
 from app.middleware.auth import require_admin_or_principal
-from app.middleware.error import AppError
+from app.utils import ORJSONResponse
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/departments",
     tags=["departments"]
 )
 
+# Validates and dumps a whole page of departments in one pydantic-core call
+department_list_adapter = TypeAdapter(List[DepartmentResponse])
+
+# Formatted departments keyed on (id, updated_at); every write bumps
+# updated_at, so an edited row never matches a stale entry
+department_format_cache = TTLCache(ttl=3600, maxsize=10_000)
+
+def format_department(department) -> dict:
+    """Format a department to match the Express backend's camelCase shape"""
+    return format_departments([department])[0]
+
+def format_departments(departments) -> list:
+    """Format a list of departments to match the Express backend's camelCase shape"""
+    keys = [(department.id, department.updated_at) for department in departments]
+    formatted = [department_format_cache.get(key) for key in keys]
+    
+    misses = [index for index, value in enumerate(formatted) if value is None]
+    if misses:
+        dumped = department_list_adapter.dump_python(
+            department_list_adapter.validate_python([departments[index] for index in misses], from_attributes=True),
+            by_alias=True
+        )
+        for index, value in zip(misses, dumped):
+            formatted[index] = value
+            if keys[index][1] is not None:
+                department_format_cache.set(keys[index], value)
+    
+    return formatted
+
 # All routes require admin or principal role
 @router.get("", response_model=None)
 async def get_all_departments(
@@ -29,14 +64,37 @@ async def get_all_departments(
     search: str = Query(None),
     sort_by: str = Query("name"),
     sort_order: str = Query("asc"),
-    db: Session = Depends(get_db)
+    keyset: bool = Query(False, description="Return a keyset page ordered by (sort_by, id), with pagination.nextCursor instead of totals"),
+    cursor: Optional[str] = Query(None, description="nextCursor of the previous keyset page"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all departments
     """
     try:
+        if keyset or cursor:
+            # Keyset pagination: no COUNT(*) and no OFFSET scan
+            departments, next_cursor = await get_departments_page(
+                db=db,
+                cursor=cursor,
+                limit=limit,
+                search=search,
+                sort_by=sort_by,
+                sort_order=sort_order
+            )
+            return ORJSONResponse({
+                "status": "success",
+                "data": {
+                    "departments": format_departments(departments)
+                },
+                "pagination": {
+                    "limit": limit,
+                    "nextCursor": next_cursor
+                }
+            })
+        
         # Get departments with pagination
-        departments, total = get_departments(
+        departments, total = await get_departments(
             db=db, 
             page=page, 
             limit=limit, 
@@ -45,30 +103,11 @@ async def get_all_departments(
             sort_order=sort_order
         )
         
-        # Debug log
-        print(f"DEBUG - Departments: {departments}")
-        print(f"DEBUG - Total: {total}")
-        
         # Format departments to match Express backend format
-        formatted_departments = []
-        for dept in departments:
-            dept_dict = dept.to_dict()
-            # Convert snake_case to camelCase for frontend
-            formatted_dept = {
-                "_id": dept_dict["id"],
-                "name": dept_dict["name"],
-                "code": dept_dict["code"],
-                "description": dept_dict["description"],
-                "establishedDate": dept_dict["established_date"],
-                "isActive": dept_dict["is_active"],
-                "hodId": dept_dict["hod_id"],
-                "createdAt": dept_dict["created_at"],
-                "updatedAt": dept_dict["updated_at"]
-            }
-            formatted_departments.append(formatted_dept)
+        formatted_departments = format_departments(departments)
         
         # Return departments in Express format
-        return {
+        return ORJSONResponse({
             "status": "success",
             "data": {
                 "departments": formatted_departments
@@ -79,9 +118,9 @@ async def get_all_departments(
                 "total": total,
                 "totalPages": (total + limit - 1) // limit
             }
-        }
+        })
     except Exception as e:
-        print(f"DEBUG - Error getting departments: {str(e)}")
+        logger.debug("Error getting departments: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -89,52 +128,28 @@ async def get_all_departments(
 
 @router.post("", response_model=None)
 async def add_department(
-    department_data: dict,
-    db: Session = Depends(get_db)
+    department_data: DepartmentCreateIn,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Add a new department
     """
     try:
-        # Print request data for debugging
-        print(f"DEBUG - Department creation request data: {department_data}")
-        
-        # Convert camelCase to snake_case for backend
-        department_create = DepartmentCreate(
-            name=department_data.get("name"),
-            code=department_data.get("code"),
-            description=department_data.get("description"),
-            established_date=department_data.get("establishedDate"),
-            is_active=department_data.get("isActive", True),
-            hod_id=department_data.get("hodId")
-        )
-        
         # Create department
-        department = create_department(db, department_create)
+        department = await create_department(db, department_data)
         
         # Format department to match Express backend format
-        dept_dict = department.to_dict()
-        formatted_dept = {
-            "_id": dept_dict["id"],
-            "name": dept_dict["name"],
-            "code": dept_dict["code"],
-            "description": dept_dict["description"],
-            "establishedDate": dept_dict["established_date"],
-            "isActive": dept_dict["is_active"],
-            "hodId": dept_dict["hod_id"],
-            "createdAt": dept_dict["created_at"],
-            "updatedAt": dept_dict["updated_at"]
-        }
+        formatted_dept = format_department(department)
         
         # Return in Express format
-        return {
+        return ORJSONResponse({
             "status": "success",
             "data": {
                 "department": formatted_dept
             }
-        }
+        })
     except Exception as e:
-        print(f"DEBUG - Error creating department: {str(e)}")
+        logger.debug("Error creating department: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -143,12 +158,12 @@ async def add_department(
 @router.get("/stats", response_model=DataResponse[DepartmentStats])
 async def get_departments_stats(
     current_user: User = Depends(require_admin_or_principal),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get department statistics
     """
-    stats = get_department_stats(db)
+    stats = await db.run_sync(get_department_stats)
     return DataResponse(
         status="success",
         data=DepartmentStats(**stats)
@@ -157,16 +172,15 @@ async def get_departments_stats(
 @router.post("/import", response_model=None)
 async def import_departments(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Import departments from CSV file
     """
     try:
-        # Debug info
-        print(f"DEBUG - Importing departments from file: {file.filename}")
+        logger.debug("Importing departments from file: %s", file.filename)
         
-        result = import_departments_from_csv(db, file)
+        result = await db.run_sync(import_departments_from_csv, file)
         
         # Format response to match Express backend format
         return {
@@ -179,7 +193,7 @@ async def import_departments(
             }
         }
     except Exception as e:
-        print(f"DEBUG - Error importing departments: {str(e)}")
+        logger.debug("Error importing departments: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -188,16 +202,15 @@ async def import_departments(
 @router.delete("/{department_id}", response_model=None)
 async def delete_department_by_id(
     department_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete department by ID
     """
     try:
-        # Print debug info
-        print(f"DEBUG - Deleting department with ID: {department_id}")
+        logger.debug("Deleting department with ID: %s", department_id)
         
-        delete_department(db, department_id)
+        await delete_department(db, department_id)
         
         # Format response to match Express backend format
         return {
@@ -205,46 +218,36 @@ async def delete_department_by_id(
             "message": "Department deleted successfully"
         }
     except Exception as e:
-        print(f"DEBUG - Error deleting department: {str(e)}")
+        logger.debug("Error deleting department: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
 
-@router.get("/export", response_class=Response)
+@router.get("/export", response_class=StreamingResponse)
 async def export_departments(
     current_user: User = Depends(require_admin_or_principal),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Export departments to CSV file
     """
-    try:
-        csv_content = export_departments_to_csv(db)
-        
-        # Return CSV file
-        response = Response(content=csv_content)
-        response.headers["Content-Disposition"] = "attachment; filename=departments.csv"
-        response.headers["Content-Type"] = "text/csv"
-        
-        return response
-        
-    except AppError as e:
-        raise HTTPException(
-            status_code=e.status_code,
-            detail=e.message
-        )
+    return StreamingResponse(
+        export_departments_to_csv(db),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=departments.csv"}
+    )
 
 @router.get("/{department_id}", response_model=None)
 async def get_department_by_id(
     department_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get department by ID
     """
     try:
-        department = get_department(db, department_id)
+        department = await get_department(db, department_id)
         if not department:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -252,28 +255,17 @@ async def get_department_by_id(
             )
         
         # Format department to match Express backend format
-        dept_dict = department.to_dict()
-        formatted_dept = {
-            "_id": dept_dict["id"],
-            "name": dept_dict["name"],
-            "code": dept_dict["code"],
-            "description": dept_dict["description"],
-            "establishedDate": dept_dict["established_date"],
-            "isActive": dept_dict["is_active"],
-            "hodId": dept_dict["hod_id"],
-            "createdAt": dept_dict["created_at"],
-            "updatedAt": dept_dict["updated_at"]
-        }
+        formatted_dept = format_department(department)
         
         # Return in Express format
-        return {
+        return ORJSONResponse({
             "status": "success",
             "data": {
                 "department": formatted_dept
             }
-        }
+        })
     except Exception as e:
-        print(f"DEBUG - Error getting department: {str(e)}")
+        logger.debug("Error getting department: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -282,28 +274,15 @@ async def get_department_by_id(
 @router.patch("/{department_id}", response_model=None)
 async def update_department_by_id(
     department_id: str,
-    department_data: dict,
-    db: Session = Depends(get_db)
+    department_data: DepartmentUpdateIn,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update department by ID
     """
     try:
-        # Print request data for debugging
-        print(f"DEBUG - Department update request data: {department_data}")
-        
-        # Convert camelCase to snake_case for backend
-        department_update = DepartmentUpdate(
-            name=department_data.get("name"),
-            code=department_data.get("code"),
-            description=department_data.get("description"),
-            established_date=department_data.get("establishedDate"),
-            is_active=department_data.get("isActive"),
-            hod_id=department_data.get("hodId")
-        )
-        
         # Update department
-        department = update_department(db, department_id, department_update)
+        department = await update_department(db, department_id, department_data)
         if not department:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -311,28 +290,17 @@ async def update_department_by_id(
             )
         
         # Format department to match Express backend format
-        dept_dict = department.to_dict()
-        formatted_dept = {
-            "_id": dept_dict["id"],
-            "name": dept_dict["name"],
-            "code": dept_dict["code"],
-            "description": dept_dict["description"],
-            "establishedDate": dept_dict["established_date"],
-            "isActive": dept_dict["is_active"],
-            "hodId": dept_dict["hod_id"],
-            "createdAt": dept_dict["created_at"],
-            "updatedAt": dept_dict["updated_at"]
-        }
+        formatted_dept = format_department(department)
         
         # Return in Express format
-        return {
+        return ORJSONResponse({
             "status": "success",
             "data": {
                 "department": formatted_dept
             }
-        }
+        })
     except Exception as e:
-        print(f"DEBUG - Error updating department: {str(e)}")
+        logger.debug("Error updating department: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Response
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
+from pydantic import TypeAdapter
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
 from app.schemas import (
     FacultyCreate, FacultyUpdate, FacultyResponse, FacultyWithUser,
@@ -11,7 +13,7 @@ from app.schemas import (
 from app.services.faculty import (
     get_faculty, get_faculties, create_faculty, update_faculty,
     delete_faculty, get_faculties_by_department, import_faculties_from_csv,
-    export_faculties_to_csv
+    export_faculties_to_csv, FACULTY_RESPONSE_RELATIONSHIPS
 )
 from app.middleware.auth import require_admin_or_principal
 from app.middleware.error import AppError
@@ -21,24 +23,30 @@ router = APIRouter(
     tags=["faculty"]
 )
 
+# Validators for the list endpoints, compiled once at import so a whole page
+# is validated from the ORM rows in one pydantic-core call
+faculty_list_adapter = TypeAdapter(List[FacultyWithUser])
+faculty_response_list_adapter = TypeAdapter(List[FacultyResponse])
+
 # All routes require admin or principal role
 @router.get("", response_model=PaginatedResponse[List[FacultyWithUser]])
 async def get_all_faculty(
     page: int = Query(1, ge=1),
     limit: int = Query(100, ge=1, le=1000),
     department_id: Optional[str] = None,
+    specialization: Optional[str] = None,
     current_user: User = Depends(require_admin_or_principal),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all faculty members with filtering and pagination
     """
     skip = (page - 1) * limit
-    faculty_members, total = get_faculties(db, skip, limit, department_id)
+    faculty_members, total = await get_faculties(db, skip, limit, department_id, specialization)
     
     return PaginatedResponse(
         status="success",
-        data=[FacultyWithUser.from_orm(faculty) for faculty in faculty_members],
+        data=faculty_list_adapter.validate_python(faculty_members, from_attributes=True),
         pagination=PaginatedMeta(
             page=page,
             limit=limit,
@@ -51,13 +59,14 @@ async def get_all_faculty(
 async def add_faculty(
     faculty_data: FacultyCreate,
     current_user: User = Depends(require_admin_or_principal),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new faculty member
     """
     try:
-        faculty = create_faculty(db, faculty_data)
+        faculty = await db.run_sync(create_faculty, faculty_data)
+        await db.refresh(faculty, FACULTY_RESPONSE_RELATIONSHIPS)
         return DataResponse(
             status="success",
             message="Faculty created successfully",
@@ -69,41 +78,31 @@ async def add_faculty(
             detail=e.message
         )
 
-@router.get("/export-csv", response_class=Response)
+@router.get("/export-csv", response_class=StreamingResponse)
 async def export_faculty_csv(
     current_user: User = Depends(require_admin_or_principal),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Export faculty members to a CSV file
     """
-    try:
-        csv_content = export_faculties_to_csv(db)
-        
-        # Return CSV file
-        response = Response(content=csv_content)
-        response.headers["Content-Disposition"] = "attachment; filename=faculty.csv"
-        response.headers["Content-Type"] = "text/csv"
-        
-        return response
-        
-    except AppError as e:
-        raise HTTPException(
-            status_code=e.status_code,
-            detail=e.message
-        )
+    return StreamingResponse(
+        export_faculties_to_csv(db),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=faculty.csv"}
+    )
 
 @router.post("/upload-csv", response_model=DataResponse)
 async def upload_faculty_csv(
     file: UploadFile = File(...),
     current_user: User = Depends(require_admin_or_principal),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Import faculty members from a CSV file
     """
     try:
-        result = import_faculties_from_csv(db, file)
+        result = await db.run_sync(import_faculties_from_csv, file)
         return DataResponse(
             status="success",
             message="Faculty imported successfully",
@@ -119,12 +118,12 @@ async def upload_faculty_csv(
 async def get_faculty_by_id(
     faculty_id: str,
     current_user: User = Depends(require_admin_or_principal),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get a faculty member by ID
     """
-    faculty = get_faculty(db, faculty_id)
+    faculty = await get_faculty(db, faculty_id)
     if not faculty:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -141,18 +140,19 @@ async def update_faculty_by_id(
     faculty_id: str,
     faculty_data: FacultyUpdate,
     current_user: User = Depends(require_admin_or_principal),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update a faculty member by ID
     """
     try:
-        updated_faculty = update_faculty(db, faculty_id, faculty_data)
+        updated_faculty = await db.run_sync(update_faculty, faculty_id, faculty_data)
         if not updated_faculty:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Faculty not found"
             )
+        await db.refresh(updated_faculty, FACULTY_RESPONSE_RELATIONSHIPS)
         
         return DataResponse(
             status="success",
@@ -169,12 +169,12 @@ async def update_faculty_by_id(
 async def delete_faculty_by_id(
     faculty_id: str,
     current_user: User = Depends(require_admin_or_principal),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete a faculty member by ID
     """
-    success = delete_faculty(db, faculty_id)
+    success = await db.run_sync(delete_faculty, faculty_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -190,14 +190,14 @@ async def delete_faculty_by_id(
 async def get_faculty_by_department(
     department_id: str,
     current_user: User = Depends(require_admin_or_principal),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all faculty members for a specific department
     """
-    faculty_members = get_faculties_by_department(db, department_id)
+    faculty_members = await get_faculties_by_department(db, department_id)
     
     return DataResponse(
         status="success",
-        data=[FacultyResponse.from_orm(faculty) for faculty in faculty_members]
+        data=faculty_response_list_adapter.validate_python(faculty_members, from_attributes=True)
     )
\ No newline at end of file
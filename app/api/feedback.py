@@ -1,9 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Response, File, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, status, Response, File, UploadFile
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Dict, Any
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
 from app.schemas import (
     DataResponse, ResponseBase,
@@ -33,19 +33,18 @@ async def get_feedback_sample():
 
 @router.post("/upload", response_model=ResponseBase)
 async def upload_feedback_data(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_admin)
 ):
     """Upload and process feedback data from CSV"""
-    result = await process_feedback_csv(db, file, background_tasks)
+    result = await process_feedback_csv(db, file)
     return {"status": "success", "message": result}
 
 @router.get("/report/{feedback_id}", response_model=Dict[str, Any])
 async def get_feedback_analysis_report(
     feedback_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_authenticated_user)
 ):
     """Get feedback analysis report by ID"""
@@ -54,7 +53,7 @@ async def get_feedback_analysis_report(
 @router.get("/report/{feedback_id}/latex", response_class=Response)
 async def get_feedback_latex_report(
     feedback_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_authenticated_user)
 ):
     """Get LaTeX format feedback report"""
@@ -68,7 +67,7 @@ async def get_feedback_latex_report(
 @router.get("/report/{feedback_id}/pdf", response_class=Response)
 async def get_feedback_pdf_report(
     feedback_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_authenticated_user)
 ):
     """Get PDF format feedback report"""
@@ -79,16 +78,17 @@ async def get_feedback_pdf_report(
         headers={"Content-Disposition": f"attachment; filename=feedback_report_{feedback_id}.pdf"}
     )
 
-@router.get("/report/{feedback_id}/export", response_class=Response)
+@router.get("/report/{feedback_id}/export", response_class=StreamingResponse)
 async def export_feedback_report(
     feedback_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_authenticated_user)
 ):
     """Export feedback report in multiple formats as ZIP"""
-    content = await generate_feedback_report(db, feedback_id)
-    return Response(
-        content=content,
+    # Resolve the report up front so a missing one is a 404, not a broken stream
+    await get_feedback_report(db, feedback_id)
+    return StreamingResponse(
+        generate_feedback_report(db, feedback_id),
         media_type="application/zip",
         headers={"Content-Disposition": f"attachment; filename=feedback_reports_{feedback_id}.zip"}
-    )
\ No newline at end of file
+    )
@@ -1,47 +1,102 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Response
-from sqlalchemy.orm import Session
-from typing import List, Optional
-
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.exceptions import ResponseValidationError
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import hashlib
+
+from app.database import get_async_db
 from app.models.user import User
 from app.schemas import (
     ProjectCreate, ProjectUpdate, ProjectResponse, ProjectWithDetails,
     TeamCreate, TeamUpdate, TeamResponse, EventCreate, EventUpdate, EventResponse,
-    LocationCreate, LocationUpdate, LocationResponse,
+    LocationCreate, LocationUpdate, LocationResponse, AssignProjectRequest,
+    TeamMemberCreate, DeptEvaluationRequest, CentralEvaluationRequest,
     DataResponse, ResponseBase, PaginatedResponse, PaginatedMeta
 )
 from app.services.project import (
     get_project, get_projects, create_project, update_project, delete_project,
-    get_projects_by_department, get_projects_by_event, get_event_winners,
+    get_projects_by_department, get_projects_by_team, get_projects_by_event, get_event_winners,
     import_projects_from_csv, export_projects_to_csv,
-    get_project_statistics, get_project_counts_by_category
+    get_project_statistics, get_project_counts_by_category, stats_cache
 )
 from app.services.project_team import (
     get_team, get_teams, create_team, update_team, delete_team,
-    get_teams_by_department, get_teams_by_event, get_team_members,
-    add_team_member, remove_team_member, set_team_leader
+    get_teams_by_department, get_teams_by_department_page, get_teams_by_event, get_team_members,
+    add_team_member, remove_team_member, set_team_leader, export_teams_to_csv
 )
 from app.services.project_event import (
-    get_event, get_events, create_event, update_event, delete_event,
-    get_active_events, publish_results, get_event_schedule, update_event_schedule
+    get_event, get_events_page, create_event, update_event, delete_event,
+    get_active_events, publish_results, get_event_schedule, update_event_schedule,
+    export_events_to_csv, active_events_cache
 )
 from app.services.project_location import (
-    get_location, get_locations, create_location, update_location, delete_location,
+    get_location, get_locations_page, create_location, update_location, delete_location,
     get_locations_by_section, get_locations_by_department, get_locations_by_event,
-    assign_project_to_location, unassign_project_from_location
+    assign_project_to_location, unassign_project_from_location, export_locations_to_csv,
+    create_locations
 )
 from app.services.project_evaluation import (
     evaluate_project_by_department, evaluate_project_by_central,
     get_projects_for_jury
 )
-from app.middleware.auth import get_authenticated_user, require_admin, require_jury
+from app.middleware.auth import get_authenticated_user, get_user_department_id, require_admin, require_jury
 from app.middleware.error import AppError
+from app.utils.responses import ORJSONResponse
 
 router = APIRouter(
     prefix="/projects",
     tags=["projects"]
 )
 
+# Validators/serializers for the list endpoints, compiled once at import so a
+# whole page is validated and dumped to JSON bytes in one pydantic-core call
+project_list_adapter = TypeAdapter(List[ProjectResponse])
+team_list_adapter = TypeAdapter(List[TeamResponse])
+event_list_adapter = TypeAdapter(List[EventResponse])
+location_list_adapter = TypeAdapter(List[LocationResponse])
+
+def json_list(adapter: TypeAdapter, rows, next_cursor: Optional[str] = None) -> Response:
+    """
+    Serialize ORM rows through a prebuilt list adapter, skipping FastAPI's
+    per-request response_model validation and jsonable_encoder pass. For a
+    keyset-paginated list the next page's cursor goes in the X-Next-Cursor header
+    """
+    try:
+        items = adapter.validate_python(rows, from_attributes=True)
+    except ValidationError as exc:
+        # Invalid output is a server error, as with a declared response_model
+        raise ResponseValidationError(exc.errors(include_input=False))
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return Response(content=adapter.dump_json(items), media_type="application/json", headers=headers)
+
+def stats_cache_headers(etag: str) -> dict:
+    """
+    Validator headers for project aggregates so dashboards can revalidate cheaply
+    """
+    return {"ETag": etag, "Cache-Control": "private, max-age=30"}
+
+async def cached_aggregate(
+    request: Request,
+    key: str,
+    compute: Callable[[], Awaitable[Dict[str, Any]]]
+) -> Response:
+    """
+    Serve an aggregate from the rendered-body cache, answering If-None-Match with 304
+    """
+    cached = stats_cache.get(key)
+    if cached is None:
+        body = ORJSONResponse(await compute()).body
+        etag = 'W/"{}"'.format(hashlib.blake2b(body, digest_size=16).hexdigest())
+        cached = (etag, body)
+        stats_cache.set(key, cached)
+    
+    etag, body = cached
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=stats_cache_headers(etag))
+    return Response(content=body, media_type="application/json", headers=stats_cache_headers(etag))
+
 # Project Routes
 @router.get("", response_model=PaginatedResponse[List[ProjectResponse]])
 async def get_all_projects(
@@ -52,7 +107,7 @@ async def get_all_projects(
     event: Optional[str] = None,
     sort_by: str = "created_at",
     current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all projects with filtering and pagination"""
     return await get_projects(db, page, limit, search, department, event, sort_by)
@@ -61,177 +116,106 @@ async def get_all_projects(
 async def create_project_endpoint(
     project_data: ProjectCreate,
     current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new project"""
     return await create_project(db, project_data, current_user)
 
-@router.get("/my-projects", response_model=List[ProjectResponse])
+@router.get("/my-projects", response_model=None, responses={200: {"model": List[ProjectResponse]}})
 async def get_my_projects(
-    current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    department_id: Optional[str] = Depends(get_user_department_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get projects for current user"""
     # Use department-based projects for now as a fallback
-    if hasattr(current_user, 'department_id') and current_user.department_id:
-        return await get_projects_by_department(db, current_user.department_id)
-    else:
+    if department_id is None:
         # Return empty list if user has no department
         return []
+    return json_list(project_list_adapter, await get_projects_by_department(db, department_id))
 
-@router.get("/export")
+@router.get("/export", response_class=StreamingResponse)
 async def export_projects_csv(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_admin)
 ):
     """Export projects to CSV"""
-    return await export_projects_to_csv(db)
+    return StreamingResponse(
+        export_projects_to_csv(db),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=projects.csv"}
+    )
 
 @router.post("/import")
 async def import_projects_csv(
     file: UploadFile = File(...),
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Import projects from CSV"""
-    return await import_projects_from_csv(db, file)
+    return await import_projects_from_csv(db, file, current_user)
 
 @router.get("/statistics", response_model=dict)
 async def get_statistics(
+    request: Request,
     current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get project statistics"""
-    return await get_project_statistics(db)
+    return await cached_aggregate(request, "statistics", lambda: get_project_statistics(db))
 
 @router.get("/categories", response_model=dict)
 async def get_category_counts(
+    request: Request,
     current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get project counts by category"""
-    return await get_project_counts_by_category(db)
+    return await cached_aggregate(request, "categories", lambda: get_project_counts_by_category(db))
 
 @router.get("/jury-assignments", response_model=List[ProjectResponse])
 async def get_jury_assignments(
     current_user: User = Depends(require_jury),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get projects assigned to jury"""
     return await get_projects_for_jury(db, current_user.id)
 
 # Department and Event specific project routes
-@router.get("/department/{department_id}", response_model=List[ProjectResponse])
+@router.get("/department/{department_id}", response_model=None, responses={200: {"model": List[ProjectResponse]}})
 async def get_department_projects(
-    department_id: int,
+    department_id: str,
     current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get projects by department"""
-    return await get_projects_by_department(db, department_id)
+    return json_list(project_list_adapter, await get_projects_by_department(db, department_id))
 
-@router.get("/event/{event_id}", response_model=List[ProjectResponse])
+@router.get("/event/{event_id}", response_model=None, responses={200: {"model": List[ProjectResponse]}})
 async def get_event_projects(
     event_id: int,
     current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get projects by event"""
-    return await get_projects_by_event(db, event_id)
+    return json_list(project_list_adapter, await get_projects_by_event(db, event_id))
 
-@router.get("/event/{event_id}/winners", response_model=List[ProjectResponse])
+@router.get("/event/{event_id}/winners", response_model=None, responses={200: {"model": List[ProjectResponse]}})
 async def get_winners(
     event_id: int,
     current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get event winners"""
-    return await get_event_winners(db, event_id)
+    return json_list(project_list_adapter, await get_event_winners(db, event_id))
 
-@router.get("/team/{team_id}", response_model=List[ProjectResponse])
+@router.get("/team/{team_id}", response_model=None, responses={200: {"model": List[ProjectResponse]}})
 async def get_team_projects(
-    team_id: int,
+    team_id: str,
     current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get projects by team"""
-    # This endpoint needs to be implemented in the project service
-    projects = await get_project(db, {'team_id': team_id})
-    if not projects:
-        return []
-    return projects
-
-# Single project routes
-@router.get("/{project_id}", response_model=DataResponse[ProjectResponse])
-async def get_project_by_id(
-    project_id: int,
-    current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
-):
-    """Get a project by ID"""
-    project = await get_project(db, project_id)
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    return {"data": project}
-
-@router.patch("/{project_id}", response_model=DataResponse[ProjectResponse])
-async def update_project_endpoint(
-    project_id: int,
-    project_data: ProjectUpdate,
-    current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
-):
-    """Update a project"""
-    updated_project = await update_project(db, project_id, project_data, current_user)
-    if not updated_project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    return {"data": updated_project}
-
-@router.delete("/{project_id}", response_model=ResponseBase)
-async def delete_project_endpoint(
-    project_id: int,
-    current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
-):
-    """Delete a project"""
-    result = await delete_project(db, project_id)
-    if not result:
-        raise HTTPException(status_code=404, detail="Project not found")
-    return {"message": "Project deleted successfully"}
-
-@router.get("/{project_id}/details", response_model=DataResponse[ProjectWithDetails])
-async def get_project_details(
-    project_id: int,
-    current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
-):
-    """Get project with detailed information"""
-    project = await get_project(db, project_id, include_details=True)
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    return {"data": project}
-
-@router.post("/{project_id}/department-evaluation", response_model=ResponseBase)
-async def evaluate_dept_project(
-    project_id: int,
-    evaluation_data: dict,
-    current_user: User = Depends(require_jury),
-    db: Session = Depends(get_db)
-):
-    """Submit department evaluation for a project"""
-    result = await evaluate_project_by_department(db, project_id, evaluation_data, current_user.id)
-    return {"message": "Department evaluation submitted successfully"}
-
-@router.post("/{project_id}/central-evaluation", response_model=ResponseBase)
-async def evaluate_central_project(
-    project_id: int,
-    evaluation_data: dict,
-    current_user: User = Depends(require_jury),
-    db: Session = Depends(get_db)
-):
-    """Submit central evaluation for a project"""
-    result = await evaluate_project_by_central(db, project_id, evaluation_data, current_user.id)
-    return {"message": "Central evaluation submitted successfully"}
+    return json_list(project_list_adapter, await get_projects_by_team(db, team_id))
 
 # Team Routes
 @router.get("/teams", response_model=PaginatedResponse[List[TeamResponse]])
@@ -239,7 +223,7 @@ async def get_all_teams(
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
     current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all project teams"""
     return await get_teams(db, page, limit)
@@ -248,66 +232,71 @@ async def get_all_teams(
 async def create_team_endpoint(
     team_data: TeamCreate,
     current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new team"""
     return await create_team(db, team_data, current_user)
 
-@router.get("/teams/my-teams", response_model=List[TeamResponse])
+@router.get("/teams/my-teams", response_model=None, responses={200: {"model": List[TeamResponse]}})
 async def get_my_teams(
-    current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Page size; without a cursor or limit the whole list is returned"),
+    department_id: Optional[str] = Depends(get_user_department_id),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get teams for the current user"""
     # This endpoint needs to be implemented in the team service
     # For now we'll filter by department as a fallback
-    if hasattr(current_user, 'department_id') and current_user.department_id:
-        return await get_teams_by_department(db, current_user.department_id)
-    else:
+    if department_id is None:
         return []
+    teams, next_cursor = await get_teams_by_department_page(db, department_id, cursor, limit)
+    return json_list(team_list_adapter, teams, next_cursor)
 
-@router.get("/teams/export")
+@router.get("/teams/export", response_class=StreamingResponse)
 async def export_teams_csv(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_authenticated_user)
 ):
     """Export teams to CSV"""
-    # This endpoint needs to be implemented in the team service
-    raise HTTPException(status_code=501, detail="Not implemented yet")
+    return StreamingResponse(
+        export_teams_to_csv(db),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=teams.csv"}
+    )
 
 @router.post("/teams/import")
 async def import_teams_csv(
     file: UploadFile = File(...),
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Import teams from CSV"""
     # This endpoint needs to be implemented in the team service
     raise HTTPException(status_code=501, detail="Not implemented yet")
 
-@router.get("/teams/department/{department_id}", response_model=List[TeamResponse])
+@router.get("/teams/department/{department_id}", response_model=None, responses={200: {"model": List[TeamResponse]}})
 async def get_department_teams(
-    department_id: int,
+    department_id: str,
     current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get teams by department"""
-    return await get_teams_by_department(db, department_id)
+    return json_list(team_list_adapter, await get_teams_by_department(db, department_id))
 
-@router.get("/teams/event/{event_id}", response_model=List[TeamResponse])
+@router.get("/teams/event/{event_id}", response_model=None, responses={200: {"model": List[TeamResponse]}})
 async def get_event_teams(
     event_id: int,
     current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get teams by event"""
-    return await get_teams_by_event(db, event_id)
+    return json_list(team_list_adapter, await get_teams_by_event(db, event_id))
 
 @router.get("/teams/{team_id}", response_model=DataResponse[TeamResponse])
 async def get_team_by_id(
     team_id: int,
     current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a team by ID"""
     team = await get_team(db, team_id)
@@ -320,7 +309,7 @@ async def update_team_endpoint(
     team_id: int,
     team_data: TeamUpdate,
     current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a team"""
     updated_team = await update_team(db, team_id, team_data, current_user)
@@ -332,7 +321,7 @@ async def update_team_endpoint(
 async def delete_team_endpoint(
     team_id: int,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a team"""
     result = await delete_team(db, team_id)
@@ -344,20 +333,20 @@ async def delete_team_endpoint(
 async def get_members(
     team_id: int,
     current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get team members"""
     return await get_team_members(db, team_id)
 
 @router.post("/teams/{team_id}/members", response_model=ResponseBase)
 async def add_member(
-    team_id: int,
-    member_data: dict,
+    team_id: str,
+    member_data: TeamMemberCreate,
     current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Add a team member"""
-    result = await add_team_member(db, team_id, member_data["user_id"])
+    result = await add_team_member(db, team_id, member_data, current_user)
     return {"message": "Team member added successfully"}
 
 @router.delete("/teams/{team_id}/members/{user_id}", response_model=ResponseBase)
@@ -365,7 +354,7 @@ async def remove_member(
     team_id: int,
     user_id: int,
     current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Remove a team member"""
     result = await remove_team_member(db, team_id, user_id)
@@ -376,51 +365,61 @@ async def set_leader(
     team_id: int,
     user_id: int,
     current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Set team leader"""
     result = await set_team_leader(db, team_id, user_id)
     return {"message": "Team leader set successfully"}
 
 # Event Routes
-@router.get("/events", response_model=List[EventResponse])
+@router.get("/events", response_model=None, responses={200: {"model": List[EventResponse]}})
 async def get_all_events(
+    cursor: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Page size; without a cursor or limit the whole list is returned"),
     current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all project events"""
-    return await get_events(db)
+    events, next_cursor = await get_events_page(db, cursor, limit)
+    return json_list(event_list_adapter, events, next_cursor)
 
 @router.post("/events", response_model=DataResponse[EventResponse])
 async def create_event_endpoint(
     event_data: EventCreate,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new event"""
     return await create_event(db, event_data)
 
-@router.get("/events/active", response_model=List[EventResponse])
+@router.get("/events/active", response_model=None, responses={200: {"model": List[EventResponse]}})
 async def get_active_events_endpoint(
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get active project events"""
-    return await get_active_events(db)
+    body = active_events_cache.get("active")
+    if body is None:
+        body = json_list(event_list_adapter, await get_active_events(db)).body
+        active_events_cache.set("active", body)
+    return Response(content=body, media_type="application/json")
 
-@router.get("/events/export")
+@router.get("/events/export", response_class=StreamingResponse)
 async def export_events_csv(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_admin)
 ):
     """Export events to CSV"""
-    # This endpoint needs to be implemented in the event service
-    raise HTTPException(status_code=501, detail="Not implemented yet")
+    return StreamingResponse(
+        export_events_to_csv(db),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=events.csv"}
+    )
 
 @router.post("/events/import")
 async def import_events_csv(
     file: UploadFile = File(...),
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Import events from CSV"""
     # This endpoint needs to be implemented in the event service
@@ -430,7 +429,7 @@ async def import_events_csv(
 async def get_event_by_id(
     event_id: int,
     current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get an event by ID"""
     event = await get_event(db, event_id)
@@ -443,7 +442,7 @@ async def update_event_endpoint(
     event_id: int,
     event_data: EventUpdate,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update an event"""
     updated_event = await update_event(db, event_id, event_data)
@@ -455,7 +454,7 @@ async def update_event_endpoint(
 async def delete_event_endpoint(
     event_id: int,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete an event"""
     result = await delete_event(db, event_id)
@@ -467,7 +466,7 @@ async def delete_event_endpoint(
 async def publish_event_results(
     event_id: int,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Publish event results"""
     result = await publish_results(db, event_id)
@@ -477,7 +476,7 @@ async def publish_event_results(
 async def get_schedule(
     event_id: int,
     current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get event schedule"""
     return await get_event_schedule(db, event_id)
@@ -487,82 +486,88 @@ async def update_schedule(
     event_id: int,
     schedule_data: dict,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update event schedule"""
     result = await update_event_schedule(db, event_id, schedule_data)
     return {"message": "Event schedule updated successfully"}
 
 # Location Routes
-@router.get("/locations", response_model=List[LocationResponse])
+@router.get("/locations", response_model=None, responses={200: {"model": List[LocationResponse]}})
 async def get_all_locations(
+    cursor: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Page size; without a cursor or limit the whole list is returned"),
     current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all project locations"""
-    return await get_locations(db)
+    locations, next_cursor = await get_locations_page(db, cursor, limit)
+    return json_list(location_list_adapter, locations, next_cursor)
 
 @router.post("/locations", response_model=DataResponse[LocationResponse])
 async def create_location_endpoint(
     location_data: LocationCreate,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new location"""
     return await create_location(db, location_data)
 
-@router.get("/locations/export")
+@router.get("/locations/export", response_class=StreamingResponse)
 async def export_locations_csv(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_admin)
 ):
     """Export locations to CSV"""
-    # This endpoint needs to be implemented in the location service
-    raise HTTPException(status_code=501, detail="Not implemented yet")
+    return StreamingResponse(
+        export_locations_to_csv(db),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=locations.csv"}
+    )
 
 @router.post("/locations/import")
 async def import_locations_csv(
     file: UploadFile = File(...),
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Import locations from CSV"""
     # This endpoint needs to be implemented in the location service
     raise HTTPException(status_code=501, detail="Not implemented yet")
 
-@router.post("/locations/batch", response_model=ResponseBase)
+@router.post("/locations/batch", response_model=DataResponse[List[LocationResponse]])
 async def create_location_batch(
     location_data: List[LocationCreate],
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create multiple locations at once"""
-    # This endpoint needs to be implemented in the location service
-    raise HTTPException(status_code=501, detail="Not implemented yet")
+    locations = await create_locations(db, location_data, current_user)
+    return {"message": f"{len(locations)} locations created successfully", "data": locations}
 
-@router.get("/locations/section/{section}", response_model=List[LocationResponse])
+@router.get("/locations/section/{section}", response_model=None, responses={200: {"model": List[LocationResponse]}})
 async def get_section_locations(
     section: str,
     current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get locations by section"""
-    return await get_locations_by_section(db, section)
+    return json_list(location_list_adapter, await get_locations_by_section(db, section))
 
-@router.get("/locations/department/{department_id}", response_model=List[LocationResponse])
+@router.get("/locations/department/{department_id}", response_model=None, responses={200: {"model": List[LocationResponse]}})
 async def get_department_locations(
-    department_id: int,
+    department_id: str,
     current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get locations by department"""
-    return await get_locations_by_department(db, department_id)
+    return json_list(location_list_adapter, await get_locations_by_department(db, department_id))
 
 @router.get("/locations/event/{event_id}", response_model=List[LocationResponse])
 async def get_event_locations(
     event_id: int,
     current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get locations by event"""
     return await get_locations_by_event(db, event_id)
@@ -571,7 +576,7 @@ async def get_event_locations(
 async def get_location_by_id(
     location_id: int,
     current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a location by ID"""
     location = await get_location(db, location_id)
@@ -584,7 +589,7 @@ async def update_location_endpoint(
     location_id: int,
     location_data: LocationUpdate,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a location"""
     updated_location = await update_location(db, location_id, location_data)
@@ -596,7 +601,7 @@ async def update_location_endpoint(
 async def delete_location_endpoint(
     location_id: int,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a location"""
     result = await delete_location(db, location_id)
@@ -606,21 +611,94 @@ async def delete_location_endpoint(
 
 @router.patch("/locations/{location_id}/assign", response_model=ResponseBase)
 async def assign_project(
-    location_id: int,
-    data: dict,
+    location_id: str,
+    data: AssignProjectRequest,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Assign project to location"""
-    result = await assign_project_to_location(db, location_id, data.get("project_id"))
+    result = await assign_project_to_location(db, location_id, data.project_id, current_user)
     return {"message": "Project assigned to location successfully"}
 
 @router.patch("/locations/{location_id}/unassign", response_model=ResponseBase)
 async def unassign_project(
     location_id: int,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Unassign project from location"""
     result = await unassign_project_from_location(db, location_id)
-    return {"message": "Project unassigned from location successfully"}
\ No newline at end of file
+    return {"message": "Project unassigned from location successfully"}
+
+# Single project routes - declared last so /{project_id} cannot shadow the
+# static /teams, /events and /locations prefixes above
+@router.get("/{project_id}", response_model=DataResponse[ProjectResponse])
+async def get_project_by_id(
+    project_id: int,
+    current_user: User = Depends(get_authenticated_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get a project by ID"""
+    project = await get_project(db, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return {"data": project}
+
+@router.patch("/{project_id}", response_model=DataResponse[ProjectResponse])
+async def update_project_endpoint(
+    project_id: int,
+    project_data: ProjectUpdate,
+    current_user: User = Depends(get_authenticated_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Update a project"""
+    updated_project = await update_project(db, project_id, project_data, current_user)
+    if not updated_project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return {"data": updated_project}
+
+@router.delete("/{project_id}", response_model=ResponseBase)
+async def delete_project_endpoint(
+    project_id: int,
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Delete a project"""
+    result = await delete_project(db, project_id)
+    if not result:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return {"message": "Project deleted successfully"}
+
+@router.get("/{project_id}/details", response_model=DataResponse[ProjectWithDetails])
+async def get_project_details(
+    project_id: str,
+    current_user: User = Depends(get_authenticated_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get project with detailed information"""
+    project = await get_project(db, project_id, include_details=True)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return {"data": project}
+
+@router.post("/{project_id}/department-evaluation", response_model=ResponseBase)
+async def evaluate_dept_project(
+    project_id: str,
+    evaluation_data: DeptEvaluationRequest,
+    current_user: User = Depends(require_jury),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Submit department evaluation for a project"""
+    result = await evaluate_project_by_department(db, project_id, evaluation_data, current_user)
+    return {"message": "Department evaluation submitted successfully"}
+
+@router.post("/{project_id}/central-evaluation", response_model=ResponseBase)
+async def evaluate_central_project(
+    project_id: str,
+    evaluation_data: CentralEvaluationRequest,
+    current_user: User = Depends(require_jury),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Submit central evaluation for a project"""
+    result = await evaluate_project_by_central(db, project_id, evaluation_data, current_user)
+    return {"message": "Central evaluation submitted successfully"}
@@ -1,17 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Response
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from typing import List, Optional, Union
+from pydantic import TypeAdapter
 
-from app.database import get_db
+from app.database import get_async_db, get_async_conn
 from app.models.user import User
 from app.schemas import (
     ResultCreate, ResultResponse, ResultAnalysis, BatchResponse,
-    DataResponse, ResponseBase, PaginatedResponse, PaginatedMeta
+    DataResponse, ResponseBase, PaginatedResponse, PaginatedMeta, KeysetResponse, KeysetMeta
 )
 from app.services.result import (
-    get_result, get_results, import_results, export_results,
+    get_result, get_results, get_results_page, import_results, export_results,
     get_branch_analysis, get_upload_batches, delete_result,
-    delete_results_by_batch, get_student_results
+    delete_results_by_batch, get_student_results, get_result_owner, get_user_enrollment_no
 )
 from app.middleware.auth import get_authenticated_user, require_admin
 from app.middleware.error import AppError
@@ -21,7 +23,15 @@ router = APIRouter(
     tags=["results"]
 )
 
-@router.get("", response_model=PaginatedResponse[List[ResultResponse]])
+# Validates a whole page of results in one pydantic-core call
+result_list_adapter = TypeAdapter(List[ResultResponse])
+
+# Offset and keyset pages of the list endpoint; returned parametrized so the
+# response union resolves to the right model
+ResultPage = PaginatedResponse[List[ResultResponse]]
+ResultKeysetPage = KeysetResponse[List[ResultResponse]]
+
+@router.get("", response_model=Union[ResultPage, ResultKeysetPage])
 async def get_all_results(
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
@@ -30,33 +40,59 @@ async def get_all_results(
     semester: Optional[int] = None,
     exam_type: Optional[str] = None,
     sort_by: str = "declaration_date",
+    keyset: bool = Query(False, description="Return a keyset page ordered by (sort key, id), with pagination.next_cursor instead of totals"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous keyset page"),
     current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all results with filtering and pagination"""
-    return await get_results(db, page, limit, search, branch, semester, exam_type, sort_by)
+    if keyset or cursor:
+        # Keyset pagination: no COUNT(*) and no OFFSET scan
+        results, next_cursor = await get_results_page(db, cursor, limit, search, branch, semester, exam_type, sort_by)
+        return ResultKeysetPage(
+            status="success",
+            data=result_list_adapter.validate_python(results),
+            pagination=KeysetMeta(limit=limit, next_cursor=next_cursor)
+        )
+    
+    results, total = await get_results(db, page, limit, search, branch, semester, exam_type, sort_by)
+    
+    return ResultPage(
+        status="success",
+        data=result_list_adapter.validate_python(results),
+        pagination=PaginatedMeta(
+            page=page,
+            limit=limit,
+            total=total,
+            total_pages=(total + limit - 1) // limit
+        )
+    )
 
 @router.post("/import", response_model=ResponseBase)
 async def import_results_endpoint(
     file: UploadFile = File(...),
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Import results from CSV file"""
     return await import_results(db, file)
 
-@router.get("/export", response_class=Response)
+@router.get("/export", response_class=StreamingResponse)
 async def export_results_endpoint(
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Export results to CSV"""
-    return await export_results(db)
+    return StreamingResponse(
+        export_results(db),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=results_export.csv"}
+    )
 
 @router.get("/analysis", response_model=List[ResultAnalysis])
 async def get_analysis(
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get branch-wise result analysis"""
     return await get_branch_analysis(db)
@@ -64,7 +100,7 @@ async def get_analysis(
 @router.get("/batches", response_model=List[BatchResponse])
 async def get_batches(
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get uploaded result batches"""
     return await get_upload_batches(db)
@@ -73,7 +109,7 @@ async def get_batches(
 async def delete_batch(
     batch_id: str,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete results by batch ID"""
     return await delete_results_by_batch(db, batch_id)
@@ -82,10 +118,11 @@ async def delete_batch(
 async def get_student_results_endpoint(
     enrollment_no: str,
     current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get results for a specific student"""
-    if not current_user.is_admin and current_user.enrollment_no != enrollment_no:
+    # Authorize on the caller's enrollment number before loading any results
+    if current_user.selected_role != "admin" and await get_user_enrollment_no(db, current_user.id) != enrollment_no:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to view these results"
@@ -96,22 +133,27 @@ async def get_student_results_endpoint(
 async def get_result_endpoint(
     id: str,
     current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    conn: AsyncConnection = Depends(get_async_conn)
 ):
     """Get a specific result by ID"""
-    result = await get_result(db, id)
-    if not current_user.is_admin and current_user.enrollment_no != result.student_enrollment_no:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to view this result"
-        )
-    return result
+    # Authorize on the owning enrollment number alone, so a forbidden request
+    # never loads the result and its subjects
+    if current_user.selected_role != "admin":
+        owner = await get_result_owner(conn, id)
+        if owner is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Result not found")
+        if owner != await get_user_enrollment_no(conn, current_user.id):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to view this result"
+            )
+    return await get_result(conn, id)
 
 @router.delete("/{id}", response_model=ResponseBase)
 async def delete_result_endpoint(
     id: str,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a specific result"""
     return await delete_result(db, id)
\ No newline at end of file
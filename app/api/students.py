@@ -1,17 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Response
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
+from pydantic import TypeAdapter
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
 from app.schemas import (
     StudentCreate, StudentUpdate, StudentResponse, StudentWithUser, SyncResult,
-    DataResponse, ResponseBase, PaginatedResponse, PaginatedMeta
+    DataResponse, ResponseBase, PaginatedResponse, PaginatedMeta, KeysetResponse, KeysetMeta
 )
 from app.services.student import (
-    get_student, get_students, create_student, update_student,
+    get_student, get_students, get_students_page, create_student, update_student,
     delete_student, get_students_by_department, sync_student_users,
-    import_students_from_csv, export_students_to_csv
+    import_students_from_csv, export_students_to_csv, STUDENT_RESPONSE_RELATIONSHIPS
 )
 from app.middleware.auth import require_admin_or_principal
 from app.middleware.error import AppError
@@ -21,8 +23,18 @@ router = APIRouter(
     tags=["students"]
 )
 
+# Validators for the list endpoints, compiled once at import so a whole page
+# is validated from the ORM rows in one pydantic-core call
+student_list_adapter = TypeAdapter(List[StudentWithUser])
+student_response_list_adapter = TypeAdapter(List[StudentResponse])
+
+# Offset and keyset pages of the list endpoint; returned parametrized so the
+# response union resolves to the right model
+StudentPage = PaginatedResponse[List[StudentWithUser]]
+StudentKeysetPage = KeysetResponse[List[StudentWithUser]]
+
 # All routes require admin or principal role
-@router.get("", response_model=PaginatedResponse[List[StudentWithUser]])
+@router.get("", response_model=Union[StudentPage, StudentKeysetPage])
 async def get_all_students(
     page: int = Query(1, ge=1),
     limit: int = Query(100, ge=1, le=1000),
@@ -34,21 +46,35 @@ async def get_all_students(
     category: Optional[str] = None,
     sort_by: str = "enrollment_no",
     sort_order: str = "asc",
+    keyset: bool = Query(False, description="Return a keyset page ordered by (sort key, id), with pagination.next_cursor instead of totals"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous keyset page"),
     current_user: User = Depends(require_admin_or_principal),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all students with filtering and pagination
     """
+    if keyset or cursor:
+        # Keyset pagination: no COUNT(*) and no OFFSET scan
+        students, next_cursor = await get_students_page(
+            db, cursor, limit, search, department, batch, semester,
+            semester_status, category, sort_by, sort_order
+        )
+        return StudentKeysetPage(
+            status="success",
+            data=student_list_adapter.validate_python(students, from_attributes=True),
+            pagination=KeysetMeta(limit=limit, next_cursor=next_cursor)
+        )
+    
     skip = (page - 1) * limit
-    students, total = get_students(
+    students, total = await get_students(
         db, skip, limit, search, department, batch, semester, 
         semester_status, category, sort_by, sort_order
     )
     
-    return PaginatedResponse(
+    return StudentPage(
         status="success",
-        data=[StudentWithUser.from_orm(student) for student in students],
+        data=student_list_adapter.validate_python(students, from_attributes=True),
         pagination=PaginatedMeta(
             page=page,
             limit=limit,
@@ -61,13 +87,14 @@ async def get_all_students(
 async def add_student(
     student_data: StudentCreate,
     current_user: User = Depends(require_admin_or_principal),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new student
     """
     try:
-        student = create_student(db, student_data)
+        student = await db.run_sync(create_student, student_data)
+        await db.refresh(student, STUDENT_RESPONSE_RELATIONSHIPS)
         return DataResponse(
             status="success",
             message="Student created successfully",
@@ -82,13 +109,13 @@ async def add_student(
 @router.post("/sync", response_model=DataResponse[SyncResult])
 async def sync_students(
     current_user: User = Depends(require_admin_or_principal),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Sync all users with student role to ensure they have student records
     """
     try:
-        result = sync_student_users(db)
+        result = await db.run_sync(sync_student_users)
         return DataResponse(
             status="success",
             message="Students synced successfully",
@@ -100,41 +127,31 @@ async def sync_students(
             detail=e.message
         )
 
-@router.get("/export-csv", response_class=Response)
+@router.get("/export-csv", response_class=StreamingResponse)
 async def export_student_csv(
     current_user: User = Depends(require_admin_or_principal),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Export students to a CSV file
     """
-    try:
-        csv_content = export_students_to_csv(db)
-        
-        # Return CSV file
-        response = Response(content=csv_content)
-        response.headers["Content-Disposition"] = "attachment; filename=students.csv"
-        response.headers["Content-Type"] = "text/csv"
-        
-        return response
-        
-    except AppError as e:
-        raise HTTPException(
-            status_code=e.status_code,
-            detail=e.message
-        )
+    return StreamingResponse(
+        export_students_to_csv(db),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=students.csv"}
+    )
 
 @router.post("/upload-csv", response_model=DataResponse)
 async def upload_student_csv(
     file: UploadFile = File(...),
     current_user: User = Depends(require_admin_or_principal),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Import students from a CSV file
     """
     try:
-        result = import_students_from_csv(db, file)
+        result = await import_students_from_csv(db, file)
         return DataResponse(
             status="success",
             message="Students imported successfully",
@@ -150,12 +167,12 @@ async def upload_student_csv(
 async def get_student_by_id(
     student_id: str,
     current_user: User = Depends(require_admin_or_principal),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get a student by ID
     """
-    student = get_student(db, student_id)
+    student = await get_student(db, student_id)
     if not student:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -172,18 +189,19 @@ async def update_student_by_id(
     student_id: str,
     student_data: StudentUpdate,
     current_user: User = Depends(require_admin_or_principal),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update a student by ID
     """
     try:
-        updated_student = update_student(db, student_id, student_data)
+        updated_student = await db.run_sync(update_student, student_id, student_data)
         if not updated_student:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Student not found"
             )
+        await db.refresh(updated_student, STUDENT_RESPONSE_RELATIONSHIPS)
         
         return DataResponse(
             status="success",
@@ -200,12 +218,12 @@ async def update_student_by_id(
 async def delete_student_by_id(
     student_id: str,
     current_user: User = Depends(require_admin_or_principal),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete a student by ID
     """
-    success = delete_student(db, student_id)
+    success = await db.run_sync(delete_student, student_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -221,14 +239,14 @@ async def delete_student_by_id(
 async def get_students_by_department_id(
     department_id: str,
     current_user: User = Depends(require_admin_or_principal),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all students for a specific department
     """
-    students_list = get_students_by_department(db, department_id)
+    students_list = await get_students_by_department(db, department_id)
     
     return DataResponse(
         status="success",
-        data=[StudentResponse.from_orm(student) for student in students_list]
+        data=student_response_list_adapter.validate_python(students_list, from_attributes=True)
     )
\ No newline at end of file
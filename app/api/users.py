@@ -1,18 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query, Response
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from typing import List, Optional, Union
+from pydantic import TypeAdapter
 
-from app.database import get_db
-from app.models.user import User
+from app.database import get_async_db, get_async_conn
+from app.models.user import User, hash_password
 from app.schemas import (
-    UserCreate, UserUpdate, UserResponse, DataResponse,
-    ResponseBase, PaginatedResponse, PaginatedMeta
+    UserCreate, UserUpdate, UserDetailResponse, UserResponse, DataResponse,
+    ResponseBase, PaginatedResponse, PaginatedMeta, KeysetResponse, KeysetMeta
 )
 from app.services.user import (
-    get_user, get_users, create_user, update_user,
+    get_user_row, get_users, get_users_page, create_user, update_user,
     delete_user, import_users_from_csv, export_users_to_csv
 )
-from app.middleware.auth import get_authenticated_user, require_admin
+from app.middleware.auth import get_authenticated_user, require_admin, invalidate_user_cache
 from app.middleware.error import AppError
 
 router = APIRouter(
@@ -20,6 +23,10 @@ router = APIRouter(
     tags=["users"]
 )
 
+# Validator for the user list, compiled once at import so a whole page
+# is validated in one pydantic-core call
+user_list_adapter = TypeAdapter(List[UserResponse])
+
 @router.get("/me", response_model=None)
 async def get_current_user_info(
     current_user: User = Depends(get_authenticated_user)
@@ -28,7 +35,7 @@ async def get_current_user_info(
     Get current authenticated user information
     """
     # Format response to match React frontend expectations
-    user_data = current_user.to_dict()
+    user_data = UserDetailResponse.model_validate(current_user).model_dump()
     
     # Ensure selectedRole is set correctly (camelCase for React)
     if not user_data.get("selectedRole") and user_data.get("roles"):
@@ -46,7 +53,7 @@ async def get_current_user_info(
 async def update_current_user(
     user_data: UserUpdate,
     current_user: User = Depends(get_authenticated_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update current authenticated user information
@@ -58,12 +65,14 @@ async def update_current_user(
     )
     
     try:
-        updated_user = update_user(db, current_user.id, filtered_data)
+        updated_user = await db.run_sync(update_user, current_user.id, filtered_data)
         if not updated_user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
+        await db.refresh(updated_user, ["roles"])
+        invalidate_user_cache()
         
         return DataResponse(
             status="success",
@@ -76,8 +85,13 @@ async def update_current_user(
             detail=e.message
         )
 
+# Offset and keyset pages of the list endpoint; returned parametrized so the
+# response union resolves to the right model
+UserPage = PaginatedResponse[List[UserResponse]]
+UserKeysetPage = KeysetResponse[List[UserResponse]]
+
 # Admin routes below - all require admin role
-@router.get("", response_model=PaginatedResponse[List[UserResponse]])
+@router.get("", response_model=Union[UserPage, UserKeysetPage])
 async def get_all_users(
     page: int = Query(1, ge=1),
     limit: int = Query(100, ge=1, le=1000),
@@ -86,20 +100,31 @@ async def get_all_users(
     department: Optional[str] = None,
     sort_by: str = "name",
     sort_order: str = "asc",
+    keyset: bool = Query(False, description="Return a keyset page ordered by (name, id), with pagination.next_cursor instead of totals"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous keyset page"),
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all users with filtering and pagination (admin only)
     """
+    if keyset or cursor:
+        # Keyset pagination ordered by (name, id): no COUNT(*) and no OFFSET scan
+        users, next_cursor = await db.run_sync(get_users_page, cursor, limit, search, role, department)
+        return UserKeysetPage(
+            status="success",
+            data=user_list_adapter.validate_python(users, from_attributes=True),
+            pagination=KeysetMeta(limit=limit, next_cursor=next_cursor)
+        )
+    
     skip = (page - 1) * limit
-    users, total = get_users(
+    users, total = await get_users(
         db, skip, limit, search, role, department, sort_by, sort_order
     )
     
-    return PaginatedResponse(
+    return UserPage(
         status="success",
-        data=[UserResponse.from_orm(user) for user in users],
+        data=user_list_adapter.validate_python(users),
         pagination=PaginatedMeta(
             page=page,
             limit=limit,
@@ -112,13 +137,16 @@ async def get_all_users(
 async def add_user(
     user_data: UserCreate,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new user (admin only)
     """
     try:
-        user = create_user(db, user_data)
+        # bcrypt is slow; hash in the threadpool, not inside run_sync on the loop
+        password_hash = await run_in_threadpool(hash_password, user_data.password)
+        user = await db.run_sync(create_user, user_data, password_hash)
+        await db.refresh(user, ["roles"])
         return DataResponse(
             status="success",
             message="User created successfully",
@@ -130,16 +158,31 @@ async def add_user(
             detail=e.message
         )
 
+# Must be defined before the /{user_id} routes, which would otherwise match it
+@router.get("/export", response_class=StreamingResponse)
+async def export_users(
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Export users to CSV file (admin only)
+    """
+    return StreamingResponse(
+        export_users_to_csv(db),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=users.csv"}
+    )
+
 @router.get("/{user_id}", response_model=DataResponse[UserResponse])
 async def get_user_by_id(
     user_id: str,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    conn: AsyncConnection = Depends(get_async_conn)
 ):
     """
     Get user by ID (admin only)
     """
-    user = get_user(db, user_id)
+    user = await get_user_row(conn, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -148,7 +191,7 @@ async def get_user_by_id(
     
     return DataResponse(
         status="success",
-        data=UserResponse.from_orm(user)
+        data=UserResponse.model_validate(user)
     )
 
 @router.patch("/{user_id}", response_model=DataResponse[UserResponse])
@@ -156,18 +199,20 @@ async def update_user_by_id(
     user_id: str,
     user_data: UserUpdate,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update user by ID (admin only)
     """
     try:
-        updated_user = update_user(db, user_id, user_data)
+        updated_user = await db.run_sync(update_user, user_id, user_data)
         if not updated_user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
+        await db.refresh(updated_user, ["roles"])
+        invalidate_user_cache()
         
         return DataResponse(
             status="success",
@@ -184,17 +229,18 @@ async def update_user_by_id(
 async def delete_user_by_id(
     user_id: str,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete user by ID (admin only)
     """
-    success = delete_user(db, user_id)
+    success = await db.run_sync(delete_user, user_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
+    invalidate_user_cache()
     
     return ResponseBase(
         status="success",
@@ -205,13 +251,13 @@ async def delete_user_by_id(
 async def import_users(
     file: UploadFile = File(...),
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Import users from CSV file (admin only)
     """
     try:
-        result = import_users_from_csv(db, file)
+        result = await db.run_sync(import_users_from_csv, file)
         return DataResponse(
             status="success",
             message=f"Successfully imported users. {len(result['errors'])} errors encountered.",
@@ -222,27 +268,3 @@ async def import_users(
             status_code=e.status_code,
             detail=e.message
         )
-
-@router.get("/export", response_class=Response)
-async def export_users(
-    current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
-):
-    """
-    Export users to CSV file (admin only)
-    """
-    try:
-        csv_content = export_users_to_csv(db)
-        
-        # Return CSV file
-        response = Response(content=csv_content)
-        response.headers["Content-Disposition"] = "attachment; filename=users.csv"
-        response.headers["Content-Type"] = "text/csv"
-        
-        return response
-        
-    except AppError as e:
-        raise HTTPException(
-            status_code=e.status_code,
-            detail=e.message
-        )
\ No newline at end of file
@@ -1,17 +1,107 @@
-from sqlalchemy import create_engine
+import logging
+import time
+
+from sqlalchemy import DateTime, create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.config import (
+    DATABASE_URL, ASYNC_DATABASE_URL,
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_SLOW_QUERY_MS
+)
+
+logger = logging.getLogger(__name__)
+
+# Share of pool_size checked out at which pool pressure is logged
+POOL_WARN_RATIO = 0.8
+
+def warn_on_pool_pressure(pool) -> None:
+    """
+    Log the pool status whenever a checkout leaves it close to exhaustion,
+    before requests start queueing for pool_timeout seconds
+    """
+    threshold = DB_POOL_SIZE * POOL_WARN_RATIO
+
+    @event.listens_for(pool, "checkout")
+    def _check_pool_pressure(dbapi_connection, connection_record, connection_proxy):
+        if pool.checkedout() > threshold:
+            logger.warning("Database connection pool near capacity: %s", pool.status())
+
+# Time every statement on every engine (the async engine runs through a sync
+# Engine underneath) and log the ones slower than DB_SLOW_QUERY_MS
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _log_slow_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info["query_start_time"].pop()) * 1000
+    if elapsed_ms > DB_SLOW_QUERY_MS:
+        logger.warning("Slow query (%.1f ms): %s", elapsed_ms, statement)
+
+# Create SQLAlchemy engine with a QueuePool sized for expected concurrency
+engine = create_engine(
+    DATABASE_URL,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=True
+)
 
-from app.config import DATABASE_URL
+warn_on_pool_pressure(engine.pool)
 
-# Create SQLAlchemy engine
-engine = create_engine(DATABASE_URL)
+# Create session factory; objects keep their loaded state after commit so
+# reading them again does not trigger a reload SELECT
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Async engine and session factory for routes that must not block the event loop
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=True
+)
+
+warn_on_pool_pressure(async_engine.sync_engine.pool)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+class utcnow(FunctionElement):
+    """
+    Current UTC time computed by the database, for timestamp defaults. The
+    columns are naive UTC, so PostgreSQL's now() is converted out of the
+    session time zone
+    """
+    type = DateTime()
+    inherit_cache = True
+
+@compiles(utcnow, "postgresql")
+def _pg_utcnow(element, compiler, **kw):
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
+@compiles(utcnow)
+def _default_utcnow(element, compiler, **kw):
+    # SQLite's CURRENT_TIMESTAMP is already UTC
+    return "CURRENT_TIMESTAMP"
+
+class ModelBase:
+    # Read server-generated defaults (utcnow timestamps) back with RETURNING
+    # on INSERT and UPDATE, so async code never has to lazy load them
+    __mapper_args__ = {"eager_defaults": True}
 
 # Base class for all models
-Base = declarative_base()
+Base = declarative_base(cls=ModelBase)
 
 # Dependency to get DB session
 def get_db():
@@ -19,4 +109,15 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Dependency to get an async DB session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Dependency to get a pooled async connection for read-only routes that run
+# Core statements and need no ORM session or identity map
+async def get_async_conn():
+    async with async_engine.connect() as conn:
+        yield conn
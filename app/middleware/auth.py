@@ -1,26 +1,30 @@
 from fastapi import Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import FrozenSet, List, Optional
 
-from app.database import get_db
 from app.models.user import User
-from app.services.auth import get_current_active_user, check_role
+from app.services.auth import get_current_active_user, check_role, user_cache
+
+# Common auth dependency for all authenticated routes
+def get_authenticated_user(current_user: User = Depends(get_current_active_user)):
+    return current_user
 
 class RoleChecker:
     """
-    Dependency class to check if user has one of the required roles
+    Dependency class to check if user has one of the required roles. It builds
+    on get_authenticated_user, so FastAPI resolves the token and user once per
+    request however many auth dependencies a route uses
     """
     def __init__(self, required_roles: List[str]):
-        self.required_roles = required_roles
+        # Built once per checker, so each request is a single hash lookup
+        self.required_roles: FrozenSet[str] = frozenset(required_roles)
+        self._roles_text = str(list(required_roles))
     
-    def __call__(self, 
-                 current_user: User = Depends(get_current_active_user),
-                 db: Session = Depends(get_db)):
+    def __call__(self, current_user: User = Depends(get_authenticated_user)):
         
         if not check_role(current_user, self.required_roles):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Role {current_user.selected_role} not authorized to perform this action. Required roles: {self.required_roles}"
+                detail=f"Role {current_user.selected_role} not authorized to perform this action. Required roles: {self._roles_text}"
             )
         
         return current_user
@@ -35,6 +39,15 @@ require_jury = RoleChecker(["jury", "admin"])
 require_admin_or_principal = RoleChecker(["admin", "principal"])
 require_admin_or_hod = RoleChecker(["admin", "hod"])
 
-# Common auth dependency for all authenticated routes
-def get_authenticated_user(current_user: User = Depends(get_current_active_user)):
-    return current_user
\ No newline at end of file
+def get_user_department_id(current_user: User = Depends(get_authenticated_user)) -> Optional[str]:
+    """
+    Department of the authenticated user, or None when the user has none
+    """
+    return current_user.department_id
+
+def invalidate_user_cache() -> None:
+    """
+    Drop this worker's cached users, e.g. after a user's roles change; other
+    workers catch up when their short-lived entries expire
+    """
+    user_cache.clear()
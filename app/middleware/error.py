@@ -1,11 +1,11 @@
-from fastapi import Request, status
-from fastapi.responses import JSONResponse
-from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+import orjson
+from fastapi import FastAPI, Request, Response, status
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError, DataError
 from pydantic import ValidationError
 from jose.exceptions import JWTError
-from typing import Union, Any
+from typing import Any, Callable, Dict, Optional, Type
 
-from app.schemas import ErrorResponse
+from app.utils.responses import orjson_default
 
 class AppError(Exception):
     """Custom application error class"""
@@ -16,84 +16,113 @@ class AppError(Exception):
         super().__init__(self.message)
 
 
-async def error_handler(request: Request, call_next) -> JSONResponse:
+def prepare_detail(detail):
+    """Convert detail to dict if it's not already a dict"""
+    if detail is None:
+        return None
+    if isinstance(detail, dict):
+        return detail
+    return {"error": str(detail)}
+
+def _error_prefix(message: str) -> bytes:
+    """ErrorResponse JSON for a fixed message, up to the detail value"""
+    return orjson.dumps({"status": "error", "message": message})[:-1] + b',"detail":'
+
+# Bodies of the fixed-message errors, serialized once at import; each
+# response only encodes its detail and appends it
+_VALIDATION_PREFIX = _error_prefix("Validation error")
+_INTEGRITY_PREFIX = _error_prefix("Database integrity error")
+_DATA_PREFIX = _error_prefix("Invalid value")
+_DATABASE_PREFIX = _error_prefix("Database error")
+_JWT_PREFIX = _error_prefix("Invalid authentication credentials")
+_INTERNAL_PREFIX = _error_prefix("Internal server error")
+
+def error_json(status_code: int, body: bytes, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Wrap an already serialized error body in a JSON response"""
+    return Response(body, status_code=status_code, media_type="application/json", headers=headers)
+
+def app_error_response(exc: AppError) -> Response:
+    """Handle custom app errors"""
+    return error_json(
+        exc.status_code,
+        orjson.dumps(
+            {"status": "error", "message": exc.message, "detail": prepare_detail(exc.detail)},
+            default=orjson_default
+        )
+    )
+
+def validation_error_response(exc: ValidationError) -> Response:
+    """Handle validation errors"""
+    # pydantic renders its own error list, including any non-JSON context
+    return error_json(
+        status.HTTP_422_UNPROCESSABLE_ENTITY,
+        _VALIDATION_PREFIX + b'{"errors":' + exc.json().encode() + b"}}"
+    )
+
+def integrity_error_response(exc: IntegrityError) -> Response:
+    """Handle database integrity errors (e.g. unique constraint violations)"""
+    return error_json(
+        status.HTTP_409_CONFLICT,
+        _INTEGRITY_PREFIX + orjson.dumps(prepare_detail(str(exc))) + b"}"
+    )
+
+def data_error_response(exc: DataError) -> Response:
+    """Handle values the database rejects, such as an id that is not a uuid"""
+    return error_json(
+        status.HTTP_400_BAD_REQUEST,
+        _DATA_PREFIX + orjson.dumps(prepare_detail(str(exc))) + b"}"
+    )
+
+def database_error_response(exc: SQLAlchemyError) -> Response:
+    """Handle general database errors"""
+    return error_json(
+        status.HTTP_500_INTERNAL_SERVER_ERROR,
+        _DATABASE_PREFIX + orjson.dumps(prepare_detail(str(exc))) + b"}"
+    )
+
+def jwt_error_response(exc: JWTError) -> Response:
+    """Handle JWT errors"""
+    return error_json(
+        status.HTTP_401_UNAUTHORIZED,
+        _JWT_PREFIX + orjson.dumps(prepare_detail(str(exc))) + b"}",
+        headers={"WWW-Authenticate": "Bearer"}
+    )
+
+def internal_error_response(exc: Exception) -> Response:
+    """Handle all other exceptions"""
+    return error_json(
+        status.HTTP_500_INTERNAL_SERVER_ERROR,
+        _INTERNAL_PREFIX + orjson.dumps(prepare_detail(str(exc) if str(exc) else None)) + b"}"
+    )
+
+# Response builder per exception class. Subclasses come before their bases
+# (IntegrityError and DataError before SQLAlchemyError) for the isinstance fallback
+_HANDLERS: Dict[Type[Exception], Callable[[Any], Response]] = {
+    AppError: app_error_response,
+    ValidationError: validation_error_response,
+    IntegrityError: integrity_error_response,
+    DataError: data_error_response,
+    SQLAlchemyError: database_error_response,
+    JWTError: jwt_error_response,
+}
+
+async def error_handler(request: Request, exc: Exception) -> Response:
     """
     Global exception handler for the application.
-    Catches all exceptions and returns appropriate JSON responses.
+    Looks the response builder up by the exact exception class, falling back
+    to the first registered base class and then to a 500
+    """
+    handler = _HANDLERS.get(type(exc)) or next(
+        (h for exc_class, h in _HANDLERS.items() if isinstance(exc, exc_class)),
+        internal_error_response
+    )
+    return handler(exc)
+
+def register_error_handlers(app: FastAPI) -> None:
+    """
+    Register error_handler with Starlette's exception handling instead of
+    wrapping every request in a middleware try/except
     """
-    try:
-        return await call_next(request)
-    except Exception as exc:
-        # Convert detail to dict if it's not already a dict
-        def prepare_detail(detail):
-            if detail is None:
-                return None
-            if isinstance(detail, dict):
-                return detail
-            return {"error": str(detail)}
-            
-        # Handle custom app errors
-        if isinstance(exc, AppError):
-            return JSONResponse(
-                status_code=exc.status_code,
-                content=ErrorResponse(
-                    status="error",
-                    message=exc.message,
-                    detail=prepare_detail(exc.detail)
-                ).dict()
-            )
-    
-        # Handle validation errors
-        if isinstance(exc, ValidationError):
-            return JSONResponse(
-                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                content=ErrorResponse(
-                    status="error",
-                    message="Validation error",
-                    detail={"errors": exc.errors()}
-                ).dict()
-            )
-        
-        # Handle database integrity errors (e.g. unique constraint violations)
-        if isinstance(exc, IntegrityError):
-            return JSONResponse(
-                status_code=status.HTTP_409_CONFLICT,
-                content=ErrorResponse(
-                    status="error",
-                    message="Database integrity error",
-                    detail=prepare_detail(str(exc))
-                ).dict()
-            )
-        
-        # Handle general database errors
-        if isinstance(exc, SQLAlchemyError):
-            return JSONResponse(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                content=ErrorResponse(
-                    status="error",
-                    message="Database error",
-                    detail=prepare_detail(str(exc))
-                ).dict()
-            )
-        
-        # Handle JWT errors
-        if isinstance(exc, JWTError):
-            return JSONResponse(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                content=ErrorResponse(
-                    status="error",
-                    message="Invalid authentication credentials",
-                    detail=prepare_detail(str(exc))
-                ).dict(),
-                headers={"WWW-Authenticate": "Bearer"}
-            )
-        
-        # Handle all other exceptions
-        return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            content=ErrorResponse(
-                status="error",
-                message="Internal server error",
-                detail=prepare_detail(str(exc) if str(exc) else None)
-            ).dict()
-        )
\ No newline at end of file
+    for exc_class in _HANDLERS:
+        app.add_exception_handler(exc_class, error_handler)
+    app.add_exception_handler(Exception, error_handler)
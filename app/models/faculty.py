@@ -1,18 +1,18 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Table, DateTime, Boolean, func, ARRAY, JSON
+from sqlalchemy import Column, Integer, String, ForeignKey, Table, DateTime, Boolean, func, JSON, Uuid, Index
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import relationship
-from datetime import datetime
 import uuid
 
-from app.database import Base
+from app.database import Base, utcnow
 
 class Faculty(Base):
     """Faculty model, equivalent to MongoDB's FacultyModel"""
     __tablename__ = "faculties"
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(String(36), ForeignKey("users.id"), nullable=False, unique=True)
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(Uuid(as_uuid=False), ForeignKey("users.id"), nullable=False, unique=True)
     employee_id = Column(String(20), nullable=False, unique=True, index=True)
-    department_id = Column(String(36), ForeignKey("departments.id"), nullable=False)
+    department_id = Column(Uuid(as_uuid=False), ForeignKey("departments.id"), nullable=False)
     designation = Column(String(50), nullable=False)
     specializations = Column(ARRAY(String), nullable=False)
     joining_date = Column(DateTime, nullable=False)
@@ -23,40 +23,25 @@ class Faculty(Base):
     experience_details = Column(String(500), nullable=True)
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, server_default=utcnow())
+    updated_at = Column(DateTime, server_default=utcnow(), onupdate=utcnow())
     
     # Relationships
     user = relationship("User", back_populates="faculty", foreign_keys=[user_id])
     department = relationship("Department", back_populates="faculties")
     qualifications = relationship("FacultyQualification", back_populates="faculty", cascade="all, delete-orphan")
     
-    def to_dict(self):
-        """Convert model to dictionary"""
-        return {
-            "id": self.id,
-            "user_id": self.user_id,
-            "employee_id": self.employee_id,
-            "department_id": self.department_id,
-            "designation": self.designation,
-            "specializations": self.specializations,
-            "joining_date": self.joining_date.isoformat() if self.joining_date else None,
-            "status": self.status,
-            "experience": {
-                "years": self.experience_years,
-                "details": self.experience_details
-            },
-            "qualifications": [q.to_dict() for q in self.qualifications],
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-        }
+    # Serves the specialization filter (specializations @> ARRAY[...])
+    __table_args__ = (
+        Index("ix_faculties_specializations", specializations, postgresql_using="gin"),
+    )
 
 class FacultyQualification(Base):
     """Faculty qualification model"""
     __tablename__ = "faculty_qualifications"
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    faculty_id = Column(String(36), ForeignKey("faculties.id"), nullable=False)
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    faculty_id = Column(Uuid(as_uuid=False), ForeignKey("faculties.id"), nullable=False)
     degree = Column(String(100), nullable=False)
     field = Column(String(100), nullable=False)
     institution = Column(String(200), nullable=False)
@@ -64,13 +49,3 @@ class FacultyQualification(Base):
     
     # Relationships
     faculty = relationship("Faculty", back_populates="qualifications")
-    
-    def to_dict(self):
-        """Convert model to dictionary"""
-        return {
-            "id": self.id,
-            "degree": self.degree,
-            "field": self.field,
-            "institution": self.institution,
-            "year": self.year,
-        }
\ No newline at end of file
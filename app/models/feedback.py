@@ -1,9 +1,12 @@
 from sqlalchemy import Column, String, Integer, Float, DateTime, JSON, ForeignKey
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import relationship
-from datetime import datetime
 import uuid
 
-from app.database import Base
+from app.database import Base, utcnow
+
+# Questions on the feedback form
+QUESTION_COUNT = 12
 
 class FeedbackAnalysis(Base):
     __tablename__ = "feedback_analysis"
@@ -21,22 +24,18 @@ class FeedbackAnalysis(Base):
     total_responses = Column(Integer, default=0)
     average_score = Column(Float, default=0.0)
     
-    # Individual question scores
-    q1_score = Column(Float, default=0.0)
-    q2_score = Column(Float, default=0.0)
-    q3_score = Column(Float, default=0.0)
-    q4_score = Column(Float, default=0.0)
-    q5_score = Column(Float, default=0.0)
-    q6_score = Column(Float, default=0.0)
-    q7_score = Column(Float, default=0.0)
-    q8_score = Column(Float, default=0.0)
-    q9_score = Column(Float, default=0.0)
-    q10_score = Column(Float, default=0.0)
-    q11_score = Column(Float, default=0.0)
-    q12_score = Column(Float, default=0.0)
+    # Question scores in one array cell; scores[i] is question i + 1
+    scores = Column(ARRAY(Float), nullable=False, default=lambda: [0.0] * QUESTION_COUNT)
     
     # Analysis results
     report_data = Column(JSON, nullable=True)
     
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
+    created_at = Column(DateTime, server_default=utcnow())
+    updated_at = Column(DateTime, server_default=utcnow(), onupdate=utcnow())
+
+def _question_score(index: int) -> property:
+    """Read-only qN_score view of one array cell, for the schemas that list them"""
+    return property(lambda self: self.scores[index])
+
+for _index in range(QUESTION_COUNT):
+    setattr(FeedbackAnalysis, f"q{_index + 1}_score", _question_score(_index))
@@ -1,10 +1,10 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Table, DateTime, Boolean, func, ARRAY, JSON, Float, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Table, DateTime, Boolean, func, ARRAY, JSON, Float, Text, Index, DDL, Uuid
+from sqlalchemy.event import listen
 from sqlalchemy.orm import relationship
-from datetime import datetime
 import uuid
 import enum
 
-from app.database import Base
+from app.database import Base, utcnow
 
 class ProjectStatus(enum.Enum):
     DRAFT = "draft"
@@ -17,7 +17,7 @@ class ProjectEvent(Base):
     """Project event model, equivalent to MongoDB's ProjectEventModel"""
     __tablename__ = "project_events"
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
     name = Column(String(100), nullable=False)
     description = Column(Text, nullable=False)
     academic_year = Column(String(20), nullable=False)
@@ -28,10 +28,10 @@ class ProjectEvent(Base):
     status = Column(String(20), default="upcoming")
     publish_results = Column(Boolean, default=False)
     
-    created_by = Column(String(36), ForeignKey("users.id"), nullable=False)
-    updated_by = Column(String(36), ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_by = Column(Uuid(as_uuid=False), ForeignKey("users.id"), nullable=False)
+    updated_by = Column(Uuid(as_uuid=False), ForeignKey("users.id"), nullable=False)
+    created_at = Column(DateTime, server_default=utcnow())
+    updated_at = Column(DateTime, server_default=utcnow(), onupdate=utcnow())
     
     # Relationships
     creator = relationship("User", foreign_keys=[created_by])
@@ -48,26 +48,10 @@ class ProjectEvent(Base):
         backref="events"
     )
     
-    def to_dict(self):
-        """Convert model to dictionary"""
-        return {
-            "id": self.id,
-            "name": self.name,
-            "description": self.description,
-            "academic_year": self.academic_year,
-            "event_date": self.event_date.isoformat() if self.event_date else None,
-            "registration_start_date": self.registration_start_date.isoformat() if self.registration_start_date else None,
-            "registration_end_date": self.registration_end_date.isoformat() if self.registration_end_date else None,
-            "is_active": self.is_active,
-            "status": self.status,
-            "publish_results": self.publish_results,
-            "created_by": self.created_by,
-            "updated_by": self.updated_by,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-            "schedule": [s.to_dict() for s in self.schedule],
-            "departments": [{"id": d.id, "name": d.name, "code": d.code} for d in self.departments]
-        }
+    # /events/active lists only active events, ordered by date
+    __table_args__ = (
+        Index("ix_project_events_active_date", event_date, postgresql_where=(is_active == True)),
+    )
 
 # Association table for event-department relationship
 event_departments = Table(
@@ -81,12 +65,12 @@ class EventSchedule(Base):
     """Event schedule model"""
     __tablename__ = "event_schedules"
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    event_id = Column(String(36), ForeignKey("project_events.id"), nullable=False)
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    event_id = Column(Uuid(as_uuid=False), ForeignKey("project_events.id"), nullable=False)
     time = Column(String(50), nullable=False)
     activity = Column(String(200), nullable=False)
     location = Column(String(100), nullable=False)
-    coordinator_id = Column(String(36), ForeignKey("users.id"))
+    coordinator_id = Column(Uuid(as_uuid=False), ForeignKey("users.id"))
     coordinator_name = Column(String(100), nullable=False)
     notes = Column(String(500), nullable=True)
     
@@ -94,33 +78,24 @@ class EventSchedule(Base):
     event = relationship("ProjectEvent", back_populates="schedule")
     coordinator = relationship("User")
     
-    def to_dict(self):
-        """Convert model to dictionary"""
-        return {
-            "id": self.id,
-            "time": self.time,
-            "activity": self.activity,
-            "location": self.location,
-            "coordinator": {
-                "userId": self.coordinator_id,
-                "name": self.coordinator_name
-            },
-            "notes": self.notes or "",
-        }
+    # Loaded per event by selectinload(ProjectEvent.schedule)
+    __table_args__ = (
+        Index("ix_event_schedules_event_id", event_id),
+    )
 
 class ProjectTeam(Base):
     """Project team model, equivalent to MongoDB's ProjectTeamModel"""
     __tablename__ = "project_teams"
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
     name = Column(String(100), nullable=False)
-    department_id = Column(String(36), ForeignKey("departments.id"), nullable=False)
-    event_id = Column(String(36), ForeignKey("project_events.id"), nullable=False)
+    department_id = Column(Uuid(as_uuid=False), ForeignKey("departments.id"), nullable=False)
+    event_id = Column(Uuid(as_uuid=False), ForeignKey("project_events.id"), nullable=False)
     
-    created_by = Column(String(36), ForeignKey("users.id"), nullable=False)
-    updated_by = Column(String(36), ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_by = Column(Uuid(as_uuid=False), ForeignKey("users.id"), nullable=False)
+    updated_by = Column(Uuid(as_uuid=False), ForeignKey("users.id"), nullable=False)
+    created_at = Column(DateTime, server_default=utcnow())
+    updated_at = Column(DateTime, server_default=utcnow(), onupdate=utcnow())
     
     # Relationships
     department = relationship("Department", back_populates="teams")
@@ -131,27 +106,19 @@ class ProjectTeam(Base):
     creator = relationship("User", foreign_keys=[created_by])
     updater = relationship("User", foreign_keys=[updated_by])
     
-    def to_dict(self):
-        """Convert model to dictionary"""
-        return {
-            "id": self.id,
-            "name": self.name,
-            "department_id": self.department_id,
-            "event_id": self.event_id,
-            "created_by": self.created_by,
-            "updated_by": self.updated_by,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-            "members": [m.to_dict() for m in self.members]
-        }
+    # Teams are listed by department and by event
+    __table_args__ = (
+        Index("ix_project_teams_department_id", department_id),
+        Index("ix_project_teams_event_id", event_id),
+    )
 
 class TeamMember(Base):
     """Team member model"""
     __tablename__ = "team_members"
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    team_id = Column(String(36), ForeignKey("project_teams.id"), nullable=False)
-    user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    team_id = Column(Uuid(as_uuid=False), ForeignKey("project_teams.id"), nullable=False)
+    user_id = Column(Uuid(as_uuid=False), ForeignKey("users.id"), nullable=False)
     name = Column(String(100), nullable=False)
     enrollment_no = Column(String(20), nullable=False)
     role = Column(String(50), default="Member")
@@ -161,35 +128,28 @@ class TeamMember(Base):
     team = relationship("ProjectTeam", back_populates="members")
     user = relationship("User")
     
-    def to_dict(self):
-        """Convert model to dictionary"""
-        return {
-            "id": self.id,
-            "team_id": self.team_id,
-            "user_id": self.user_id,
-            "name": self.name,
-            "enrollment_no": self.enrollment_no,
-            "role": self.role,
-            "is_leader": self.is_leader
-        }
+    # Members are loaded per team and counted per team in the team listing
+    __table_args__ = (
+        Index("ix_team_members_team_id", team_id),
+    )
 
 class ProjectLocation(Base):
     """Project location model, equivalent to MongoDB's ProjectLocationModel"""
     __tablename__ = "project_locations"
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
     location_id = Column(String(20), nullable=False, unique=True)
     section = Column(String(10), nullable=False)
     position = Column(Integer, nullable=False)
-    department_id = Column(String(36), ForeignKey("departments.id"), nullable=False)
-    event_id = Column(String(36), ForeignKey("project_events.id"), nullable=False)
-    project_id = Column(String(36), ForeignKey("projects.id"), nullable=True)
+    department_id = Column(Uuid(as_uuid=False), ForeignKey("departments.id"), nullable=False)
+    event_id = Column(Uuid(as_uuid=False), ForeignKey("project_events.id"), nullable=False)
+    project_id = Column(Uuid(as_uuid=False), ForeignKey("projects.id"), nullable=True)
     is_assigned = Column(Boolean, default=False)
     
-    created_by = Column(String(36), ForeignKey("users.id"), nullable=False)
-    updated_by = Column(String(36), ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_by = Column(Uuid(as_uuid=False), ForeignKey("users.id"), nullable=False)
+    updated_by = Column(Uuid(as_uuid=False), ForeignKey("users.id"), nullable=False)
+    created_at = Column(DateTime, server_default=utcnow())
+    updated_at = Column(DateTime, server_default=utcnow(), onupdate=utcnow())
     
     # Relationships
     department = relationship("Department")
@@ -200,86 +160,55 @@ class ProjectLocation(Base):
     creator = relationship("User", foreign_keys=[created_by])
     updater = relationship("User", foreign_keys=[updated_by])
     
-    def to_dict(self):
-        """Convert model to dictionary"""
-        return {
-            "id": self.id,
-            "location_id": self.location_id,
-            "section": self.section,
-            "position": self.position,
-            "department_id": self.department_id,
-            "event_id": self.event_id,
-            "project_id": self.project_id,
-            "is_assigned": self.is_assigned,
-            "created_by": self.created_by,
-            "updated_by": self.updated_by,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None
-        }
+    # Locations are listed by section, event or department, always in
+    # (section, position) order
+    __table_args__ = (
+        Index("ix_project_locations_section_position", section, position),
+        Index("ix_project_locations_event_section_position", event_id, section, position),
+        Index("ix_project_locations_department_section_position", department_id, section, position),
+    )
 
 class DepartmentEvaluation(Base):
     """Department evaluation model"""
     __tablename__ = "department_evaluations"
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    project_id = Column(String(36), ForeignKey("projects.id"), nullable=False, unique=True)
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    project_id = Column(Uuid(as_uuid=False), ForeignKey("projects.id"), nullable=False, unique=True)
     completed = Column(Boolean, default=False)
     score = Column(Float, nullable=True)
     feedback = Column(Text, nullable=True)
-    jury_id = Column(String(36), ForeignKey("users.id"), nullable=True)
+    jury_id = Column(Uuid(as_uuid=False), ForeignKey("users.id"), nullable=True)
     evaluated_at = Column(DateTime, nullable=True)
     
     # Relationships
     project = relationship("Project", back_populates="dept_evaluation")
     jury = relationship("User", foreign_keys=[jury_id])
-    
-    def to_dict(self):
-        """Convert model to dictionary"""
-        return {
-            "id": self.id,
-            "completed": self.completed,
-            "score": self.score,
-            "feedback": self.feedback,
-            "jury_id": self.jury_id,
-            "evaluated_at": self.evaluated_at.isoformat() if self.evaluated_at else None
-        }
 
 class CentralEvaluation(Base):
     """Central evaluation model"""
     __tablename__ = "central_evaluations"
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    project_id = Column(String(36), ForeignKey("projects.id"), nullable=False, unique=True)
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    project_id = Column(Uuid(as_uuid=False), ForeignKey("projects.id"), nullable=False, unique=True)
     completed = Column(Boolean, default=False)
     score = Column(Float, nullable=True)
     feedback = Column(Text, nullable=True)
-    jury_id = Column(String(36), ForeignKey("users.id"), nullable=True)
+    jury_id = Column(Uuid(as_uuid=False), ForeignKey("users.id"), nullable=True)
     evaluated_at = Column(DateTime, nullable=True)
     
     # Relationships
     project = relationship("Project", back_populates="central_evaluation")
     jury = relationship("User", foreign_keys=[jury_id])
-    
-    def to_dict(self):
-        """Convert model to dictionary"""
-        return {
-            "id": self.id,
-            "completed": self.completed,
-            "score": self.score,
-            "feedback": self.feedback,
-            "jury_id": self.jury_id,
-            "evaluated_at": self.evaluated_at.isoformat() if self.evaluated_at else None
-        }
 
 class Project(Base):
     """Project model, equivalent to MongoDB's ProjectModel"""
     __tablename__ = "projects"
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
     title = Column(String(200), nullable=False)
     category = Column(String(100), nullable=False)
     abstract = Column(Text, nullable=False)
-    department_id = Column(String(36), ForeignKey("departments.id"), nullable=False)
+    department_id = Column(Uuid(as_uuid=False), ForeignKey("departments.id"), nullable=False)
     status = Column(String(20), default=ProjectStatus.DRAFT.value)
     
     # Requirements
@@ -289,20 +218,20 @@ class Project(Base):
     other_requirements = Column(Text, nullable=True)
     
     # Guide
-    guide_user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
+    guide_user_id = Column(Uuid(as_uuid=False), ForeignKey("users.id"), nullable=False)
     guide_name = Column(String(100), nullable=False)
-    guide_department_id = Column(String(36), ForeignKey("departments.id"), nullable=False)
+    guide_department_id = Column(Uuid(as_uuid=False), ForeignKey("departments.id"), nullable=False)
     guide_contact = Column(String(20), nullable=False)
     
     # Relationships
-    team_id = Column(String(36), ForeignKey("project_teams.id"), nullable=False)
-    event_id = Column(String(36), ForeignKey("project_events.id"), nullable=False)
-    location_id = Column(String(36), ForeignKey("project_locations.id"), nullable=True)
+    team_id = Column(Uuid(as_uuid=False), ForeignKey("project_teams.id"), nullable=False)
+    event_id = Column(Uuid(as_uuid=False), ForeignKey("project_events.id"), nullable=False)
+    location_id = Column(Uuid(as_uuid=False), ForeignKey("project_locations.id"), nullable=True)
     
-    created_by = Column(String(36), ForeignKey("users.id"), nullable=False)
-    updated_by = Column(String(36), ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_by = Column(Uuid(as_uuid=False), ForeignKey("users.id"), nullable=False)
+    updated_by = Column(Uuid(as_uuid=False), ForeignKey("users.id"), nullable=False)
+    created_at = Column(DateTime, server_default=utcnow())
+    updated_at = Column(DateTime, server_default=utcnow(), onupdate=utcnow())
     
     # Relationships
     department = relationship("Department", foreign_keys=[department_id])
@@ -320,34 +249,55 @@ class Project(Base):
     dept_evaluation = relationship("DepartmentEvaluation", back_populates="project", uselist=False, cascade="all, delete-orphan")
     central_evaluation = relationship("CentralEvaluation", back_populates="project", uselist=False, cascade="all, delete-orphan")
     
-    def to_dict(self):
-        """Convert model to dictionary"""
+    # Projects are filtered by department and/or event and by team, and
+    # counted by status; the trigram index serves the title ILIKE '%...%' search
+    __table_args__ = (
+        Index("ix_projects_department_event", department_id, event_id),
+        Index("ix_projects_event_id", event_id),
+        Index("ix_projects_team_id", team_id),
+        Index("ix_projects_status", status),
+        Index(
+            "ix_projects_title_trgm", title,
+            postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}
+        ),
+    )
+
+    # The requirement and guide columns grouped the way ProjectBase nests
+    # them, so the schemas read and write projects with from_attributes
+    @property
+    def requirements(self):
         return {
-            "id": self.id,
-            "title": self.title,
-            "category": self.category,
-            "abstract": self.abstract,
-            "department_id": self.department_id,
-            "status": self.status,
-            "requirements": {
-                "power": self.power_required,
-                "internet": self.internet_required,
-                "specialSpace": self.special_space_required,
-                "otherRequirements": self.other_requirements or ""
-            },
-            "guide": {
-                "userId": self.guide_user_id,
-                "name": self.guide_name,
-                "department": self.guide_department_id,
-                "contactNumber": self.guide_contact
-            },
-            "team_id": self.team_id,
-            "event_id": self.event_id,
-            "location_id": self.location_id,
-            "dept_evaluation": self.dept_evaluation.to_dict() if self.dept_evaluation else None,
-            "central_evaluation": self.central_evaluation.to_dict() if self.central_evaluation else None,
-            "created_by": self.created_by,
-            "updated_by": self.updated_by,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None
-        }
\ No newline at end of file
+            "power": self.power_required,
+            "internet": self.internet_required,
+            "special_space": self.special_space_required,
+            "other_requirements": self.other_requirements or ""
+        }
+
+    @requirements.setter
+    def requirements(self, value):
+        self.power_required = value.get("power", self.power_required)
+        self.internet_required = value.get("internet", self.internet_required)
+        self.special_space_required = value.get("special_space", self.special_space_required)
+        self.other_requirements = value.get("other_requirements", self.other_requirements)
+
+    @property
+    def guide(self):
+        return {
+            "user_id": self.guide_user_id,
+            "name": self.guide_name,
+            "department": self.guide_department_id,
+            "contact_number": self.guide_contact
+        }
+
+    @guide.setter
+    def guide(self, value):
+        self.guide_user_id = value.get("user_id", self.guide_user_id)
+        self.guide_name = value.get("name", self.guide_name)
+        self.guide_department_id = value.get("department", self.guide_department_id)
+        self.guide_contact = value.get("contact_number", self.guide_contact)
+
+# ix_projects_title_trgm needs pg_trgm, so enable it whenever create_all builds the table
+listen(
+    Project.__table__, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
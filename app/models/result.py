@@ -1,17 +1,16 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Table, DateTime, Boolean, func, ARRAY, JSON, Float, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Table, DateTime, Boolean, func, ARRAY, JSON, Float, Text, Index, Uuid
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import JSONB
-from datetime import datetime
 import uuid
 
-from app.database import Base
+from app.database import Base, utcnow
 
 class Result(Base):
     """Result model, equivalent to MongoDB's ResultModel"""
     __tablename__ = "results"
     
     # Use a single primary key for simplicity
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
     st_id = Column(String(50), nullable=False)
     enrollment_no = Column(String(20), nullable=False, index=True)
     extype = Column(String(20), nullable=True)
@@ -43,61 +42,38 @@ class Result(Base):
     total_backlog = Column(Integer, default=0)
     
     # Batch tracking
-    upload_batch = Column(String(36), nullable=True, index=True)
+    upload_batch = Column(Uuid(as_uuid=False), nullable=True, index=True)
     
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, server_default=utcnow())
+    updated_at = Column(DateTime, server_default=utcnow(), onupdate=utcnow())
     
     # Relationships
     subjects = relationship("ResultSubject", back_populates="result", cascade="all, delete-orphan")
     
-    # No partitioning for simplicity
-    # __table_args__ = {}
-    
-    
-    def to_dict(self):
-        """Convert model to dictionary"""
-        return {
-            "id": self.id,
-            "st_id": self.st_id,
-            "enrollment_no": self.enrollment_no,
-            "extype": self.extype,
-            "examid": self.examid,
-            "exam": self.exam,
-            "declaration_date": self.declaration_date.isoformat() if self.declaration_date else None,
-            "academic_year": self.academic_year,
-            "semester": self.semester,
-            "unit_no": self.unit_no,
-            "exam_number": self.exam_number,
-            "name": self.name,
-            "instcode": self.instcode,
-            "inst_name": self.inst_name,
-            "course_name": self.course_name,
-            "branch_code": self.branch_code,
-            "branch_name": self.branch_name,
-            "subjects": [s.to_dict() for s in self.subjects],
-            "total_credits": self.total_credits,
-            "earned_credits": self.earned_credits,
-            "spi": self.spi,
-            "cpi": self.cpi,
-            "cgpa": self.cgpa,
-            "result": self.result,
-            "trials": self.trials,
-            "remark": self.remark,
-            "current_backlog": self.current_backlog,
-            "total_backlog": self.total_backlog,
-            "upload_batch": self.upload_batch,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None
-        }
+    # No partitioning for simplicity. Results are listed by branch and
+    # semester, newest declaration first; the trigram indexes serve the
+    # name / enrollment number ILIKE '%...%' search
+    __table_args__ = (
+        Index("ix_results_branch_semester", branch_name, semester),
+        Index("ix_results_declaration_date", declaration_date),
+        Index("ix_results_extype", extype),
+        Index(
+            "ix_results_name_trgm", name,
+            postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}
+        ),
+        Index(
+            "ix_results_enrollment_no_trgm", enrollment_no,
+            postgresql_using="gin", postgresql_ops={"enrollment_no": "gin_trgm_ops"}
+        ),
+    )
 
 
 class ResultSubject(Base):
     """Result subject model"""
     __tablename__ = "result_subjects"
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    result_id = Column(String(36), ForeignKey("results.id"), nullable=False)
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    result_id = Column(Uuid(as_uuid=False), ForeignKey("results.id"), nullable=False, index=True)
     # We'll keep the original foreign key structure for simplicity
     # and handle the relationship in the application code if needed
     
@@ -117,20 +93,3 @@ class ResultSubject(Base):
     
     # Relationships
     result = relationship("Result", back_populates="subjects")
-    
-    def to_dict(self):
-        """Convert model to dictionary"""
-        return {
-            "id": self.id,
-            "code": self.code,
-            "name": self.name,
-            "credits": self.credits,
-            "grade": self.grade,
-            "is_backlog": self.is_backlog,
-            "theory_ese_grade": self.theory_ese_grade,
-            "theory_pa_grade": self.theory_pa_grade,
-            "theory_total_grade": self.theory_total_grade,
-            "practical_pa_grade": self.practical_pa_grade,
-            "practical_viva_grade": self.practical_viva_grade,
-            "practical_total_grade": self.practical_total_grade
-        }
\ No newline at end of file
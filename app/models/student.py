@@ -1,10 +1,9 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Table, DateTime, Boolean, func, ARRAY, JSON, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, Table, DateTime, Boolean, func, ARRAY, JSON, Enum, Index, Uuid
 from sqlalchemy.orm import relationship
-from datetime import datetime
 import uuid
 import enum
 
-from app.database import Base
+from app.database import Base, utcnow
 
 class SemesterStatus(enum.Enum):
     CLEARED = "CLEARED"
@@ -22,9 +21,9 @@ class Student(Base):
     """Student model, equivalent to MongoDB's StudentModel"""
     __tablename__ = "students"
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(String(36), ForeignKey("users.id"), nullable=True)
-    department_id = Column(String(36), ForeignKey("departments.id"), nullable=False)
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(Uuid(as_uuid=False), ForeignKey("users.id"), nullable=True)
+    department_id = Column(Uuid(as_uuid=False), ForeignKey("departments.id"), nullable=False)
     
     # Personal details
     first_name = Column(String(50), nullable=True)
@@ -55,8 +54,8 @@ class Student(Base):
     is_pass_all = Column(Boolean, default=False)
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, server_default=utcnow())
+    updated_at = Column(DateTime, server_default=utcnow(), onupdate=utcnow())
     
     # Relationships
     user = relationship("User", back_populates="student")
@@ -66,46 +65,21 @@ class Student(Base):
     education_background = relationship("StudentEducation", back_populates="student", cascade="all, delete-orphan")
     semester_status = relationship("StudentSemesterStatus", back_populates="student", uselist=False, cascade="all, delete-orphan")
     
-    def to_dict(self):
-        """Convert model to dictionary"""
-        return {
-            "id": self.id,
-            "user_id": self.user_id,
-            "department_id": self.department_id,
-            "first_name": self.first_name,
-            "middle_name": self.middle_name,
-            "last_name": self.last_name,
-            "full_name": self.full_name,
-            "enrollment_no": self.enrollment_no,
-            "personal_email": self.personal_email,
-            "institutional_email": self.institutional_email,
-            "batch": self.batch,
-            "semester": self.semester,
-            "status": self.status,
-            "admission_year": self.admission_year,
-            "gender": self.gender,
-            "category": self.category,
-            "aadhar_no": self.aadhar_no,
-            "is_complete": self.is_complete,
-            "term_close": self.term_close,
-            "is_cancel": self.is_cancel,
-            "is_pass_all": self.is_pass_all,
-            "convo_year": self.convo_year,
-            "shift": self.shift,
-            "guardian": self.guardian.to_dict() if self.guardian else None,
-            "contact": self.contact.to_dict() if self.contact else None,
-            "education_background": [edu.to_dict() for edu in self.education_background],
-            "semester_status": self.semester_status.to_dict() if self.semester_status else None,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-        }
+    # Students are listed by department and batch, or by semester, and paged
+    # on (enrollment_no, id); user_id backs the user joins and name search
+    __table_args__ = (
+        Index("ix_students_department_batch", department_id, batch),
+        Index("ix_students_semester", semester),
+        Index("ix_students_enrollment_no_id", enrollment_no, id),
+        Index("ix_students_user_id", user_id),
+    )
 
 class StudentGuardian(Base):
     """Student guardian model"""
     __tablename__ = "student_guardians"
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    student_id = Column(String(36), ForeignKey("students.id"), nullable=False, unique=True)
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    student_id = Column(Uuid(as_uuid=False), ForeignKey("students.id"), nullable=False, unique=True)
     name = Column(String(100), nullable=True)
     relation = Column(String(50), nullable=True)
     contact = Column(String(20), nullable=True)
@@ -113,22 +87,13 @@ class StudentGuardian(Base):
     
     # Relationships
     student = relationship("Student", back_populates="guardian")
-    
-    def to_dict(self):
-        """Convert model to dictionary"""
-        return {
-            "name": self.name or "",
-            "relation": self.relation or "",
-            "contact": self.contact or "",
-            "occupation": self.occupation or "",
-        }
 
 class StudentContact(Base):
     """Student contact model"""
     __tablename__ = "student_contacts"
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    student_id = Column(String(36), ForeignKey("students.id"), nullable=False, unique=True)
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    student_id = Column(Uuid(as_uuid=False), ForeignKey("students.id"), nullable=False, unique=True)
     mobile = Column(String(20), nullable=True)
     email = Column(String(100), nullable=True)
     address = Column(String(300), nullable=True)
@@ -138,24 +103,13 @@ class StudentContact(Base):
     
     # Relationships
     student = relationship("Student", back_populates="contact")
-    
-    def to_dict(self):
-        """Convert model to dictionary"""
-        return {
-            "mobile": self.mobile or "",
-            "email": self.email or "",
-            "address": self.address or "",
-            "city": self.city or "",
-            "state": self.state or "",
-            "pincode": self.pincode or "",
-        }
 
 class StudentEducation(Base):
     """Student education background model"""
     __tablename__ = "student_education"
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    student_id = Column(String(36), ForeignKey("students.id"), nullable=False)
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    student_id = Column(Uuid(as_uuid=False), ForeignKey("students.id"), nullable=False)
     degree = Column(String(100), nullable=False)
     institution = Column(String(200), nullable=False)
     board = Column(String(100), nullable=False)
@@ -164,23 +118,13 @@ class StudentEducation(Base):
     
     # Relationships
     student = relationship("Student", back_populates="education_background")
-    
-    def to_dict(self):
-        """Convert model to dictionary"""
-        return {
-            "degree": self.degree,
-            "institution": self.institution,
-            "board": self.board,
-            "percentage": self.percentage,
-            "year_of_passing": self.year_of_passing,
-        }
 
 class StudentSemesterStatus(Base):
     """Student semester status model"""
     __tablename__ = "student_semester_status"
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    student_id = Column(String(36), ForeignKey("students.id"), nullable=False, unique=True)
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    student_id = Column(Uuid(as_uuid=False), ForeignKey("students.id"), nullable=False, unique=True)
     sem1 = Column(String(20), default=SemesterStatus.NOT_ATTEMPTED.value)
     sem2 = Column(String(20), default=SemesterStatus.NOT_ATTEMPTED.value)
     sem3 = Column(String(20), default=SemesterStatus.NOT_ATTEMPTED.value)
@@ -192,16 +136,3 @@ class StudentSemesterStatus(Base):
     
     # Relationships
     student = relationship("Student", back_populates="semester_status")
-    
-    def to_dict(self):
-        """Convert model to dictionary"""
-        return {
-            "sem1": self.sem1,
-            "sem2": self.sem2,
-            "sem3": self.sem3,
-            "sem4": self.sem4,
-            "sem5": self.sem5,
-            "sem6": self.sem6,
-            "sem7": self.sem7,
-            "sem8": self.sem8,
-        }
\ No newline at end of file
@@ -1,75 +1,99 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Table, DateTime, Boolean, func, ARRAY, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Table, DateTime, Boolean, func, ARRAY, Text, Index, Uuid
 from sqlalchemy.orm import relationship
-from passlib.context import CryptContext
-from datetime import datetime
 import uuid
+import bcrypt
 
-from app.database import Base
+from app.database import Base, utcnow
+from app.config import BCRYPT_ROUNDS
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hash checked when no user matches a login, so unknown emails cost the same
+_dummy_hash = None
+
+def hash_password(plain_password):
+    """Hash a password with bcrypt at the configured cost"""
+    return bcrypt.hashpw(
+        plain_password.encode("utf-8")[:72], bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    ).decode("utf-8")
+
+def check_password(plain_password, hashed_password):
+    """Check a password against a bcrypt hash using bcrypt's constant-time compare"""
+    try:
+        # bcrypt only looks at the first 72 bytes
+        return bcrypt.checkpw(plain_password.encode("utf-8")[:72], hashed_password.encode("utf-8"))
+    except ValueError:
+        # Malformed or non-bcrypt hash
+        return False
+
+def dummy_verify_password(plain_password):
+    """Burn one bcrypt check so a missing user takes as long as a wrong password"""
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = hash_password("dummy-password")
+    check_password(plain_password, _dummy_hash)
+    return False
 
 # Association table for user roles
 user_roles = Table(
     'user_roles',
     Base.metadata,
-    Column('user_id', String(36), ForeignKey('users.id'), primary_key=True),
-    Column('role_name', String(20), ForeignKey('roles.name'), primary_key=True)
+    Column('user_id', Uuid(as_uuid=False), ForeignKey('users.id'), primary_key=True),
+    Column('role_name', String(20), ForeignKey('roles.name'), primary_key=True),
+    # The primary key leads with user_id; the role filter looks up by role
+    Index('ix_user_roles_role_name', 'role_name')
 )
 
 class User(Base):
     """User model, equivalent to MongoDB's UserModel"""
     __tablename__ = "users"
     
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
     name = Column(String(100), nullable=False)
     email = Column(String(100), nullable=False, unique=True, index=True)
     password = Column(String(100), nullable=False)
-    department_id = Column(String(36), ForeignKey("departments.id"), nullable=True)
+    department_id = Column(Uuid(as_uuid=False), ForeignKey("departments.id"), nullable=True)
     
     # Store roles as a relationship to user_roles table
     roles = relationship("Role", secondary=user_roles, backref="users")
     selected_role = Column(String(20), nullable=True)
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, server_default=utcnow())
+    updated_at = Column(DateTime, server_default=utcnow(), onupdate=utcnow())
     
     # Relationships
     department = relationship("Department", back_populates="users", foreign_keys=[department_id])
     faculty = relationship("Faculty", back_populates="user", uselist=False)
     student = relationship("Student", back_populates="user", uselist=False)
     
+    # Emails are looked up case-insensitively on every login. Lists filter
+    # by department and page on (name, id); the trigram indexes serve the
+    # name / email ILIKE '%...%' search
+    __table_args__ = (
+        Index("ix_users_email_lower", func.lower(email), unique=True),
+        Index("ix_users_department_id", department_id),
+        Index("ix_users_name_id", name, id),
+        Index(
+            "ix_users_name_trgm", name,
+            postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}
+        ),
+        Index(
+            "ix_users_email_trgm", email,
+            postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"}
+        ),
+    )
+    
+    @property
+    def role_names(self) -> frozenset:
+        """Names of the user's roles, for O(1) membership checks"""
+        return frozenset(role.name for role in self.roles)
+    
     def set_password(self, password):
         """Hash the password"""
-        self.password = pwd_context.hash(password)
+        self.password = hash_password(password)
     
     def verify_password(self, plain_password):
-        """Verify the hashed password"""
-        return pwd_context.verify(plain_password, self.password)
-    
-    def to_dict(self, exclude_fields=None):
-        """Convert model to dictionary, excluding sensitive fields"""
-        if exclude_fields is None:
-            exclude_fields = ["password"]
-            
-        result = {
-            "id": self.id,
-            "name": self.name,
-            "email": self.email,
-            "department_id": self.department_id,
-            "roles": [role.name for role in self.roles],
-            "selected_role": self.selected_role,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-        }
-        
-        # Remove excluded fields
-        for field in exclude_fields:
-            if field in result:
-                del result[field]
-                
-        return result
+        """Verify the hashed password in constant time"""
+        return check_password(plain_password, self.password)
 
 class Role(Base):
     """Role model, equivalent to MongoDB's RoleModel"""
@@ -77,18 +101,8 @@ class Role(Base):
     
     name = Column(String(20), primary_key=True)
     description = Column(String(200), nullable=False)
-    # Store permissions as a comma-separated string instead of JSON
-    permissions = Column(String(500), nullable=False)
-    
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Native text[] so permissions come back from the driver as a list
+    permissions = Column(ARRAY(String(50)), nullable=False, default=list)
     
-    def to_dict(self):
-        """Convert model to dictionary"""
-        return {
-            "name": self.name,
-            "description": self.description,
-            "permissions": self.permissions.split(',') if self.permissions else [],
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-        }
\ No newline at end of file
+    created_at = Column(DateTime, server_default=utcnow())
+    updated_at = Column(DateTime, server_default=utcnow(), onupdate=utcnow())
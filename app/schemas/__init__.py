@@ -1,16 +1,16 @@
 from app.schemas.base import (
-    ResponseBase, DataResponse, PaginatedResponse, PaginatedMeta,
+    ResponseBase, DataResponse, PaginatedResponse, PaginatedMeta, KeysetResponse, KeysetMeta,
     FileUploadResponse, CSVImportResponse, CSVExportResponse,
     ErrorResponse, PaginationParams, SearchParams
 )
 from app.schemas.user import (
-    UserBase, UserCreate, UserUpdate, UserInDB, UserResponse,
+    UserBase, UserCreate, UserUpdate, UserInDB, UserOutBase, UserResponse, UserDetailResponse,
     Token, TokenData, LoginRequest, RoleSwitchRequest,
-    RoleBase, RoleCreate, RoleUpdate, RoleInDB, RoleResponse
+    RoleBase, RoleCreate, RoleUpdate, RoleInDB, RoleResponse, UserRolesAssignment
 )
 from app.schemas.department import (
-    DepartmentBase, DepartmentCreate, DepartmentUpdate, DepartmentInDB,
-    DepartmentResponse, DepartmentWithHOD, DepartmentStats
+    DepartmentBase, DepartmentCreate, DepartmentUpdate, DepartmentCreateIn, DepartmentUpdateIn,
+    DepartmentInDB, DepartmentResponse, DepartmentWithHOD, DepartmentStats
 )
 from app.schemas.faculty import (
     QualificationBase, QualificationCreate, QualificationUpdate, QualificationResponse,
@@ -46,18 +46,18 @@ from app.schemas.feedback import (
 
 __all__ = [
     # Base
-    'ResponseBase', 'DataResponse', 'PaginatedResponse', 'PaginatedMeta',
+    'ResponseBase', 'DataResponse', 'PaginatedResponse', 'PaginatedMeta', 'KeysetResponse', 'KeysetMeta',
     'FileUploadResponse', 'CSVImportResponse', 'CSVExportResponse',
     'ErrorResponse', 'PaginationParams', 'SearchParams',
     
     # User
-    'UserBase', 'UserCreate', 'UserUpdate', 'UserInDB', 'UserResponse',
+    'UserBase', 'UserCreate', 'UserUpdate', 'UserInDB', 'UserOutBase', 'UserResponse', 'UserDetailResponse',
     'Token', 'TokenData', 'LoginRequest', 'RoleSwitchRequest',
-    'RoleBase', 'RoleCreate', 'RoleUpdate', 'RoleInDB', 'RoleResponse',
+    'RoleBase', 'RoleCreate', 'RoleUpdate', 'RoleInDB', 'RoleResponse', 'UserRolesAssignment',
     
     # Department
-    'DepartmentBase', 'DepartmentCreate', 'DepartmentUpdate', 'DepartmentInDB',
-    'DepartmentResponse', 'DepartmentWithHOD', 'DepartmentStats',
+    'DepartmentBase', 'DepartmentCreate', 'DepartmentUpdate', 'DepartmentCreateIn', 'DepartmentUpdateIn',
+    'DepartmentInDB', 'DepartmentResponse', 'DepartmentWithHOD', 'DepartmentStats',
     
     # Faculty
     'QualificationBase', 'QualificationCreate', 'QualificationUpdate', 'QualificationResponse',
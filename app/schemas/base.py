@@ -21,6 +21,15 @@ class PaginatedResponse(ResponseBase, Generic[T]):
     data: T
     pagination: PaginatedMeta
 
+# Keyset pages carry the cursor for the next page instead of page counts
+class KeysetMeta(BaseModel):
+    limit: int
+    next_cursor: Optional[str] = None
+
+class KeysetResponse(ResponseBase, Generic[T]):
+    data: T
+    pagination: KeysetMeta
+
 # For file uploads
 class FileUploadResponse(ResponseBase):
     filename: str
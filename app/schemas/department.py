@@ -1,4 +1,5 @@
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, ConfigDict, Field, validator
+from pydantic.alias_generators import to_camel
 from typing import List, Optional
 from datetime import datetime
 
@@ -20,21 +21,35 @@ class DepartmentUpdate(BaseModel):
     established_date: Optional[datetime] = None
     is_active: Optional[bool] = None
 
+class DepartmentCreateIn(DepartmentCreate):
+    """Department creation body as sent by the frontend (camelCase keys)"""
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True)
+
+class DepartmentUpdateIn(DepartmentUpdate):
+    """Department update body as sent by the frontend (camelCase keys)"""
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True)
+
 class DepartmentInDB(DepartmentBase):
     id: str
     hod_id: Optional[str] = None
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
-class DepartmentResponse(DepartmentBase):
-    id: str
-    hod_id: Optional[str] = None
+class DepartmentResponse(BaseModel):
+    """Department in the camelCase shape the React frontend expects"""
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
     
-    class Config:
-        orm_mode = True
+    id: str = Field(alias="_id")
+    name: str
+    code: str
+    description: str
+    established_date: Optional[datetime] = Field(None, alias="establishedDate")
+    is_active: Optional[bool] = Field(None, alias="isActive")
+    hod_id: Optional[str] = Field(None, alias="hodId")
+    created_at: Optional[datetime] = Field(None, alias="createdAt")
+    updated_at: Optional[datetime] = Field(None, alias="updatedAt")
 
 class DepartmentWithHOD(DepartmentResponse):
     hod: Optional[dict] = None
@@ -1,7 +1,10 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
+from app.schemas.user import UserDetailResponse
+from app.schemas.department import DepartmentInDB
+
 class QualificationBase(BaseModel):
     degree: str
     field: str
@@ -20,8 +23,7 @@ class QualificationUpdate(BaseModel):
 class QualificationResponse(QualificationBase):
     id: str
     
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class ExperienceBase(BaseModel):
     years: int = 0
@@ -60,17 +62,16 @@ class FacultyInDB(FacultyBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class FacultyResponse(FacultyBase):
     id: str
     user_id: str
     qualifications: List[QualificationResponse]
     
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class FacultyWithUser(FacultyResponse):
-    user: Optional[Dict[str, Any]] = None
-    department: Optional[Dict[str, Any]] = None
\ No newline at end of file
+    # Read straight off the eager-loaded User/Department rows
+    user: Optional[UserDetailResponse] = None
+    department: Optional[DepartmentInDB] = None
@@ -1,7 +1,10 @@
 from typing import List, Optional, Dict, Any, Literal
 from datetime import datetime
 from enum import Enum
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, validator
+
+from app.schemas.user import UserOutBase
+from app.schemas.department import DepartmentInDB
 
 class ProjectStatus(str, Enum):
     DRAFT = "draft"
@@ -70,7 +73,7 @@ class EventInDB(EventBase):
 class EventResponse(EventBase):
     id: str
     schedule: List[ScheduleItemBase] = []
-    departments: List[Dict[str, Any]] = []  # Department objects
+    departments: List[DepartmentInDB] = []
     
     class Config:
         from_attributes = True  # Updated from orm_mode for Pydantic v2
@@ -88,6 +91,8 @@ class TeamMemberBase(BaseModel):
     enrollment_no: str
     role: str = "Member"
     is_leader: bool = False
+    
+    model_config = ConfigDict(from_attributes=True)
 
 class TeamMemberCreate(TeamMemberBase):
     """Schema for creating team members"""
@@ -232,9 +237,12 @@ class CentralEvaluationRequest(EvaluationBase):
     pass
 
 class EvaluationResponse(EvaluationBase):
+    # Evaluation rows may be stored before they are filled in
+    score: Optional[float] = None
+    feedback: Optional[str] = None
     completed: bool = True
-    jury_id: str
-    evaluated_at: datetime
+    jury_id: Optional[str] = None
+    evaluated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True  # Updated from orm_mode for Pydantic v2
@@ -259,13 +267,19 @@ class ProjectResponse(ProjectBase):
     class Config:
         from_attributes = True  # Updated from orm_mode for Pydantic v2
 
+class GuideUserResponse(UserOutBase):
+    """The guide's user account, without the role names"""
+    id: str
+    
+    model_config = ConfigDict(from_attributes=True)
+
 class ProjectWithDetails(ProjectResponse):
-    department: Optional[Dict[str, Any]] = None
-    team: Optional[Dict[str, Any]] = None
-    event: Optional[Dict[str, Any]] = None
-    location: Optional[Dict[str, Any]] = None
-    guide_user: Optional[Dict[str, Any]] = None
-    guide_department: Optional[Dict[str, Any]] = None
+    department: Optional[DepartmentInDB] = None
+    team: Optional[TeamResponse] = None
+    event: Optional[EventInDB] = None
+    location: Optional[LocationResponse] = None
+    guide_user: Optional[GuideUserResponse] = None
+    guide_department: Optional[DepartmentInDB] = None
 
 # For project statistics
 class ProjectStatistics(BaseModel):
@@ -14,6 +14,9 @@ class SubjectBase(BaseModel):
     practical_pa_grade: Optional[str] = None
     practical_viva_grade: Optional[str] = None
     practical_total_grade: Optional[str] = None
+    
+    class Config:
+        from_attributes = True
 
 class ResultBase(BaseModel):
     st_id: str
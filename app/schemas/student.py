@@ -1,8 +1,11 @@
-from pydantic import BaseModel, Field, validator, EmailStr
+from pydantic import BaseModel, ConfigDict, Field, EmailStr
 from typing import List, Optional, Dict, Any, Literal
 from datetime import datetime
 from enum import Enum
 
+from app.schemas.user import UserDetailResponse
+from app.schemas.department import DepartmentInDB
+
 class SemesterStatus(str, Enum):
     CLEARED = "CLEARED"
     PENDING = "PENDING"
@@ -16,12 +19,16 @@ class StudentStatus(str, Enum):
     DROPPED = "dropped"
 
 class GuardianBase(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     name: str = ""
     relation: str = ""
     contact: str = ""
     occupation: str = ""
 
 class ContactBase(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     mobile: str = ""
     email: str = ""
     address: str = ""
@@ -30,6 +37,8 @@ class ContactBase(BaseModel):
     pincode: str = ""
 
 class EducationBase(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     degree: str
     institution: str
     board: str
@@ -37,6 +46,8 @@ class EducationBase(BaseModel):
     year_of_passing: int
 
 class SemesterStatusBase(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     sem1: SemesterStatus = SemesterStatus.NOT_ATTEMPTED
     sem2: SemesterStatus = SemesterStatus.NOT_ATTEMPTED
     sem3: SemesterStatus = SemesterStatus.NOT_ATTEMPTED
@@ -113,8 +124,7 @@ class StudentInDB(StudentBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class StudentResponse(StudentBase):
     id: str
@@ -124,12 +134,12 @@ class StudentResponse(StudentBase):
     education_background: List[EducationBase] = []
     semester_status: Optional[SemesterStatusBase] = None
     
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class StudentWithUser(StudentResponse):
-    user: Optional[Dict[str, Any]] = None
-    department: Optional[Dict[str, Any]] = None
+    # Read straight off the eager-loaded User/Department rows
+    user: Optional[UserDetailResponse] = None
+    department: Optional[DepartmentInDB] = None
 
 # For syncing student users
 class SyncResult(BaseModel):
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, Field, validator
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, validator
 from typing import List, Optional
 from datetime import datetime
 
@@ -45,6 +45,10 @@ class UserUpdate(BaseModel):
                 raise ValueError(f"Invalid role: {role}")
         return v
 
+def _role_names(roles):
+    """Accept the ORM Role objects of User.roles as well as plain names"""
+    return [getattr(role, "name", role) for role in roles]
+
 class UserInDB(UserBase):
     id: str
     roles: List[str]
@@ -52,16 +56,29 @@ class UserInDB(UserBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+    
+    _roles_to_names = validator('roles', pre=True, allow_reuse=True)(_role_names)
+
+# Output schemas accept whatever a stored row holds: legacy emails that are
+# not valid EmailStr, and users imported without a selected role
+class UserOutBase(BaseModel):
+    name: str
+    email: str
+    department_id: Optional[str] = None
 
-class UserResponse(UserBase):
+class UserResponse(UserOutBase):
     id: str
     roles: List[str]
-    selected_role: str
+    selected_role: Optional[str] = None
+    
+    model_config = ConfigDict(from_attributes=True)
     
-    class Config:
-        orm_mode = True
+    _roles_to_names = validator('roles', pre=True, allow_reuse=True)(_role_names)
+
+class UserDetailResponse(UserResponse):
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
 
 # Authentication schemas
 class Token(BaseModel):
@@ -122,9 +139,11 @@ class RoleInDB(RoleBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class RoleResponse(RoleBase):
-    class Config:
-        orm_mode = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class UserRolesAssignment(BaseModel):
+    user_id: str
+    roles: List[str]
@@ -1,18 +1,60 @@
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
-from jose import JWTError, jwt
+from functools import lru_cache
+from typing import AbstractSet, Optional, Dict, Any
+import time
+from jose import JWTError, ExpiredSignatureError, jwt, jwk
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
-from app.database import get_db
+from app.database import get_async_db
 from app.config import JWT_SECRET, JWT_ALGORITHM, JWT_ACCESS_TOKEN_EXPIRE_MINUTES
 from app.models.user import User
-from app.services.user import get_user
+from app.services.user import get_user_async
 from app.middleware.error import AppError
+from app.utils.cache import TTLCache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login/token")
 
+# HMAC key object built once; jose would otherwise re-construct it from the
+# secret string on every encode and decode
+_signing_key = jwk.construct(JWT_SECRET, JWT_ALGORITHM)
+
+# Decode arguments built once; every token this app issues carries an exp
+# claim, so one without it is rejected rather than treated as never expiring
+_DECODE_ALGORITHMS = [JWT_ALGORITHM]
+_DECODE_OPTIONS = {"require_exp": True}
+
+# Authenticated users by id, so repeat requests skip the user/roles SELECTs.
+# The cache is per process and invalidate_user_cache only clears the worker
+# that handled the write, so entries live just long enough to absorb a burst
+# of requests; another worker sees a deleted or demoted user within seconds
+user_cache = TTLCache(ttl=5, maxsize=10_000)
+
+def _column_copy(obj):
+    """
+    Copy the column values of an ORM object into a new transient instance
+    """
+    mapper = inspect(obj).mapper
+    return mapper.class_(**{attr.key: getattr(obj, attr.key) for attr in mapper.column_attrs})
+
+def snapshot_user(user: User) -> User:
+    """
+    Build a session-independent copy of a user and its roles that later
+    requests can read (or merge into a session) without emitting SQL
+    """
+    copy = _column_copy(user)
+    copy.roles = [_column_copy(role) for role in user.roles]
+    
+    # Mark everything persistent and clean only after the relationship
+    # (and its backref) has been populated
+    for role in copy.roles:
+        make_transient_to_detached(role)
+    make_transient_to_detached(copy)
+    return copy
+
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token
@@ -24,12 +66,33 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
         expire = datetime.utcnow() + timedelta(minutes=JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _signing_key, algorithm=JWT_ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> User:
+@lru_cache(maxsize=4096)
+def _verify_token(token: str) -> Dict[str, Any]:
     """
-    Decode JWT token and return current user
+    Verify a token's signature and claims; cached per token so repeat requests
+    from the same client skip the HMAC verify and base64/JSON decode
+    """
+    return jwt.decode(token, _signing_key, algorithms=_DECODE_ALGORITHMS, options=_DECODE_OPTIONS)
+
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """
+    Decode and verify a JWT access token, raising JWTError if it is invalid or expired
+    """
+    payload = _verify_token(token)
+    
+    # A cached payload was only checked against the clock when first decoded
+    if payload["exp"] < time.time():
+        raise ExpiredSignatureError("Signature has expired.")
+    
+    return payload
+
+async def get_current_user(db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)) -> User:
+    """
+    Decode JWT token and return current user. A cached user is served without
+    touching the session, so no connection is checked out for it
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -38,7 +101,7 @@ async def get_current_user(db: Session = Depends(get_db), token: str = Depends(o
     )
     
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        payload = decode_access_token(token)
         user_id: str = payload.get("id")
         selected_role: str = payload.get("selected_role")
         
@@ -48,12 +111,20 @@ async def get_current_user(db: Session = Depends(get_db), token: str = Depends(o
     except JWTError:
         raise credentials_exception
     
-    user = get_user(db, user_id)
-    if user is None:
-        raise credentials_exception
+    cached_user = user_cache.get(user_id)
+    if cached_user is None:
+        db_user = await get_user_async(db, user_id)
+        if db_user is None:
+            raise credentials_exception
+        cached_user = snapshot_user(db_user)
+        user_cache.set(user_id, cached_user)
+    
+    # Hand out a detached copy: selected_role is set per request below and
+    # must neither leak into the cache nor be flushed by the route's session
+    user = snapshot_user(cached_user)
     
     # Ensure selected role is in the user's roles
-    if selected_role and selected_role not in [role.name for role in user.roles]:
+    if selected_role and selected_role not in user.role_names:
         user.selected_role = user.roles[0].name if user.roles else None
     else:
         user.selected_role = selected_role
@@ -66,7 +137,7 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
     """
     return current_user
 
-def check_role(user: User, required_roles: list[str]) -> bool:
+def check_role(user: User, required_roles: AbstractSet[str]) -> bool:
     """
     Check if user has one of the required roles
     """
@@ -1,6 +1,7 @@
-from typing import List, Optional, Dict, Any, Tuple
-from sqlalchemy.orm import Session
-from sqlalchemy import func, case
+from typing import List, Optional, Dict, Any, Tuple, AsyncIterator
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, case, select, tuple_, literal
 from fastapi import UploadFile, status
 import csv
 import io
@@ -10,17 +11,33 @@ from app.models.department import Department
 from app.models.user import User
 from app.schemas.department import DepartmentCreate, DepartmentUpdate
 from app.middleware.error import AppError
+from app.utils.pagination import apply_keyset, decode_cursor, split_page
 
-def get_department(db: Session, department_id: str) -> Optional[Department]:
+# Rows written per INSERT/UPDATE batch when importing CSV files
+IMPORT_BATCH_SIZE = 1000
+
+async def get_department(db: AsyncSession, department_id: str) -> Optional[Department]:
     """Get a department by ID"""
-    return db.query(Department).filter(Department.id == department_id).first()
+    return await db.get(Department, department_id)
 
-def get_department_by_code(db: Session, code: str) -> Optional[Department]:
+async def get_department_by_code(db: AsyncSession, code: str) -> Optional[Department]:
     """Get a department by code"""
-    return db.query(Department).filter(Department.code == code).first()
+    result = await db.execute(select(Department).where(Department.code == code))
+    return result.scalars().first()
+
+def _filter_departments(query, search: Optional[str] = None):
+    """Apply the department list search filter to a select"""
+    if search:
+        search_term = f"%{search}%"
+        query = query.where(
+            Department.name.ilike(search_term) | 
+            Department.code.ilike(search_term) | 
+            Department.description.ilike(search_term)
+        )
+    return query
 
-def get_departments(
-    db: Session, 
+async def get_departments(
+    db: AsyncSession, 
     page: int = 1,
     limit: int = 10,
     search: Optional[str] = None,
@@ -28,19 +45,11 @@ def get_departments(
     sort_order: str = "asc"
 ) -> Tuple[List[Department], int]:
     """Get all departments with pagination"""
-    query = db.query(Department)
-    
     # Apply search filter if provided
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            Department.name.ilike(search_term) | 
-            Department.code.ilike(search_term) | 
-            Department.description.ilike(search_term)
-        )
+    query = _filter_departments(select(Department), search)
     
     # Get total count for pagination
-    total = query.count()
+    total = await db.scalar(select(func.count()).select_from(query.subquery()))
     
     # Apply sorting
     if sort_order.lower() == "desc":
@@ -54,12 +63,58 @@ def get_departments(
     # Apply pagination
     query = query.offset(skip).limit(limit)
     
-    return query.all(), total
+    result = await db.execute(query)
+    return list(result.scalars().all()), total
+
+async def get_departments_page(
+    db: AsyncSession,
+    cursor: Optional[str] = None,
+    limit: int = 10,
+    search: Optional[str] = None,
+    sort_by: str = "name",
+    sort_order: str = "asc"
+) -> Tuple[List[Department], Optional[str]]:
+    """Get the page of departments after `cursor`, ordered by (sort_by, id), with the next page's cursor"""
+    query = _filter_departments(select(Department), search)
+    sort_column = getattr(Department, sort_by)
+    
+    cursor_key = None
+    if cursor:
+        after = decode_cursor(cursor)
+        cursor_key = tuple_(
+            select(sort_column).where(Department.id == after).scalar_subquery(),
+            literal(after, Department.id.type)
+        )
+    
+    query = apply_keyset(query, [sort_column, Department.id], cursor_key, sort_order.lower() == "desc")
+    result = await db.execute(query.limit(limit + 1))
+    return split_page(list(result.scalars().all()), limit)
+
+async def _get_hod(db: AsyncSession, hod_id: str) -> User:
+    """Load and validate the user being assigned as head of department"""
+    result = await db.execute(
+        select(User).options(selectinload(User.roles)).where(User.id == hod_id)
+    )
+    hod = result.scalars().first()
+    if not hod:
+        raise AppError(
+            message=f"User with ID {hod_id} not found",
+            status_code=status.HTTP_404_NOT_FOUND
+        )
+    
+    # Check if user has HOD role
+    if 'hod' not in hod.role_names:
+        raise AppError(
+            message=f"User must have HOD role to be assigned as department head",
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
+    
+    return hod
 
-def create_department(db: Session, department: DepartmentCreate) -> Department:
+async def create_department(db: AsyncSession, department: DepartmentCreate) -> Department:
     """Create a new department"""
     # Check if department code already exists
-    existing_department = get_department_by_code(db, department.code)
+    existing_department = await get_department_by_code(db, department.code)
     if existing_department:
         raise AppError(
             message=f"Department code {department.code} already exists",
@@ -68,19 +123,7 @@ def create_department(db: Session, department: DepartmentCreate) -> Department:
     
     # Check if HOD user exists if provided
     if department.hod_id:
-        hod = db.query(User).filter(User.id == department.hod_id).first()
-        if not hod:
-            raise AppError(
-                message=f"User with ID {department.hod_id} not found",
-                status_code=status.HTTP_404_NOT_FOUND
-            )
-        
-        # Check if user has HOD role
-        if 'hod' not in [role.name for role in hod.roles]:
-            raise AppError(
-                message=f"User must have HOD role to be assigned as department head",
-                status_code=status.HTTP_400_BAD_REQUEST
-            )
+        await _get_hod(db, department.hod_id)
     
     # Create the department
     db_department = Department(
@@ -94,14 +137,14 @@ def create_department(db: Session, department: DepartmentCreate) -> Department:
     
     # Add to database
     db.add(db_department)
-    db.commit()
-    db.refresh(db_department)
+    await db.commit()
+    await db.refresh(db_department)
     
     return db_department
 
-def update_department(db: Session, department_id: str, department: DepartmentUpdate) -> Optional[Department]:
+async def update_department(db: AsyncSession, department_id: str, department: DepartmentUpdate) -> Optional[Department]:
     """Update an existing department"""
-    db_department = get_department(db, department_id)
+    db_department = await get_department(db, department_id)
     if not db_department:
         return None
     
@@ -111,7 +154,7 @@ def update_department(db: Session, department_id: str, department: DepartmentUpd
     
     if department.code is not None and department.code != db_department.code:
         # Check if new code already exists
-        existing_department = get_department_by_code(db, department.code)
+        existing_department = await get_department_by_code(db, department.code)
         if existing_department and existing_department.id != department_id:
             raise AppError(
                 message=f"Department code {department.code} already exists",
@@ -134,37 +177,23 @@ def update_department(db: Session, department_id: str, department: DepartmentUpd
             # If empty string, set to None (remove HOD)
             db_department.hod_id = None
         else:
-            # Check if HOD user exists
-            hod = db.query(User).filter(User.id == department.hod_id).first()
-            if not hod:
-                raise AppError(
-                    message=f"User with ID {department.hod_id} not found",
-                    status_code=status.HTTP_404_NOT_FOUND
-                )
-            
-            # Check if user has HOD role
-            if 'hod' not in [role.name for role in hod.roles]:
-                raise AppError(
-                    message=f"User must have HOD role to be assigned as department head",
-                    status_code=status.HTTP_400_BAD_REQUEST
-                )
-            
+            await _get_hod(db, department.hod_id)
             db_department.hod_id = department.hod_id
     
     # Commit changes
-    db.commit()
-    db.refresh(db_department)
+    await db.commit()
+    await db.refresh(db_department)
     
     return db_department
 
-def delete_department(db: Session, department_id: str) -> bool:
+async def delete_department(db: AsyncSession, department_id: str) -> bool:
     """Delete a department"""
-    db_department = get_department(db, department_id)
+    db_department = await get_department(db, department_id)
     if not db_department:
         return False
     
-    db.delete(db_department)
-    db.commit()
+    await db.delete(db_department)
+    await db.commit()
     
     return True
 
@@ -181,20 +210,30 @@ def get_department_stats(db: Session) -> Dict[str, int]:
         "inactive_count": stats.inactive_count or 0
     }
 
+def _parse_established_date(value: str) -> datetime:
+    """Parse an EstablishedDate cell in any of the accepted formats"""
+    for date_format in ('%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y'):
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid date format: {value}. Use YYYY-MM-DD.")
+
 def import_departments_from_csv(db: Session, file: UploadFile) -> Dict[str, Any]:
-    """Import departments from a CSV file"""
+    """Import departments from a CSV file using batched bulk inserts/updates"""
     if not file.filename.endswith('.csv'):
         raise AppError(
             message="File must be a CSV",
             status_code=status.HTTP_400_BAD_REQUEST
         )
     
-    # Read CSV file
-    content = file.file.read().decode('utf-8')
-    csv_reader = csv.DictReader(io.StringIO(content))
+    # Decode the spooled upload line by line instead of reading it into memory
+    text = io.TextIOWrapper(file.file, encoding='utf-8', newline='')
+    csv_reader = csv.DictReader(text)
     
-    # Process rows
-    successful = []
+    # Parse and validate rows; later rows win when a code appears twice
+    rows_by_code = {}
+    row_numbers = {}
     failed = []
     for i, row in enumerate(csv_reader):
         try:
@@ -204,55 +243,19 @@ def import_departments_from_csv(db: Session, file: UploadFile) -> Dict[str, Any]
                 if field not in row or not row[field]:
                     raise ValueError(f"Missing required field: {field}")
             
-            # Parse data
-            name = row['Name'].strip()
             code = row['Code'].strip().upper()
-            description = row['Description'].strip()
-            established_date_str = row['EstablishedDate'].strip()
-            
-            # Parse date
-            try:
-                established_date = datetime.strptime(established_date_str, '%Y-%m-%d')
-            except ValueError:
-                try:
-                    established_date = datetime.strptime(established_date_str, '%d/%m/%Y')
-                except ValueError:
-                    try:
-                        established_date = datetime.strptime(established_date_str, '%m/%d/%Y')
-                    except ValueError:
-                        raise ValueError(f"Invalid date format: {established_date_str}. Use YYYY-MM-DD.")
             
             # Parse boolean
             is_active_str = row.get('IsActive', 'true').strip().lower()
-            is_active = is_active_str in ['true', '1', 'yes', 'y']
-            
-            # Try to update existing department or create new one
-            existing_department = get_department_by_code(db, code)
-            if existing_department:
-                # Update existing department
-                existing_department.name = name
-                existing_department.description = description
-                existing_department.established_date = established_date
-                existing_department.is_active = is_active
-                db.commit()
-                db.refresh(existing_department)
-                successful.append(existing_department)
-            else:
-                # Create new department
-                new_department = Department(
-                    name=name,
-                    code=code,
-                    description=description,
-                    established_date=established_date,
-                    is_active=is_active
-                )
-                db.add(new_department)
-                db.commit()
-                db.refresh(new_department)
-                # Mark as new for counting
-                setattr(new_department, '_is_new', True)
-                successful.append(new_department)
             
+            rows_by_code[code] = {
+                "name": row['Name'].strip(),
+                "code": code,
+                "description": row['Description'].strip(),
+                "established_date": _parse_established_date(row['EstablishedDate'].strip()),
+                "is_active": is_active_str in ['true', '1', 'yes', 'y']
+            }
+            row_numbers[code] = (i + 1, row)
         except Exception as e:
             failed.append({
                 "row": i + 1,
@@ -260,16 +263,51 @@ def import_departments_from_csv(db: Session, file: UploadFile) -> Dict[str, Any]
                 "error": str(e)
             })
     
-    # Format the response to match Express backend format
+    # Hand the upload back untouched so UploadFile can close it
+    text.detach()
+    
+    # Write in batches: one lookup per batch, then multi-row INSERT/UPDATE
+    rows = list(rows_by_code.values())
+    successful = []
     imported_count = 0
     updated_count = 0
+    for start in range(0, len(rows), IMPORT_BATCH_SIZE):
+        batch = rows[start:start + IMPORT_BATCH_SIZE]
+        existing_ids = dict(db.execute(
+            select(Department.code, Department.id)
+            .where(Department.code.in_([row["code"] for row in batch]))
+        ).all())
+        name_owners = dict(db.execute(
+            select(Department.name, Department.code)
+            .where(Department.name.in_([row["name"] for row in batch]))
+        ).all())
+        
+        inserts = []
+        updates = []
+        for row in batch:
+            owner = name_owners.get(row["name"])
+            if owner is not None and owner != row["code"]:
+                row_number, data = row_numbers[row["code"]]
+                failed.append({
+                    "row": row_number,
+                    "data": data,
+                    "error": f"Department name {row['name']} already exists"
+                })
+                continue
+            name_owners[row["name"]] = row["code"]
+            
+            if row["code"] in existing_ids:
+                updates.append({**row, "id": existing_ids[row["code"]]})
+            else:
+                inserts.append(row)
+            successful.append(row)
+        
+        db.bulk_insert_mappings(Department, inserts)
+        db.bulk_update_mappings(Department, updates)
+        imported_count += len(inserts)
+        updated_count += len(updates)
     
-    # Count new vs updated departments
-    for dept in successful:
-        if hasattr(dept, '_is_new') and dept._is_new:
-            imported_count += 1
-        else:
-            updated_count += 1
+    db.commit()
     
     return {
         "imported": imported_count,
@@ -280,25 +318,35 @@ def import_departments_from_csv(db: Session, file: UploadFile) -> Dict[str, Any]
         "message": f"{imported_count} departments imported, {updated_count} updated, {len(failed)} failed"
     }
 
-def export_departments_to_csv(db: Session) -> str:
-    """Export departments to a CSV file"""
-    departments = db.query(Department).all()
-    
-    # Prepare CSV data
-    output = io.StringIO()
-    fieldnames = ['Name', 'Code', 'Description', 'EstablishedDate', 'IsActive']
-    writer = csv.DictWriter(output, fieldnames=fieldnames)
-    writer.writeheader()
-    
-    for department in departments:
-        established_date = department.established_date.strftime('%Y-%m-%d') if department.established_date else ''
-        
-        writer.writerow({
-            'Name': department.name,
-            'Code': department.code,
-            'Description': department.description,
-            'EstablishedDate': established_date,
-            'IsActive': 'Yes' if department.is_active else 'No'
-        })
-    
-    return output.getvalue()
\ No newline at end of file
+async def export_departments_to_csv(db: AsyncSession, batch_size: int = 1000) -> AsyncIterator[str]:
+    """Export departments as CSV, yielding one chunk per batch of rows fetched from the cursor"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    
+    def flush() -> str:
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return data
+    
+    writer.writerow(['Name', 'Code', 'Description', 'EstablishedDate', 'IsActive'])
+    yield flush()
+    
+    result = await db.stream(
+        select(
+            Department.name, Department.code, Department.description,
+            Department.established_date, Department.is_active
+        ).execution_options(yield_per=batch_size)
+    )
+    async for rows in result.partitions():
+        writer.writerows(
+            (
+                name,
+                code,
+                description,
+                established_date.strftime('%Y-%m-%d') if established_date else '',
+                'Yes' if is_active else 'No'
+            )
+            for name, code, description, established_date, is_active in rows
+        )
+        yield flush()
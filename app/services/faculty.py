@@ -1,21 +1,40 @@
-from typing import List, Optional, Dict, Any, Tuple
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, func
+from typing import List, Optional, Dict, Any, Tuple, AsyncIterator
+from sqlalchemy.orm import Session, selectinload, raiseload
+from sqlalchemy import String, cast, or_, func, select, insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import UploadFile, status
 import csv
 import io
+import itertools
 import uuid
+import datetime
 
 from app.models.faculty import Faculty, FacultyQualification
 from app.models.department import Department
-from app.models.user import User
+from app.models.user import User, Role, user_roles, hash_password
 from app.schemas.faculty import FacultyCreate, FacultyUpdate, QualificationCreate
 from app.middleware.error import AppError
 from app.services.user import get_user_by_email
+from app.utils.csv_export import stream_csv
+from app.utils.pagination import offset_page
 
-def get_faculty(db: Session, faculty_id: str) -> Optional[Faculty]:
+# Rows written per INSERT batch when importing CSV files
+IMPORT_BATCH_SIZE = 1000
+
+# Relationships read by FacultyResponse; async sessions cannot lazy load them
+FACULTY_RESPONSE_RELATIONSHIPS = ["qualifications"]
+FACULTY_RESPONSE_OPTIONS = (selectinload(Faculty.qualifications), raiseload("*"))
+
+# FacultyWithUser additionally reads the user and department
+FACULTY_WITH_USER_OPTIONS = (
+    selectinload(Faculty.user).selectinload(User.roles),
+    selectinload(Faculty.department),
+) + FACULTY_RESPONSE_OPTIONS
+
+async def get_faculty(db: AsyncSession, faculty_id: str) -> Optional[Faculty]:
     """Get a faculty member by ID"""
-    return db.query(Faculty).filter(Faculty.id == faculty_id).first()
+    return await db.get(Faculty, faculty_id, options=FACULTY_WITH_USER_OPTIONS)
 
 def get_faculty_by_user_id(db: Session, user_id: str) -> Optional[Faculty]:
     """Get a faculty member by user ID"""
@@ -25,26 +44,26 @@ def get_faculty_by_employee_id(db: Session, employee_id: str) -> Optional[Facult
     """Get a faculty member by employee ID"""
     return db.query(Faculty).filter(Faculty.employee_id == employee_id).first()
 
-def get_faculties(
-    db: Session,
+async def get_faculties(
+    db: AsyncSession,
     skip: int = 0,
     limit: int = 100,
-    department_id: Optional[str] = None
+    department_id: Optional[str] = None,
+    specialization: Optional[str] = None
 ) -> Tuple[List[Faculty], int]:
     """Get all faculty members with filtering and pagination"""
-    query = db.query(Faculty)
+    query = select(Faculty)
     
     # Apply filters
     if department_id:
-        query = query.filter(Faculty.department_id == department_id)
-    
-    # Get total count for pagination
-    total = query.count()
-    
-    # Apply pagination
-    query = query.offset(skip).limit(limit)
+        query = query.where(Faculty.department_id == department_id)
+    if specialization:
+        # Containment rather than = ANY(...), so the GIN index is used
+        query = query.where(Faculty.specializations.contains([specialization]))
     
-    return query.all(), total
+    # Fetch the page and the total count in one statement
+    rows, total = await offset_page(db, query.options(*FACULTY_WITH_USER_OPTIONS), skip, limit)
+    return [row[0] for row in rows], total
 
 def create_faculty(db: Session, faculty: FacultyCreate) -> Faculty:
     """Create a new faculty member and associated user if needed"""
@@ -126,7 +145,7 @@ def create_faculty(db: Session, faculty: FacultyCreate) -> Faculty:
 def update_faculty(db: Session, faculty_id: str, faculty_data: FacultyUpdate) -> Optional[Faculty]:
     """Update an existing faculty member"""
     # Get faculty
-    db_faculty = get_faculty(db, faculty_id)
+    db_faculty = db.get(Faculty, faculty_id)
     if not db_faculty:
         return None
     
@@ -222,7 +241,7 @@ def update_faculty(db: Session, faculty_id: str, faculty_data: FacultyUpdate) ->
 
 def delete_faculty(db: Session, faculty_id: str) -> bool:
     """Delete a faculty member"""
-    faculty = get_faculty(db, faculty_id)
+    faculty = db.get(Faculty, faculty_id)
     if not faculty:
         return False
     
@@ -249,153 +268,178 @@ def delete_faculty(db: Session, faculty_id: str) -> bool:
     
     return True
 
-def get_faculties_by_department(db: Session, department_id: str) -> List[Faculty]:
+async def get_faculties_by_department(db: AsyncSession, department_id: str) -> List[Faculty]:
     """Get all faculty members for a specific department"""
-    return db.query(Faculty).filter(Faculty.department_id == department_id).all()
+    result = await db.execute(
+        select(Faculty).options(*FACULTY_RESPONSE_OPTIONS).where(Faculty.department_id == department_id)
+    )
+    return list(result.scalars().all())
 
 def import_faculties_from_csv(db: Session, file: UploadFile) -> Dict[str, Any]:
-    """Import faculty members from a CSV file"""
+    """Import faculty members from a CSV file, inserting and committing IMPORT_BATCH_SIZE rows at a time"""
     if not file.filename.endswith('.csv'):
         raise AppError(
             message="File must be a CSV",
             status_code=status.HTTP_400_BAD_REQUEST
         )
     
-    # Read CSV file
-    content = file.file.read().decode('utf-8')
-    csv_reader = csv.DictReader(io.StringIO(content))
+    # Departments and the faculty role are looked up once for the whole file
+    department_ids = dict(db.execute(select(Department.name, Department.id)).all())
+    has_faculty_role = db.scalar(select(Role.name).where(Role.name == "faculty")) is not None
+    # New users all get the same default password, so hash it once
+    password_hash = hash_password("Student@123")
+    
+    # Decode the spooled upload incrementally instead of reading it into memory
+    upload = io.TextIOWrapper(file.file, encoding='utf-8', newline='')
+    csv_reader = csv.DictReader(upload)
     
     # Process rows
     results = []
-    for i, row in enumerate(csv_reader):
-        try:
-            # Find department
-            department_name = row.get('Department', '')
-            department = db.query(Department).filter(Department.name == department_name).first()
-            if not department:
-                raise ValueError(f"Department '{department_name}' not found")
-            
-            # Check if user exists with this email
-            email = row.get('Email', '')
-            user = get_user_by_email(db, email) if email else None
-            
-            # Create or update user
-            if not user and email and row.get('Name'):
-                # Create new user
-                user = User(
-                    name=row['Name'],
-                    email=email,
-                    department_id=department.id
-                )
-                user.set_password("Student@123")  # Default password
+    while True:
+        batch = list(itertools.islice(csv_reader, IMPORT_BATCH_SIZE))
+        if not batch:
+            break
+        
+        # One lookup per batch for the users that already exist
+        users_by_email = {
+            email: (user_id, name)
+            for email, user_id, name in db.execute(
+                select(func.lower(User.email), User.id, User.name)
+                .where(func.lower(User.email).in_([(row.get('Email') or '').lower() for row in batch]))
+            )
+        }
+        
+        user_rows = []
+        role_rows = []
+        faculty_rows = []
+        qualification_rows = []
+        batch_results = []
+        for row in batch:
+            try:
+                # Find department
+                department_name = row.get('Department', '')
+                department_id = department_ids.get(department_name)
+                if not department_id:
+                    raise ValueError(f"Department '{department_name}' not found")
                 
-                # Assign faculty role
-                faculty_role = db.query(UserRole).filter(UserRole.name == "faculty").first()
-                if faculty_role:
-                    user.roles = [faculty_role]
-                    user.selected_role = "faculty"
+                # Check if user exists with this email
+                email = row.get('Email', '')
+                user = users_by_email.get(email.lower()) if email else None
                 
-                db.add(user)
-                db.flush()
-            
-            if not user:
-                raise ValueError("User email and name are required for new faculty members")
-            
-            # Parse qualifications
-            qualifications = []
-            if row.get('Qualifications'):
-                for q_str in row['Qualifications'].split(';'):
-                    parts = q_str.split('|')
-                    if len(parts) >= 3:
-                        qualifications.append({
-                            'degree': parts[0].strip(),
-                            'field': parts[1].strip() if len(parts) > 1 else '',
-                            'institution': parts[2].strip() if len(parts) > 2 else '',
-                            'year': int(parts[3].strip()) if len(parts) > 3 and parts[3].strip().isdigit() else datetime.datetime.now().year
-                        })
-            
-            # Create faculty
-            faculty = Faculty(
-                user_id=user.id,
-                department_id=department.id,
-                employee_id=row.get('Employee ID', ''),
-                designation=row.get('Designation', ''),
-                specializations=row.get('Specializations', '').split(';') if row.get('Specializations') else [],
-                joining_date=datetime.datetime.strptime(row.get('Joining Date', ''), '%Y-%m-%d') if row.get('Joining Date') else datetime.datetime.now(),
-                status=row.get('Status', 'active'),
-                experience_years=int(row.get('Experience Years', 0)) if row.get('Experience Years', '').isdigit() else 0,
-                experience_details=row.get('Experience Details', '')
-            )
-            
-            db.add(faculty)
-            db.flush()
-            
-            # Add qualifications
-            for qual in qualifications:
-                db_qualification = FacultyQualification(
-                    faculty_id=faculty.id,
-                    degree=qual['degree'],
-                    field=qual.get('field', ''),
-                    institution=qual.get('institution', ''),
-                    year=qual.get('year', datetime.datetime.now().year)
-                )
-                db.add(db_qualification)
-            
-            results.append({
-                "name": user.name,
-                "email": user.email,
-                "employee_id": faculty.employee_id
-            })
-            
-        except Exception as e:
-            results.append({
-                "error": str(e),
-                "row": row
-            })
+                # Create user
+                if not user and email and row.get('Name'):
+                    user = (str(uuid.uuid4()), row['Name'])
+                    user_rows.append({
+                        "id": user[0],
+                        "name": user[1],
+                        "email": email,
+                        "password": password_hash,
+                        "department_id": department_id,
+                        "selected_role": "faculty" if has_faculty_role else None
+                    })
+                    if has_faculty_role:
+                        role_rows.append({"user_id": user[0], "role_name": "faculty"})
+                    users_by_email[email.lower()] = user
+                
+                if not user:
+                    raise ValueError("User email and name are required for new faculty members")
+                
+                faculty_id = str(uuid.uuid4())
+                faculty_rows.append({
+                    "id": faculty_id,
+                    "user_id": user[0],
+                    "department_id": department_id,
+                    "employee_id": row.get('Employee ID', ''),
+                    "designation": row.get('Designation', ''),
+                    "specializations": row.get('Specializations', '').split(';') if row.get('Specializations') else [],
+                    "joining_date": datetime.datetime.strptime(row.get('Joining Date', ''), '%Y-%m-%d') if row.get('Joining Date') else datetime.datetime.now(),
+                    "status": row.get('Status', 'active'),
+                    "experience_years": int(row.get('Experience Years', 0)) if row.get('Experience Years', '').isdigit() else 0,
+                    "experience_details": row.get('Experience Details', '')
+                })
+                
+                # Parse qualifications
+                if row.get('Qualifications'):
+                    for q_str in row['Qualifications'].split(';'):
+                        parts = q_str.split('|')
+                        if len(parts) >= 3:
+                            qualification_rows.append({
+                                'faculty_id': faculty_id,
+                                'degree': parts[0].strip(),
+                                'field': parts[1].strip() if len(parts) > 1 else '',
+                                'institution': parts[2].strip() if len(parts) > 2 else '',
+                                'year': int(parts[3].strip()) if len(parts) > 3 and parts[3].strip().isdigit() else datetime.datetime.now().year
+                            })
+                
+                batch_results.append({
+                    "name": user[1],
+                    "email": email,
+                    "employee_id": row.get('Employee ID', '')
+                })
+                
+            except Exception as e:
+                results.append({
+                    "error": str(e),
+                    "row": row
+                })
+        
+        # A failing batch is rolled back on its own; earlier batches stay committed
+        try:
+            db.bulk_insert_mappings(User, user_rows)
+            if role_rows:
+                db.execute(insert(user_roles), role_rows)
+            db.bulk_insert_mappings(Faculty, faculty_rows)
+            db.bulk_insert_mappings(FacultyQualification, qualification_rows)
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            results.extend({"error": str(e), "row": result} for result in batch_results)
+            continue
+        
+        results.extend(batch_results)
     
-    # Commit changes
-    db.commit()
+    # Hand the upload back untouched so UploadFile can close it
+    upload.detach()
     
     return {"results": results}
 
-def export_faculties_to_csv(db: Session) -> str:
-    """Export faculty members to a CSV file"""
-    faculties = db.query(Faculty).join(User).join(Department).all()
-    
-    # Prepare CSV data
-    output = io.StringIO()
-    fieldnames = [
-        'Employee ID', 'Name', 'Email', 'Department', 'Designation', 'Status',
-        'Joining Date', 'Specializations', 'Qualifications', 'Experience Years',
-        'Experience Details', 'Created At', 'Last Updated'
-    ]
-    writer = csv.DictWriter(output, fieldnames=fieldnames)
-    writer.writeheader()
-    
-    for faculty in faculties:
-        user = faculty.user
-        department = faculty.department
-        
-        # Format qualifications
-        qualifications = []
-        for q in faculty.qualifications:
-            qualifications.append(f"{q.degree}|{q.field}|{q.institution}|{q.year}")
-        
-        # Write row
-        writer.writerow({
-            'Employee ID': faculty.employee_id,
-            'Name': user.name if user else '',
-            'Email': user.email if user else '',
-            'Department': department.name if department else '',
-            'Designation': faculty.designation,
-            'Status': faculty.status,
-            'Joining Date': faculty.joining_date.strftime('%Y-%m-%d') if faculty.joining_date else '',
-            'Specializations': '; '.join(faculty.specializations) if faculty.specializations else '',
-            'Qualifications': '; '.join(qualifications),
-            'Experience Years': faculty.experience_years,
-            'Experience Details': faculty.experience_details or '',
-            'Created At': faculty.created_at.strftime('%Y-%m-%d') if faculty.created_at else '',
-            'Last Updated': faculty.updated_at.strftime('%Y-%m-%d') if faculty.updated_at else ''
-        })
-    
-    return output.getvalue()
\ No newline at end of file
+def export_faculties_to_csv(db: AsyncSession, batch_size: int = 1000) -> AsyncIterator[str]:
+    """Export faculty members as CSV, streamed in batches from a server-side cursor"""
+    # Qualification rows are folded into one column in SQL, so each faculty is one row
+    qualifications = (
+        select(func.aggregate_strings(
+            FacultyQualification.degree + "|" + FacultyQualification.field + "|" +
+            FacultyQualification.institution + "|" + cast(FacultyQualification.year, String),
+            "; "
+        ))
+        .where(FacultyQualification.faculty_id == Faculty.id)
+        .scalar_subquery()
+    )
+    statement = (
+        select(
+            Faculty.employee_id, User.name, User.email, Department.name,
+            Faculty.designation, Faculty.status, Faculty.joining_date, Faculty.specializations,
+            qualifications, Faculty.experience_years, Faculty.experience_details,
+            Faculty.created_at, Faculty.updated_at
+        )
+        .outerjoin(User, Faculty.user_id == User.id)
+        .outerjoin(Department, Faculty.department_id == Department.id)
+    )
+    return stream_csv(
+        db,
+        [
+            'Employee ID', 'Name', 'Email', 'Department', 'Designation', 'Status',
+            'Joining Date', 'Specializations', 'Qualifications', 'Experience Years',
+            'Experience Details', 'Created At', 'Last Updated'
+        ],
+        statement,
+        lambda row: (
+            row[0], row[1] or '', row[2] or '', row[3] or '', row.designation, row.status,
+            row.joining_date.strftime('%Y-%m-%d') if row.joining_date else '',
+            '; '.join(row.specializations) if row.specializations else '',
+            row[8] or '', row.experience_years, row.experience_details or '',
+            row.created_at.strftime('%Y-%m-%d') if row.created_at else '',
+            row.updated_at.strftime('%Y-%m-%d') if row.updated_at else ''
+        ),
+        batch_size
+    )
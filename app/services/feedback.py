@@ -3,14 +3,29 @@ import csv
 import json
 import math
 from datetime import datetime
-from fastapi import UploadFile, BackgroundTasks
-from sqlalchemy.orm import Session
-from typing import List, Dict, Any, Optional
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
 import uuid
+import zipfile
 
-from app.models.feedback import FeedbackAnalysis
+from app.models.feedback import FeedbackAnalysis, QUESTION_COUNT
 from app.schemas.feedback import FeedbackCreate, FeedbackUpdate, FeedbackAnalysisResult
 from app.middleware.error import AppError
+from app.utils.cache import TTLCache
+
+# Rows written per INSERT batch when importing CSV files
+IMPORT_BATCH_SIZE = 1000
+
+# Rendered report documents by (feedback_id, format); dropped when a report is re-analyzed
+report_cache = TTLCache(ttl=3600, maxsize=256)
+
+def invalidate_report_cache(feedback_id: str) -> None:
+    """Drop rendered documents for a feedback report"""
+    for report_format in ("tex", "pdf"):
+        report_cache.delete((feedback_id, report_format))
 
 async def get_sample_feedback() -> bytes:
     """
@@ -39,131 +54,118 @@ async def get_sample_feedback() -> bytes:
     
     return output.getvalue().encode('utf-8')
 
-async def process_feedback_csv(db: Session, file: UploadFile, background_tasks: Optional[BackgroundTasks] = None) -> str:
+def _parse_feedback_csv(file_obj) -> List[Dict[str, Any]]:
+    """
+    Parse, validate and analyze feedback CSV rows from an uploaded file
+    """
+    # Decode the spooled upload line by line instead of reading it into memory
+    text = io.TextIOWrapper(file_obj, encoding='utf-8', newline='')
+    reader = csv.DictReader(text)
+    
+    # Basic validation
+    required_columns = [
+        "year", "term", "branch", "semester", "subject_code", 
+        "subject_name", "faculty_name", "total_responses"
+    ]
+    
+    for column in required_columns:
+        if column not in reader.fieldnames:
+            raise AppError(status_code=400, message=f"Missing required column: {column}")
+    
+    # Validate records and build feedback analysis rows
+    feedback_rows = []
+    for record in reader:
+        feedback_data = {
+            "year": int(record["year"]),
+            "term": record["term"],
+            "branch": record["branch"],
+            "semester": int(record["semester"]),
+            "subject_code": record["subject_code"],
+            "subject_name": record["subject_name"],
+            "faculty_name": record["faculty_name"],
+            "total_responses": int(record["total_responses"]),
+        }
+        
+        # Add question scores if present
+        for i in range(1, QUESTION_COUNT + 1):
+            q_key = f"q{i}_score"
+            if q_key in record:
+                feedback_data[q_key] = float(record[q_key])
+        
+        row = _feedback_mapping(FeedbackCreate(**feedback_data))
+        
+        # Analyze up front so uploads need no per-record follow-up commits
+        row["report_data"] = _report_data(*_analyze_scores(row["scores"], row["total_responses"]))
+        feedback_rows.append(row)
+    
+    # Hand the upload back untouched so UploadFile can close it
+    text.detach()
+    
+    return feedback_rows
+
+async def process_feedback_csv(db: AsyncSession, file: UploadFile) -> str:
     """
     Process uploaded feedback data CSV
     """
     if not file.filename.endswith('.csv'):
         raise AppError(status_code=400, message="File must be a CSV")
     
-    content = await file.read()
-    
     try:
-        rows = content.decode('utf-8').splitlines()
-        reader = csv.DictReader(rows)
+        # Parsing and analysis are CPU-bound; keep them off the event loop
+        await file.seek(0)
+        feedback_rows = await run_in_threadpool(_parse_feedback_csv, file.file)
         
-        # Basic validation
-        required_columns = [
-            "year", "term", "branch", "semester", "subject_code", 
-            "subject_name", "faculty_name", "total_responses"
-        ]
+        # Multi-row INSERTs in batches, committed as one transaction
+        for start in range(0, len(feedback_rows), IMPORT_BATCH_SIZE):
+            await db.execute(
+                insert(FeedbackAnalysis),
+                feedback_rows[start:start + IMPORT_BATCH_SIZE]
+            )
+        await db.commit()
         
-        for column in required_columns:
-            if column not in reader.fieldnames:
-                raise AppError(status_code=400, message=f"Missing required column: {column}")
-        
-        # Process records and create feedback analysis entries
-        feedback_ids = []
-        for record in reader:
-            feedback_data = {
-                "year": int(record["year"]),
-                "term": record["term"],
-                "branch": record["branch"],
-                "semester": int(record["semester"]),
-                "subject_code": record["subject_code"],
-                "subject_name": record["subject_name"],
-                "faculty_name": record["faculty_name"],
-                "total_responses": int(record["total_responses"]),
-            }
-            
-            # Add question scores if present
-            for i in range(1, 13):
-                q_key = f"q{i}_score"
-                if q_key in record:
-                    feedback_data[q_key] = float(record[q_key])
-            
-            # Create feedback analysis record
-            feedback_record = FeedbackCreate(**feedback_data)
-            feedback_id = await create_feedback(db, feedback_record)
-            feedback_ids.append(feedback_id)
-            
-            # Trigger background analysis if available
-            if background_tasks:
-                background_tasks.add_task(analyze_feedback_data, db, feedback_id)
-        
-        return f"Processed {len(feedback_ids)} feedback records"
+        return f"Processed {len(feedback_rows)} feedback records"
         
     except Exception as e:
         raise AppError(status_code=500, message=f"Error processing CSV: {str(e)}")
 
-async def create_feedback(db: Session, feedback_data: FeedbackCreate) -> str:
+def _feedback_mapping(feedback_data: FeedbackCreate) -> Dict[str, Any]:
+    """
+    Build the feedback_analysis column values for a feedback record
+    """
+    # Question scores in form order, stored as one array
+    scores = [getattr(feedback_data, f"q{i}_score") for i in range(1, QUESTION_COUNT + 1)]
+    
+    avg_score = sum(scores) / len(scores)
+    
+    return {
+        "id": str(uuid.uuid4()),
+        "year": feedback_data.year,
+        "term": feedback_data.term,
+        "branch": feedback_data.branch,
+        "semester": feedback_data.semester,
+        "subject_code": feedback_data.subject_code,
+        "subject_name": feedback_data.subject_name,
+        "faculty_name": feedback_data.faculty_name,
+        "total_responses": feedback_data.total_responses,
+        "average_score": avg_score,
+        "scores": scores
+    }
+
+async def create_feedback(db: AsyncSession, feedback_data: FeedbackCreate) -> str:
     """
     Create new feedback analysis record
     """
-    # Calculate average score
-    score_fields = [
-        feedback_data.q1_score, feedback_data.q2_score,
-        feedback_data.q3_score, feedback_data.q4_score,
-        feedback_data.q5_score, feedback_data.q6_score,
-        feedback_data.q7_score, feedback_data.q8_score,
-        feedback_data.q9_score, feedback_data.q10_score,
-        feedback_data.q11_score, feedback_data.q12_score
-    ]
-    
-    avg_score = sum(score_fields) / len(score_fields)
-    
-    # Create DB model
-    db_feedback = FeedbackAnalysis(
-        id=str(uuid.uuid4()),
-        year=feedback_data.year,
-        term=feedback_data.term,
-        branch=feedback_data.branch,
-        semester=feedback_data.semester,
-        subject_code=feedback_data.subject_code,
-        subject_name=feedback_data.subject_name,
-        faculty_name=feedback_data.faculty_name,
-        total_responses=feedback_data.total_responses,
-        average_score=avg_score,
-        q1_score=feedback_data.q1_score,
-        q2_score=feedback_data.q2_score,
-        q3_score=feedback_data.q3_score,
-        q4_score=feedback_data.q4_score,
-        q5_score=feedback_data.q5_score,
-        q6_score=feedback_data.q6_score,
-        q7_score=feedback_data.q7_score,
-        q8_score=feedback_data.q8_score,
-        q9_score=feedback_data.q9_score,
-        q10_score=feedback_data.q10_score,
-        q11_score=feedback_data.q11_score,
-        q12_score=feedback_data.q12_score
-    )
+    db_feedback = FeedbackAnalysis(**_feedback_mapping(feedback_data))
     
     db.add(db_feedback)
-    db.commit()
-    db.refresh(db_feedback)
+    await db.commit()
     
     return db_feedback.id
 
-async def analyze_feedback_data(db: Session, feedback_id: str) -> FeedbackAnalysisResult:
+def _analyze_scores(scores: List[float], total_responses: int) -> Tuple[Dict[str, Any], List[str]]:
     """
-    Analyze feedback data and generate insights
+    Compute statistics and recommendations for the twelve question scores
     """
-    # Get the feedback record
-    db_feedback = db.query(FeedbackAnalysis).filter(FeedbackAnalysis.id == feedback_id).first()
-    
-    if not db_feedback:
-        raise AppError(status_code=404, message="Feedback record not found")
-    
-    # Extract scores for analysis
-    scores = [
-        db_feedback.q1_score, db_feedback.q2_score,
-        db_feedback.q3_score, db_feedback.q4_score,
-        db_feedback.q5_score, db_feedback.q6_score,
-        db_feedback.q7_score, db_feedback.q8_score,
-        db_feedback.q9_score, db_feedback.q10_score,
-        db_feedback.q11_score, db_feedback.q12_score
-    ]
-    
     # Perform analysis
     mean_score = sum(scores) / len(scores)
     median_score = sorted(scores)[len(scores) // 2]
@@ -201,18 +203,38 @@ async def analyze_feedback_data(db: Session, feedback_id: str) -> FeedbackAnalys
         "max": max_score,
         "strengths": strengths,
         "weaknesses": weaknesses,
-        "total_responses": db_feedback.total_responses
+        "total_responses": total_responses
     }
     
-    # Update database with analysis results
-    db_feedback.report_data = {
+    return statistics, recommendations
+
+def _report_data(statistics: Dict[str, Any], recommendations: List[str]) -> Dict[str, Any]:
+    """
+    Build the stored report_data payload for an analysis
+    """
+    return {
         "statistics": statistics,
         "recommendations": recommendations,
         "analyzed_at": datetime.utcnow().isoformat()
     }
+
+async def analyze_feedback_data(db: AsyncSession, feedback_id: str) -> FeedbackAnalysisResult:
+    """
+    Analyze feedback data and generate insights
+    """
+    # Get the feedback record
+    db_feedback = await db.get(FeedbackAnalysis, feedback_id)
+    
+    if not db_feedback:
+        raise AppError(status_code=404, message="Feedback record not found")
     
-    db.commit()
-    db.refresh(db_feedback)
+    statistics, recommendations = _analyze_scores(db_feedback.scores, db_feedback.total_responses)
+    
+    # Update database with analysis results
+    db_feedback.report_data = _report_data(statistics, recommendations)
+    
+    await db.commit()
+    invalidate_report_cache(feedback_id)
     
     return FeedbackAnalysisResult(
         feedback_id=feedback_id,
@@ -220,11 +242,11 @@ async def analyze_feedback_data(db: Session, feedback_id: str) -> FeedbackAnalys
         recommendations=recommendations
     )
 
-async def get_feedback_report(db: Session, feedback_id: str) -> Dict[str, Any]:
+async def get_feedback_report(db: AsyncSession, feedback_id: str) -> Dict[str, Any]:
     """
     Get feedback report by ID
     """
-    db_feedback = db.query(FeedbackAnalysis).filter(FeedbackAnalysis.id == feedback_id).first()
+    db_feedback = await db.get(FeedbackAnalysis, feedback_id)
     
     if not db_feedback:
         raise AppError(status_code=404, message="Feedback report not found")
@@ -232,7 +254,6 @@ async def get_feedback_report(db: Session, feedback_id: str) -> Dict[str, Any]:
     # If report data doesn't exist, generate it
     if not db_feedback.report_data:
         await analyze_feedback_data(db, feedback_id)
-        db.refresh(db_feedback)
     
     # Convert to dict
     report = {
@@ -246,29 +267,20 @@ async def get_feedback_report(db: Session, feedback_id: str) -> Dict[str, Any]:
         "faculty_name": db_feedback.faculty_name,
         "total_responses": db_feedback.total_responses,
         "average_score": db_feedback.average_score,
-        "scores": {
-            "q1": db_feedback.q1_score,
-            "q2": db_feedback.q2_score,
-            "q3": db_feedback.q3_score,
-            "q4": db_feedback.q4_score,
-            "q5": db_feedback.q5_score,
-            "q6": db_feedback.q6_score,
-            "q7": db_feedback.q7_score,
-            "q8": db_feedback.q8_score,
-            "q9": db_feedback.q9_score,
-            "q10": db_feedback.q10_score,
-            "q11": db_feedback.q11_score,
-            "q12": db_feedback.q12_score
-        },
+        "scores": {f"q{i}": score for i, score in enumerate(db_feedback.scores, 1)},
         "report": db_feedback.report_data
     }
     
     return report
 
-async def generate_latex_report(db: Session, feedback_id: str) -> bytes:
+async def generate_latex_report(db: AsyncSession, feedback_id: str) -> bytes:
     """
     Generate LaTeX report for feedback analysis
     """
+    cached = report_cache.get((feedback_id, "tex"))
+    if cached is not None:
+        return cached
+    
     # Get report data
     report = await get_feedback_report(db, feedback_id)
     
@@ -404,15 +416,30 @@ async def generate_latex_report(db: Session, feedback_id: str) -> bytes:
     # End document
     latex.append(r"\end{document}")
     
-    return "\n".join(latex).encode('utf-8')
+    content = "\n".join(latex).encode('utf-8')
+    report_cache.set((feedback_id, "tex"), content)
+    return content
+
+def _render_pdf(html: str) -> bytes:
+    """
+    Render HTML to PDF with WeasyPrint (CPU-bound; run off the event loop)
+    """
+    from weasyprint import HTML
+    from weasyprint.text.fonts import FontConfiguration
+    
+    font_config = FontConfiguration()
+    return HTML(string=html).write_pdf(font_config=font_config)
 
-async def generate_pdf_report(db: Session, feedback_id: str) -> bytes:
+async def generate_pdf_report(db: AsyncSession, feedback_id: str) -> bytes:
     """
     Generate PDF report for feedback analysis
     """
+    cached = report_cache.get((feedback_id, "pdf"))
+    if cached is not None:
+        return cached
+    
     try:
-        from weasyprint import HTML, CSS
-        from weasyprint.text.fonts import FontConfiguration
+        import weasyprint
     except ImportError:
         # Fallback to returning LaTeX if WeasyPrint is not available
         return await generate_latex_report(db, feedback_id)
@@ -576,36 +603,54 @@ async def generate_pdf_report(db: Session, feedback_id: str) -> bytes:
     </html>
     """
     
-    # Generate PDF
-    font_config = FontConfiguration()
-    pdf = HTML(string=html).write_pdf(font_config=font_config)
+    # Generate PDF in a worker thread so rendering does not block other requests
+    pdf = await run_in_threadpool(_render_pdf, html)
+    report_cache.set((feedback_id, "pdf"), pdf)
     return pdf
 
-async def generate_feedback_report(db: Session, feedback_id: str) -> bytes:
+class _ZipChunkWriter(io.RawIOBase):
     """
-    Generate and combine feedback reports in multiple formats
+    Write-only, non-seekable sink that hands back what ZipFile has written so far
     """
-    try:
-        import zipfile
-    except ImportError:
-        # Fallback to just returning PDF if zipfile is not available
-        return await generate_pdf_report(db, feedback_id)
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+    
+    def writable(self) -> bool:
+        return True
     
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+async def generate_feedback_report(db: AsyncSession, feedback_id: str) -> AsyncIterator[bytes]:
+    """
+    Generate feedback reports in multiple formats as a ZIP, yielding the
+    archive member by member instead of building it in memory
+    """
     report = await get_feedback_report(db, feedback_id)
     
-    buffer = io.BytesIO()
+    stream = _ZipChunkWriter()
     
-    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+    with zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as zf:
         # Add JSON report
         zf.writestr('feedback_report.json', json.dumps(report, indent=2))
+        yield stream.drain()
         
         # Add LaTeX report
         latex_content = await generate_latex_report(db, feedback_id)
         zf.writestr('feedback_report.tex', latex_content)
+        yield stream.drain()
         
         # Add PDF report
         pdf_content = await generate_pdf_report(db, feedback_id)
         zf.writestr('feedback_report.pdf', pdf_content)
+        yield stream.drain()
         
         # Generate Excel report
         try:
@@ -664,6 +709,7 @@ async def generate_feedback_report(db: Session, feedback_id: str) -> bytes:
         except Exception:
             # Skip Excel if there's an issue
             pass
+        yield stream.drain()
     
-    buffer.seek(0)
-    return buffer.getvalue()
\ No newline at end of file
+    # Central directory
+    yield stream.drain()
\ No newline at end of file
@@ -1,12 +1,18 @@
 import logging
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 
+from app.database import Base
 from app.models.user import User, Role
 from app.middleware.error import AppError
 
 logger = logging.getLogger(__name__)
 
+# Key of the PostgreSQL advisory lock held while seeding default data
+INIT_LOCK_KEY = 720_301
+
 def create_default_roles(db: Session) -> None:
     """
     Create default roles in the database if they don't exist
@@ -51,12 +57,10 @@ def create_default_roles(db: Session) -> None:
             role = db.query(Role).filter(Role.name == role_data["name"]).first()
             if not role:
                 logger.info(f"Creating default role: {role_data['name']}")
-                # Convert permissions list to a comma-separated string
-                permissions_str = ','.join(role_data["permissions"])
                 role = Role(
                     name=role_data["name"],
                     description=role_data["description"],
-                    permissions=permissions_str
+                    permissions=role_data["permissions"]
                 )
                 db.add(role)
         
@@ -120,4 +124,36 @@ def initialize_database(db: Session) -> None:
         
     except Exception as e:
         logger.error(f"Error during database initialization: {str(e)}")
-        raise AppError(message=f"Error during database initialization: {str(e)}")
\ No newline at end of file
+        raise AppError(message=f"Error during database initialization: {str(e)}")
+
+def initialize_database_once(engine: Engine) -> None:
+    """
+    Create missing tables and seed default data from a single worker. On
+    PostgreSQL the first worker to take a session advisory lock does both;
+    the others skip instead of racing it
+    """
+    with engine.connect() as conn:
+        use_lock = conn.dialect.name == "postgresql"
+        if use_lock:
+            locked = conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": INIT_LOCK_KEY})
+            conn.commit()
+            if not locked:
+                logger.info("Another worker is initializing the database, skipping")
+                return
+        
+        try:
+            # The migrations alter tables but do not create them, so the
+            # schema still comes from the models in every environment
+            Base.metadata.create_all(bind=conn)
+            conn.commit()
+            
+            # Seed on the lock's connection so the lock covers every statement
+            with Session(bind=conn, autoflush=False) as db:
+                initialize_database(db)
+        finally:
+            if use_lock:
+                # Session-level locks outlive transactions; release it before
+                # the connection goes back to the pool
+                conn.rollback()
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": INIT_LOCK_KEY})
+                conn.commit()
@@ -1,9 +1,12 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, AsyncIterator
 from fastapi import HTTPException, UploadFile
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, func, insert
+from sqlalchemy.orm import selectinload, joinedload, contains_eager, raiseload
+from sqlalchemy.ext.asyncio import AsyncSession
 import csv
 import io
-from datetime import datetime
+import itertools
 import uuid
 
 from app.models.user import User
@@ -16,10 +19,105 @@ from app.schemas import (
     PaginatedResponse, PaginatedMeta, DataResponse
 )
 from app.middleware.error import AppError
+from app.utils.cache import TTLCache
+from app.utils.csv_export import stream_csv
+from app.utils.pagination import offset_page
+
+# Rows written per INSERT batch when importing CSV files
+IMPORT_BATCH_SIZE = 1000
+
+# (ETag, rendered body) of the statistics and category aggregates; dropped
+# whenever projects or their evaluations change
+stats_cache = TTLCache(ttl=60, maxsize=8)
+
+def invalidate_stats_cache() -> None:
+    """Drop cached project aggregates after projects are modified"""
+    stats_cache.clear()
+
+# Relationships read by ProjectResponse (dept_evaluation, central_evaluation);
+# async sessions cannot lazy load them during serialization, so they are
+# joined into the project SELECT. Any other relationship access raises
+# instead of silently issuing a query per row.
+PROJECT_RESPONSE_OPTIONS = (
+    joinedload(Project.dept_evaluation),
+    joinedload(Project.central_evaluation),
+    raiseload("*"),
+)
+
+# Extra relationships read by ProjectWithDetails (department, team and its
+# members, event, location, guide_user, guide_department), all joined so the
+# whole detail view comes back in a single round trip
+PROJECT_DETAIL_OPTIONS = PROJECT_RESPONSE_OPTIONS + (
+    joinedload(Project.department),
+    joinedload(Project.guide_user),
+    joinedload(Project.guide_department),
+    joinedload(Project.event),
+    joinedload(Project.location),
+    joinedload(Project.team).joinedload(ProjectTeam.members),
+)
+
+async def _refresh_project(db: AsyncSession, project: Project) -> None:
+    """Reload a project and the relationships ProjectResponse reads"""
+    await db.refresh(project, ["dept_evaluation", "central_evaluation"])
+
+# Columns of the project list read as plain Core rows; evaluations are
+# attached by _attach_evaluations
+PROJECT_ROW_COLUMNS = (
+    Project.id, Project.title, Project.category, Project.abstract,
+    Project.department_id, Project.status,
+    Project.power_required, Project.internet_required,
+    Project.special_space_required, Project.other_requirements,
+    Project.guide_user_id, Project.guide_name, Project.guide_department_id, Project.guide_contact,
+    Project.team_id, Project.event_id, Project.location_id
+)
+
+def _project_row(row) -> Dict[str, Any]:
+    """Nest a project row's requirement and guide columns as ProjectResponse expects"""
+    return {
+        "id": row.id,
+        "title": row.title,
+        "category": row.category,
+        "abstract": row.abstract,
+        "department_id": row.department_id,
+        "status": row.status,
+        "requirements": {
+            "power": row.power_required,
+            "internet": row.internet_required,
+            "special_space": row.special_space_required,
+            "other_requirements": row.other_requirements or ""
+        },
+        "guide": {
+            "user_id": row.guide_user_id,
+            "name": row.guide_name,
+            "department": row.guide_department_id,
+            "contact_number": row.guide_contact
+        },
+        "team_id": row.team_id,
+        "event_id": row.event_id,
+        "location_id": row.location_id,
+        "dept_evaluation": None,
+        "central_evaluation": None
+    }
+
+async def _attach_evaluations(db: AsyncSession, projects: List[Dict[str, Any]]) -> None:
+    """Attach the evaluations of a page of project dicts with one query per evaluation table"""
+    if not projects:
+        return
+    
+    by_id = {project["id"]: project for project in projects}
+    for model, key in ((DepartmentEvaluation, "dept_evaluation"), (CentralEvaluation, "central_evaluation")):
+        evaluations = await db.execute(
+            select(
+                model.project_id, model.score, model.feedback,
+                model.completed, model.jury_id, model.evaluated_at
+            ).where(model.project_id.in_(by_id))
+        )
+        for project_id, *values in evaluations:
+            by_id[project_id][key] = dict(zip(("score", "feedback", "completed", "jury_id", "evaluated_at"), values))
 
 # Get all projects with pagination and filtering
 async def get_projects(
-    db: Session, 
+    db: AsyncSession, 
     page: int = 1, 
     limit: int = 10, 
     search: Optional[str] = None, 
@@ -27,16 +125,17 @@ async def get_projects(
     event_id: Optional[str] = None, 
     sort_by: str = "created_at"
 ) -> PaginatedResponse[List[ProjectResponse]]:
-    """Get all projects with pagination and filtering"""
-    query = db.query(Project)
+    """Get all projects with pagination and filtering, as plain dicts"""
+    # Select only the listed columns so rows skip ORM instance hydration
+    query = select(*PROJECT_ROW_COLUMNS)
 
     # Apply filters
     if search:
-        query = query.filter(Project.title.ilike(f"%{search}%"))
+        query = query.where(Project.title.ilike(f"%{search}%"))
     if department_id:
-        query = query.filter(Project.department_id == department_id)
+        query = query.where(Project.department_id == department_id)
     if event_id:
-        query = query.filter(Project.event_id == event_id)
+        query = query.where(Project.event_id == event_id)
 
     # Apply sorting
     if sort_by == "created_at":
@@ -45,33 +144,31 @@ async def get_projects(
         query = query.order_by(Project.title)
     # Add more sorting options as needed
 
-    # Get total count for pagination
-    total = query.count()
-
-    # Apply pagination
-    query = query.offset((page - 1) * limit).limit(limit)
-
-    # Execute query
-    projects = query.all()
+    # Fetch the page and the total count in one statement
+    rows, total = await offset_page(db, query, (page - 1) * limit, limit)
+    projects = [_project_row(row) for row in rows]
+    
+    await _attach_evaluations(db, projects)
 
     # Create pagination metadata
-    meta = PaginatedMeta(
+    pagination = PaginatedMeta(
         total=total,
         page=page,
         limit=limit,
-        pages=(total + limit - 1) // limit  # Ceiling division
+        total_pages=(total + limit - 1) // limit  # Ceiling division
     )
 
     # Return paginated response
     return {
         "data": projects,
-        "meta": meta
+        "pagination": pagination
     }
 
 # Get a single project by ID
-async def get_project(db: Session, project_id: str) -> ProjectWithDetails:
+async def get_project(db: AsyncSession, project_id: str, include_details: bool = False) -> ProjectWithDetails:
     """Get a single project with all details"""
-    project = db.query(Project).filter(Project.id == project_id).first()
+    options = PROJECT_DETAIL_OPTIONS if include_details else PROJECT_RESPONSE_OPTIONS
+    project = await db.get(Project, project_id, options=options)
     
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -79,18 +176,18 @@ async def get_project(db: Session, project_id: str) -> ProjectWithDetails:
     return project
 
 # Create a new project
-async def create_project(db: Session, project_data: ProjectCreate, current_user: User) -> DataResponse[ProjectResponse]:
+async def create_project(db: AsyncSession, project_data: ProjectCreate, current_user: User) -> DataResponse[ProjectResponse]:
     """Create a new project"""
     # Validate references
-    team = db.query(Team).filter(Team.id == project_data.team_id).first()
+    team = await db.get(ProjectTeam, project_data.team_id)
     if not team:
         raise HTTPException(status_code=404, detail="Team not found")
     
-    department = db.query(Department).filter(Department.id == project_data.department_id).first()
+    department = await db.get(Department, project_data.department_id)
     if not department:
         raise HTTPException(status_code=404, detail="Department not found")
     
-    event = db.query(Event).filter(Event.id == project_data.event_id).first()
+    event = await db.get(Event, project_data.event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
@@ -113,16 +210,17 @@ async def create_project(db: Session, project_data: ProjectCreate, current_user:
     
     # Add to database
     db.add(new_project)
-    db.commit()
-    db.refresh(new_project)
+    await db.commit()
+    invalidate_stats_cache()
+    await _refresh_project(db, new_project)
     
     return {"data": new_project}
 
 # Update an existing project
-async def update_project(db: Session, project_id: str, project_data: ProjectUpdate, current_user: User) -> DataResponse[ProjectResponse]:
+async def update_project(db: AsyncSession, project_id: str, project_data: ProjectUpdate, current_user: User) -> DataResponse[ProjectResponse]:
     """Update an existing project"""
     # Get project
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
@@ -134,151 +232,186 @@ async def update_project(db: Session, project_id: str, project_data: ProjectUpda
     
     # Set updated_by
     project.updated_by = current_user.id
-    project.updated_at = datetime.utcnow()
     
     # Commit changes
-    db.commit()
-    db.refresh(project)
+    await db.commit()
+    invalidate_stats_cache()
+    await _refresh_project(db, project)
     
     return {"data": project}
 
 # Delete a project
-async def delete_project(db: Session, project_id: str) -> None:
+async def delete_project(db: AsyncSession, project_id: str) -> None:
     """Delete a project"""
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    db.delete(project)
-    db.commit()
+    await db.delete(project)
+    await db.commit()
+    invalidate_stats_cache()
 
 # Get projects by department
-async def get_projects_by_department(db: Session, department_id: str) -> List[ProjectResponse]:
+async def get_projects_by_department(db: AsyncSession, department_id: str) -> List[ProjectResponse]:
     """Get projects for a specific department"""
-    projects = db.query(Project).filter(Project.department_id == department_id).all()
-    return projects
+    result = await db.execute(
+        select(Project).options(*PROJECT_RESPONSE_OPTIONS).where(Project.department_id == department_id)
+    )
+    return list(result.scalars().all())
+
+# Get projects by team
+async def get_projects_by_team(db: AsyncSession, team_id: str) -> List[ProjectResponse]:
+    """Get projects for a specific team"""
+    result = await db.execute(
+        select(Project).options(*PROJECT_RESPONSE_OPTIONS).where(Project.team_id == team_id)
+    )
+    return list(result.scalars().all())
 
 # Get projects by event
-async def get_projects_by_event(db: Session, event_id: str) -> List[ProjectResponse]:
+async def get_projects_by_event(db: AsyncSession, event_id: str) -> List[ProjectResponse]:
     """Get projects for a specific event"""
-    projects = db.query(Project).filter(Project.event_id == event_id).all()
-    return projects
+    result = await db.execute(
+        select(Project).options(*PROJECT_RESPONSE_OPTIONS).where(Project.event_id == event_id)
+    )
+    return list(result.scalars().all())
 
 # Get event winners
-async def get_event_winners(db: Session, event_id: str) -> List[ProjectResponse]:
+async def get_event_winners(db: AsyncSession, event_id: str) -> List[ProjectResponse]:
     """Get winning projects for an event (highest scores)"""
     # Get projects for the event with central evaluation scores
-    projects = db.query(Project).filter(
-        Project.event_id == event_id,
-        Project.central_evaluation != None  # Projects with central evaluation
-    ).order_by(
-        Project.central_evaluation['score'].desc()  # Order by score (descending)
-    ).limit(10).all()
+    # Inner join on the central evaluation both filters to evaluated projects
+    # and populates the relationship from the same row
+    result = await db.execute(
+        select(Project)
+        .join(Project.central_evaluation)
+        .options(
+            joinedload(Project.dept_evaluation),
+            contains_eager(Project.central_evaluation),
+            raiseload("*")
+        )
+        .where(Project.event_id == event_id)
+        .order_by(CentralEvaluation.score.desc())  # Order by score (descending)
+        .limit(10)
+    )
     
-    return projects
+    return list(result.scalars().all())
 
 # Import projects from CSV
-async def import_projects_from_csv(db: Session, file: UploadFile) -> Dict[str, Any]:
-    """Import projects from CSV file"""
-    content = await file.read()
-    
-    # Process CSV
-    projects_data = []
-    reader = csv.DictReader(io.StringIO(content.decode('utf-8')))
-    
-    for row in reader:
-        # Process each row
-        # This would need to be customized based on your CSV format
-        projects_data.append({
-            "title": row.get("Title", ""),
-            "category": row.get("Category", ""),
+# CSV columns an imported project cannot be created without, by column name
+REQUIRED_IMPORT_COLUMNS = {
+    "title": "Title", "category": "Category", "department_id": "Department",
+    "guide_user_id": "Guide User", "guide_name": "Guide Name",
+    "guide_department_id": "Guide Department", "guide_contact": "Guide Contact",
+    "team_id": "Team", "event_id": "Event"
+}
+
+def _read_project_rows(reader: csv.DictReader, size: int, user_id: str) -> List[Dict[str, Any]]:
+    """Parse up to `size` project rows from the CSV reader, rejecting rows that lack a required column"""
+    rows = []
+    for row in itertools.islice(reader, size):
+        project = {
+            "id": str(uuid.uuid4()),
+            "title": row.get("Title") or None,
+            "category": row.get("Category") or None,
             "abstract": row.get("Abstract", ""),
-            # Map other fields
-        })
-    
-    # Import data (simplified for example)
-    imported_count = 0
-    for data in projects_data:
-        try:
-            # Create project (simplified)
-            project = Project(
-                id=str(uuid.uuid4()),
-                title=data["title"],
-                category=data["category"],
-                abstract=data["abstract"],
-                # Set other fields with appropriate defaults
-                created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow()
+            # Columns written by the projects export
+            "status": row.get("Status") or "draft",
+            "department_id": row.get("Department") or None,
+            "guide_user_id": row.get("Guide User") or None,
+            "guide_name": row.get("Guide Name") or None,
+            "guide_department_id": row.get("Guide Department") or None,
+            "guide_contact": row.get("Guide Contact") or None,
+            "team_id": row.get("Team") or None,
+            "event_id": row.get("Event") or None,
+            "location_id": row.get("Location") or None,
+            "created_by": user_id,
+            "updated_by": user_id
+        }
+        missing = [column for key, column in REQUIRED_IMPORT_COLUMNS.items() if not project[key]]
+        if missing:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Line {reader.line_num}: missing {', '.join(missing)}"
             )
-            db.add(project)
-            imported_count += 1
-        except Exception as e:
-            print(f"Error importing project: {e}")
-    
-    db.commit()
+        rows.append(project)
+    return rows
+
+async def import_projects_from_csv(db: AsyncSession, file: UploadFile, current_user: User) -> Dict[str, Any]:
+    """Import projects from CSV file; nothing is written unless every row is valid"""
+    # Decode the spooled upload incrementally instead of reading it into memory
+    await file.seek(0)
+    text = io.TextIOWrapper(file.file, encoding='utf-8', newline='')
+    
+    try:
+        reader = csv.DictReader(text)
+        imported_count = 0
+        
+        # Parse a batch off the event loop, then send it as one multi-row INSERT
+        while True:
+            rows = await run_in_threadpool(_read_project_rows, reader, IMPORT_BATCH_SIZE, current_user.id)
+            if not rows:
+                break
+            await db.execute(insert(Project), rows)
+            imported_count += len(rows)
+        
+        await db.commit()
+        invalidate_stats_cache()
+    finally:
+        # Hand the upload back untouched so UploadFile can close it
+        text.detach()
     
     return {"message": f"Successfully imported {imported_count} projects", "count": imported_count}
 
 # Export projects to CSV
-async def export_projects_to_csv(db: Session) -> Any:
-    """Export projects to CSV file"""
-    # Get all projects
-    projects = db.query(Project).all()
-    
-    # Create CSV in memory
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write header
-    writer.writerow([
-        "ID", "Title", "Category", "Abstract", "Status",
-        "Department", "Team", "Event", "Location",
-        "Created At", "Updated At"
-    ])
-    
-    # Write data
-    for project in projects:
-        writer.writerow([
-            project.id,
-            project.title,
-            project.category,
-            project.abstract,
-            project.status,
-            project.department_id,
-            project.team_id,
-            project.event_id,
-            project.location_id,
-            project.created_at.isoformat() if project.created_at else "",
-            project.updated_at.isoformat() if project.updated_at else ""
-        ])
-    
-    # Create response
-    response = output.getvalue()
-    return response
+def export_projects_to_csv(db: AsyncSession, batch_size: int = 1000) -> AsyncIterator[str]:
+    """Export projects as CSV, streamed in batches from a server-side cursor"""
+    statement = select(
+        Project.id, Project.title, Project.category, Project.abstract, Project.status,
+        Project.department_id, Project.team_id, Project.event_id, Project.location_id,
+        Project.guide_user_id, Project.guide_name, Project.guide_department_id, Project.guide_contact,
+        Project.created_at, Project.updated_at
+    )
+    return stream_csv(
+        db,
+        [
+            "ID", "Title", "Category", "Abstract", "Status",
+            "Department", "Team", "Event", "Location",
+            "Guide User", "Guide Name", "Guide Department", "Guide Contact",
+            "Created At", "Updated At"
+        ],
+        statement,
+        lambda row: (
+            *row[:13],
+            row.created_at.isoformat() if row.created_at else "",
+            row.updated_at.isoformat() if row.updated_at else ""
+        ),
+        batch_size
+    )
 
 # Get project statistics
-async def get_project_statistics(db: Session) -> Dict[str, Any]:
+async def get_project_statistics(db: AsyncSession) -> Dict[str, Any]:
     """Get project statistics"""
-    total_count = db.query(Project).count()
+    count_projects = select(func.count()).select_from(Project)
+    total_count = await db.scalar(count_projects)
     
     # Count by status
     status_counts = {}
     for status in ["draft", "submitted", "approved", "rejected", "completed"]:
-        count = db.query(Project).filter(Project.status == status).count()
+        count = await db.scalar(count_projects.where(Project.status == status))
         status_counts[status] = count
     
     # Count by department
     department_counts = {}
-    departments = db.query(Department).all()
+    departments = (await db.execute(select(Department))).scalars().all()
     for dept in departments:
-        count = db.query(Project).filter(Project.department_id == dept.id).count()
+        count = await db.scalar(count_projects.where(Project.department_id == dept.id))
         department_counts[dept.name] = count
     
     # Evaluation statistics
-    evaluated_count = db.query(Project).filter(
+    evaluated_count = await db.scalar(count_projects.where(
         Project.dept_evaluation != None,
         Project.central_evaluation != None
-    ).count()
+    ))
     
     pending_count = total_count - evaluated_count
     
@@ -291,10 +424,11 @@ async def get_project_statistics(db: Session) -> Dict[str, Any]:
     }
 
 # Get project counts by category
-async def get_project_counts_by_category(db: Session) -> Dict[str, Any]:
+async def get_project_counts_by_category(db: AsyncSession) -> Dict[str, Any]:
     """Get project counts grouped by category"""
     # Get all projects
-    projects = db.query(Project).all()
+    result = await db.execute(select(Project))
+    projects = result.scalars().all()
     
     # Group by category
     categories = {}
@@ -1,26 +1,29 @@
 import uuid
 from typing import List, Dict, Any, Optional
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 
+from app.database import utcnow
 from app.models.user import User
 from app.models.project import Project, DepartmentEvaluation, CentralEvaluation
 from app.models.department import Department
+from app.services.project import PROJECT_RESPONSE_OPTIONS, invalidate_stats_cache
 from app.schemas import (
     DeptEvaluationRequest, CentralEvaluationRequest, ProjectResponse
 )
 
 # Evaluate project by department jury
 async def evaluate_project_by_department(
-    db: Session, 
+    db: AsyncSession, 
     project_id: str, 
     evaluation_data: DeptEvaluationRequest,
     jury_user: User
 ) -> ProjectResponse:
     """Add department evaluation to a project"""
     # Get project
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id, options=PROJECT_RESPONSE_OPTIONS)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
@@ -44,25 +47,27 @@ async def evaluate_project_by_department(
     
     # Add to database
     db.add(evaluation)
+    # Only the evaluation row is new, so bump updated_at on the database clock
     project.updated_by = jury_user.id
-    project.updated_at = datetime.utcnow()
+    project.updated_at = utcnow()
     
     # Commit changes
-    db.commit()
-    db.refresh(project)
+    await db.commit()
+    invalidate_stats_cache()
+    await db.refresh(project, ["dept_evaluation", "central_evaluation"])
     
     return project
 
 # Evaluate project by central jury
 async def evaluate_project_by_central(
-    db: Session, 
+    db: AsyncSession, 
     project_id: str, 
     evaluation_data: CentralEvaluationRequest,
     jury_user: User
 ) -> ProjectResponse:
     """Add central evaluation to a project"""
     # Get project
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id, options=PROJECT_RESPONSE_OPTIONS)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
@@ -86,18 +91,20 @@ async def evaluate_project_by_central(
     
     # Add to database
     db.add(evaluation)
+    # Only the evaluation row is new, so bump updated_at on the database clock
     project.updated_by = jury_user.id
-    project.updated_at = datetime.utcnow()
+    project.updated_at = utcnow()
     
     # Commit changes
-    db.commit()
-    db.refresh(project)
+    await db.commit()
+    invalidate_stats_cache()
+    await db.refresh(project, ["dept_evaluation", "central_evaluation"])
     
     return project
 
 # Get projects for jury based on role and department
 async def get_projects_for_jury(
-    db: Session,
+    db: AsyncSession,
     jury_user: User,
     is_central_jury: bool = False,
     page: int = 1,
@@ -106,42 +113,43 @@ async def get_projects_for_jury(
     event_id: Optional[str] = None
 ) -> Dict[str, Any]:
     """Get projects for a jury member based on their role and department"""
-    query = db.query(Project)
+    query = select(Project)
     
     # Filter projects based on jury role
     if is_central_jury:
         # Central jury can see all projects with department evaluation
-        query = query.filter(Project.dept_evaluation != None)
+        query = query.where(Project.dept_evaluation != None)
         
         if evaluated_only:
             # If only want evaluated projects
-            query = query.filter(Project.central_evaluation != None)
+            query = query.where(Project.central_evaluation != None)
         else:
             # If want all projects eligible for evaluation
-            query = query.filter(Project.central_evaluation == None)
+            query = query.where(Project.central_evaluation == None)
     else:
         # Department jury can only see projects from their department
-        query = query.filter(Project.department_id == jury_user.department_id)
+        query = query.where(Project.department_id == jury_user.department_id)
         
         if evaluated_only:
             # If only want evaluated projects
-            query = query.filter(Project.dept_evaluation != None)
+            query = query.where(Project.dept_evaluation != None)
         else:
             # If want all projects eligible for evaluation
-            query = query.filter(Project.dept_evaluation == None)
+            query = query.where(Project.dept_evaluation == None)
     
     # Additional filters
     if event_id:
-        query = query.filter(Project.event_id == event_id)
+        query = query.where(Project.event_id == event_id)
     
     # Get total count for pagination
-    total = query.count()
+    total = await db.scalar(select(func.count()).select_from(query.subquery()))
     
     # Apply pagination
-    query = query.offset((page - 1) * limit).limit(limit)
+    query = query.options(*PROJECT_RESPONSE_OPTIONS).offset((page - 1) * limit).limit(limit)
     
     # Execute query
-    projects = query.all()
+    result = await db.execute(query)
+    projects = list(result.scalars().all())
     
     # Return response with metadata
     return {
@@ -154,25 +162,29 @@ async def get_projects_for_jury(
 
 # Get projects with evaluations by department
 async def get_evaluated_projects_by_department(
-    db: Session,
+    db: AsyncSession,
     department_id: str
 ) -> List[ProjectResponse]:
     """Get projects with evaluations for a specific department"""
-    projects = db.query(Project).filter(
-        Project.department_id == department_id,
-        Project.dept_evaluation != None
-    ).all()
-    return projects
+    result = await db.execute(
+        select(Project).options(*PROJECT_RESPONSE_OPTIONS).where(
+            Project.department_id == department_id,
+            Project.dept_evaluation != None
+        )
+    )
+    return list(result.scalars().all())
 
 # Get projects with central evaluations (winners)
 async def get_central_evaluated_projects(
-    db: Session,
+    db: AsyncSession,
     limit: int = 10
 ) -> List[ProjectResponse]:
     """Get centrally evaluated projects (potential winners)"""
-    projects = db.query(Project).filter(
-        Project.central_evaluation != None
-    ).order_by(
-        Project.central_evaluation['score'].desc()
-    ).limit(limit).all()
-    return projects
+    result = await db.execute(
+        select(Project).options(*PROJECT_RESPONSE_OPTIONS).where(
+            Project.central_evaluation != None
+        ).order_by(
+            Project.central_evaluation['score'].desc()
+        ).limit(limit)
+    )
+    return list(result.scalars().all())
@@ -1,48 +1,88 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload, raiseload
+from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
 from datetime import datetime
 
 from app.models.user import User
 from app.models.event import Event
 from app.models.department import Department
+from app.utils.csv_export import stream_csv
+from app.utils.pagination import keyset_page
+from app.utils.cache import TTLCache
 from app.schemas import (
     EventCreate, EventUpdate, EventResponse,
     ScheduleItemCreate, ScheduleItemUpdate
 )
 
+# Relationships read by EventResponse (schedule, departments); async sessions
+# cannot lazy load them, and any other relationship access raises
+EVENT_RESPONSE_OPTIONS = (
+    selectinload(Event.schedule),
+    selectinload(Event.departments),
+    raiseload("*"),
+)
+
+# Rendered JSON body of /events/active, which is unauthenticated and polled
+# by dashboards; dropped whenever an event changes. The TTL bounds staleness
+# from department renames, which reach the body through event.departments
+active_events_cache = TTLCache(ttl=30, maxsize=1)
+
+def invalidate_active_events_cache() -> None:
+    """Drop the cached active events list after events are modified"""
+    active_events_cache.clear()
+
+async def _get_event_or_404(db: AsyncSession, event_id: str) -> Event:
+    """Load an event with its schedule and departments or raise 404"""
+    event = await db.get(Event, event_id, options=EVENT_RESPONSE_OPTIONS)
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    return event
+
 # Get all events
-async def get_events(db: Session) -> List[EventResponse]:
+async def get_events(db: AsyncSession) -> List[EventResponse]:
     """Get all events"""
-    events = db.query(Event).order_by(Event.event_date.desc()).all()
-    return events
+    result = await db.execute(
+        select(Event).options(*EVENT_RESPONSE_OPTIONS).order_by(Event.event_date.desc())
+    )
+    return list(result.scalars().all())
+
+# Get one page of events
+async def get_events_page(
+    db: AsyncSession,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None
+) -> Tuple[List[EventResponse], Optional[str]]:
+    """Get the page of events after `cursor`, newest first, with the next page's cursor"""
+    return await keyset_page(
+        db, select(Event).options(*EVENT_RESPONSE_OPTIONS), Event.id,
+        sort_columns=[Event.event_date], cursor=cursor, limit=limit, descending=True
+    )
 
 # Get active events
-async def get_active_events(db: Session) -> List[EventResponse]:
+async def get_active_events(db: AsyncSession) -> List[EventResponse]:
     """Get active events"""
-    events = db.query(Event).filter(
-        Event.is_active == True
-    ).order_by(Event.event_date).all()
-    return events
+    result = await db.execute(
+        select(Event).options(*EVENT_RESPONSE_OPTIONS).where(
+            Event.is_active == True
+        ).order_by(Event.event_date)
+    )
+    return list(result.scalars().all())
 
 # Get a single event by ID
-async def get_event(db: Session, event_id: str) -> EventResponse:
+async def get_event(db: AsyncSession, event_id: str) -> EventResponse:
     """Get a single event"""
-    event = db.query(Event).filter(Event.id == event_id).first()
-    
-    if not event:
-        raise HTTPException(status_code=404, detail="Event not found")
-    
-    return event
+    return await _get_event_or_404(db, event_id)
 
 # Create a new event
-async def create_event(db: Session, event_data: EventCreate, current_user: User) -> EventResponse:
+async def create_event(db: AsyncSession, event_data: EventCreate, current_user: User) -> EventResponse:
     """Create a new event"""
     # Validate departments if provided
     if event_data.departments:
         for dept_id in event_data.departments:
-            department = db.query(Department).filter(Department.id == dept_id).first()
+            department = await db.get(Department, dept_id)
             if not department:
                 raise HTTPException(status_code=404, detail=f"Department with ID {dept_id} not found")
     
@@ -66,23 +106,22 @@ async def create_event(db: Session, event_data: EventCreate, current_user: User)
     
     # Add to database
     db.add(new_event)
-    db.commit()
-    db.refresh(new_event)
+    await db.commit()
+    invalidate_active_events_cache()
+    await db.refresh(new_event, ["schedule", "departments"])
     
     return new_event
 
 # Update an existing event
-async def update_event(db: Session, event_id: str, event_data: EventUpdate, current_user: User) -> EventResponse:
+async def update_event(db: AsyncSession, event_id: str, event_data: EventUpdate, current_user: User) -> EventResponse:
     """Update an existing event"""
     # Get event
-    event = db.query(Event).filter(Event.id == event_id).first()
-    if not event:
-        raise HTTPException(status_code=404, detail="Event not found")
+    event = await _get_event_or_404(db, event_id)
     
     # Validate departments if provided
     if event_data.departments:
         for dept_id in event_data.departments:
-            department = db.query(Department).filter(Department.id == dept_id).first()
+            department = await db.get(Department, dept_id)
             if not department:
                 raise HTTPException(status_code=404, detail=f"Department with ID {dept_id} not found")
     
@@ -104,55 +143,50 @@ async def update_event(db: Session, event_id: str, event_data: EventUpdate, curr
         
         setattr(event, key, value)
     
-    # Set updated_by and updated_at
+    # Set updated_by; updated_at comes from the database
     event.updated_by = current_user.id
-    event.updated_at = datetime.utcnow()
     
     # Commit changes
-    db.commit()
-    db.refresh(event)
+    await db.commit()
+    invalidate_active_events_cache()
+    await db.refresh(event, ["schedule", "departments"])
     
     return event
 
 # Delete an event
-async def delete_event(db: Session, event_id: str) -> None:
+async def delete_event(db: AsyncSession, event_id: str) -> None:
     """Delete an event"""
-    event = db.query(Event).filter(Event.id == event_id).first()
-    if not event:
-        raise HTTPException(status_code=404, detail="Event not found")
+    event = await _get_event_or_404(db, event_id)
     
     # Check for associated projects before deleting
     # This would require importing Project model which might create circular imports
     # For now, we'll assume this check happens at the API level
     
     # Delete the event
-    db.delete(event)
-    db.commit()
+    await db.delete(event)
+    await db.commit()
+    invalidate_active_events_cache()
 
 # Publish/unpublish event results
-async def publish_results(db: Session, event_id: str, publish: bool, current_user: User) -> EventResponse:
+async def publish_results(db: AsyncSession, event_id: str, publish: bool, current_user: User) -> EventResponse:
     """Publish or unpublish event results"""
-    event = db.query(Event).filter(Event.id == event_id).first()
-    if not event:
-        raise HTTPException(status_code=404, detail="Event not found")
+    event = await _get_event_or_404(db, event_id)
     
     # Update publish flag
     event.publish_results = publish
     event.updated_by = current_user.id
-    event.updated_at = datetime.utcnow()
     
     # Commit changes
-    db.commit()
-    db.refresh(event)
+    await db.commit()
+    invalidate_active_events_cache()
+    await db.refresh(event, ["schedule", "departments"])
     
     return event
 
 # Get event schedule
-async def get_event_schedule(db: Session, event_id: str) -> Dict[str, Any]:
+async def get_event_schedule(db: AsyncSession, event_id: str) -> Dict[str, Any]:
     """Get schedule for an event"""
-    event = db.query(Event).filter(Event.id == event_id).first()
-    if not event:
-        raise HTTPException(status_code=404, detail="Event not found")
+    event = await _get_event_or_404(db, event_id)
     
     return {
         "schedule": event.schedule,
@@ -160,11 +194,9 @@ async def get_event_schedule(db: Session, event_id: str) -> Dict[str, Any]:
     }
 
 # Update event schedule
-async def update_event_schedule(db: Session, event_id: str, schedule: List[Dict[str, Any]], current_user: User) -> Dict[str, List[Dict[str, Any]]]:
+async def update_event_schedule(db: AsyncSession, event_id: str, schedule: List[Dict[str, Any]], current_user: User) -> Dict[str, List[Dict[str, Any]]]:
     """Update schedule for an event"""
-    event = db.query(Event).filter(Event.id == event_id).first()
-    if not event:
-        raise HTTPException(status_code=404, detail="Event not found")
+    event = await _get_event_or_404(db, event_id)
     
     # Validate schedule items
     for item in schedule:
@@ -174,10 +206,33 @@ async def update_event_schedule(db: Session, event_id: str, schedule: List[Dict[
     # Update schedule
     event.schedule = schedule
     event.updated_by = current_user.id
-    event.updated_at = datetime.utcnow()
     
     # Commit changes
-    db.commit()
-    db.refresh(event)
+    await db.commit()
+    invalidate_active_events_cache()
+    await db.refresh(event, ["schedule", "departments"])
     
-    return {"schedule": event.schedule}
\ No newline at end of file
+    return {"schedule": event.schedule}
+
+# Export events to CSV
+def export_events_to_csv(db: AsyncSession, batch_size: int = 1000) -> AsyncIterator[str]:
+    """Export events as CSV, streamed in batches from a server-side cursor"""
+    statement = select(
+        Event.id, Event.name, Event.description, Event.academic_year,
+        Event.event_date, Event.registration_start_date, Event.registration_end_date,
+        Event.is_active, Event.status, Event.publish_results
+    ).order_by(Event.event_date.desc())
+    return stream_csv(
+        db,
+        [
+            "ID", "Name", "Description", "Academic Year", "Event Date",
+            "Registration Start", "Registration End", "Active", "Status", "Results Published"
+        ],
+        statement,
+        lambda row: (
+            *row[:4],
+            *(value.isoformat() if value else "" for value in row[4:7]),
+            *row[7:]
+        ),
+        batch_size
+    )
@@ -1,22 +1,32 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select, func, insert
+from sqlalchemy.orm import raiseload
+from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
-from datetime import datetime
 
 from app.models.user import User
 from app.models.location import Location
 from app.models.project import Project
 from app.models.department import Department
 from app.models.event import Event
+from app.utils.csv_export import stream_csv
+from app.utils.pagination import keyset_page
 from app.schemas import (
     LocationCreate, LocationUpdate, LocationResponse,
     PaginatedResponse, PaginatedMeta
 )
 
+# Largest /locations/batch request accepted in one INSERT
+MAX_LOCATION_BATCH = 10_000
+
+# LocationResponse reads no relationships, so any relationship access on a
+# listed location is an accidental lazy load and raises
+LOCATION_RESPONSE_OPTIONS = (raiseload("*"),)
+
 # Get all locations with pagination and filtering
 async def get_locations(
-    db: Session, 
+    db: AsyncSession, 
     page: int = 1, 
     limit: int = 50,
     department_id: Optional[str] = None,
@@ -25,27 +35,28 @@ async def get_locations(
     is_assigned: Optional[bool] = None
 ) -> PaginatedResponse[List[LocationResponse]]:
     """Get all locations with pagination and filtering"""
-    query = db.query(Location)
+    query = select(Location)
     
     # Apply filters
     if department_id:
-        query = query.filter(Location.department_id == department_id)
+        query = query.where(Location.department_id == department_id)
     if event_id:
-        query = query.filter(Location.event_id == event_id)
+        query = query.where(Location.event_id == event_id)
     if section:
-        query = query.filter(Location.section == section)
+        query = query.where(Location.section == section)
     if is_assigned is not None:
-        query = query.filter(Location.is_assigned == is_assigned)
+        query = query.where(Location.is_assigned == is_assigned)
     
     # Get total count for pagination
-    total = query.count()
+    total = await db.scalar(select(func.count()).select_from(query.subquery()))
     
     # Apply sorting and pagination
     query = query.order_by(Location.section, Location.position)
-    query = query.offset((page - 1) * limit).limit(limit)
+    query = query.options(*LOCATION_RESPONSE_OPTIONS).offset((page - 1) * limit).limit(limit)
     
     # Execute query
-    locations = query.all()
+    result = await db.execute(query)
+    locations = list(result.scalars().all())
     
     # Create pagination metadata
     meta = PaginatedMeta(
@@ -61,10 +72,22 @@ async def get_locations(
         "meta": meta
     }
 
+# Get one page of locations
+async def get_locations_page(
+    db: AsyncSession,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None
+) -> Tuple[List[LocationResponse], Optional[str]]:
+    """Get the page of locations after `cursor`, in section/position order, with the next page's cursor"""
+    return await keyset_page(
+        db, select(Location).options(*LOCATION_RESPONSE_OPTIONS), Location.id,
+        sort_columns=[Location.section, Location.position], cursor=cursor, limit=limit
+    )
+
 # Get a single location by ID
-async def get_location(db: Session, location_id: str) -> LocationResponse:
+async def get_location(db: AsyncSession, location_id: str) -> LocationResponse:
     """Get a single location"""
-    location = db.query(Location).filter(Location.id == location_id).first()
+    location = await db.get(Location, location_id, options=LOCATION_RESPONSE_OPTIONS)
     
     if not location:
         raise HTTPException(status_code=404, detail="Location not found")
@@ -72,20 +95,22 @@ async def get_location(db: Session, location_id: str) -> LocationResponse:
     return location
 
 # Create a new location
-async def create_location(db: Session, location_data: LocationCreate, current_user: User) -> LocationResponse:
+async def create_location(db: AsyncSession, location_data: LocationCreate, current_user: User) -> LocationResponse:
     """Create a new location"""
     # Validate department
-    department = db.query(Department).filter(Department.id == location_data.department_id).first()
+    department = await db.get(Department, location_data.department_id)
     if not department:
         raise HTTPException(status_code=404, detail="Department not found")
     
     # Validate event
-    event = db.query(Event).filter(Event.id == location_data.event_id).first()
+    event = await db.get(Event, location_data.event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
     # Check if location_id already exists
-    existing_location = db.query(Location).filter(Location.location_id == location_data.location_id).first()
+    existing_location = await db.scalar(
+        select(Location).where(Location.location_id == location_data.location_id)
+    )
     if existing_location:
         raise HTTPException(status_code=400, detail=f"Location ID '{location_data.location_id}' already exists")
     
@@ -104,16 +129,45 @@ async def create_location(db: Session, location_data: LocationCreate, current_us
     
     # Add to database
     db.add(new_location)
-    db.commit()
-    db.refresh(new_location)
+    await db.commit()
+    await db.refresh(new_location)
     
     return new_location
 
+# Create many locations at once
+async def create_locations(db: AsyncSession, locations_data: List[LocationCreate], current_user: User) -> List[Location]:
+    """Create a batch of locations with one multi-row INSERT ... RETURNING"""
+    if len(locations_data) > MAX_LOCATION_BATCH:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {MAX_LOCATION_BATCH} locations can be created per request"
+        )
+    if not locations_data:
+        return []
+    
+    rows = [
+        {
+            **location_data.model_dump(),
+            "id": str(uuid.uuid4()),
+            "is_assigned": False,  # Default to not assigned
+            "created_by": current_user.id,
+            "updated_by": current_user.id
+        }
+        for location_data in locations_data
+    ]
+    
+    # Duplicate location IDs fail the whole batch with an IntegrityError
+    result = await db.scalars(insert(Location).returning(Location), rows)
+    locations = list(result.all())
+    await db.commit()
+    
+    return locations
+
 # Update a location
-async def update_location(db: Session, location_id: str, location_data: LocationUpdate, current_user: User) -> LocationResponse:
+async def update_location(db: AsyncSession, location_id: str, location_data: LocationUpdate, current_user: User) -> LocationResponse:
     """Update a location"""
     # Get location
-    location = db.query(Location).filter(Location.id == location_id).first()
+    location = await db.get(Location, location_id)
     if not location:
         raise HTTPException(status_code=404, detail="Location not found")
     
@@ -123,20 +177,19 @@ async def update_location(db: Session, location_id: str, location_data: Location
     for key, value in update_data.items():
         setattr(location, key, value)
     
-    # Set updated_by and updated_at
+    # Set updated_by; updated_at comes from the database
     location.updated_by = current_user.id
-    location.updated_at = datetime.utcnow()
     
     # Commit changes
-    db.commit()
-    db.refresh(location)
+    await db.commit()
+    await db.refresh(location)
     
     return location
 
 # Delete a location
-async def delete_location(db: Session, location_id: str) -> None:
+async def delete_location(db: AsyncSession, location_id: str) -> None:
     """Delete a location"""
-    location = db.query(Location).filter(Location.id == location_id).first()
+    location = await db.get(Location, location_id)
     if not location:
         raise HTTPException(status_code=404, detail="Location not found")
     
@@ -144,31 +197,38 @@ async def delete_location(db: Session, location_id: str) -> None:
     if location.is_assigned:
         raise HTTPException(status_code=400, detail="Cannot delete a location that is assigned to a project")
     
-    db.delete(location)
-    db.commit()
+    await db.delete(location)
+    await db.commit()
 
 # Get locations by section
-async def get_locations_by_section(db: Session, section: str) -> List[LocationResponse]:
+async def get_locations_by_section(db: AsyncSession, section: str) -> List[LocationResponse]:
     """Get locations for a specific section"""
-    locations = db.query(Location).filter(
-        Location.section == section
-    ).order_by(Location.position).all()
-    return locations
+    result = await db.execute(
+        select(Location).options(*LOCATION_RESPONSE_OPTIONS).where(
+            Location.section == section
+        ).order_by(Location.position)
+    )
+    return list(result.scalars().all())
 
 # Get locations by department
-async def get_locations_by_department(db: Session, department_id: str) -> List[LocationResponse]:
+async def get_locations_by_department(db: AsyncSession, department_id: str) -> List[LocationResponse]:
     """Get locations for a specific department"""
-    locations = db.query(Location).filter(
-        Location.department_id == department_id
-    ).order_by(Location.section, Location.position).all()
-    return locations
+    result = await db.execute(
+        select(Location).options(*LOCATION_RESPONSE_OPTIONS).where(
+            Location.department_id == department_id
+        ).order_by(Location.section, Location.position)
+    )
+    return list(result.scalars().all())
 
 # Get locations by event
-async def get_locations_by_event(db: Session, event_id: str) -> Dict[str, Any]:
+async def get_locations_by_event(db: AsyncSession, event_id: str) -> Dict[str, Any]:
     """Get locations for a specific event grouped by section"""
-    locations = db.query(Location).filter(
-        Location.event_id == event_id
-    ).order_by(Location.section, Location.position).all()
+    result = await db.execute(
+        select(Location).options(*LOCATION_RESPONSE_OPTIONS).where(
+            Location.event_id == event_id
+        ).order_by(Location.section, Location.position)
+    )
+    locations = result.scalars().all()
     
     # Group locations by section
     sections = {}
@@ -190,10 +250,10 @@ async def get_locations_by_event(db: Session, event_id: str) -> Dict[str, Any]:
     }
 
 # Assign project to location
-async def assign_project_to_location(db: Session, location_id: str, project_id: str, current_user: User) -> LocationResponse:
+async def assign_project_to_location(db: AsyncSession, location_id: str, project_id: str, current_user: User) -> LocationResponse:
     """Assign a project to a location"""
     # Get location by its string ID (location_id)
-    location = db.query(Location).filter(Location.location_id == location_id).first()
+    location = await db.scalar(select(Location).where(Location.location_id == location_id))
     if not location:
         raise HTTPException(
             status_code=404, 
@@ -205,15 +265,15 @@ async def assign_project_to_location(db: Session, location_id: str, project_id:
         raise HTTPException(status_code=400, detail="Location is already assigned to another project")
     
     # Check if project exists
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
     # Check if project is already assigned to a different location
-    existing_location = db.query(Location).filter(
+    existing_location = await db.scalar(select(Location).where(
         Location.project_id == project_id,
         Location.location_id != location_id
-    ).first()
+    ))
     
     if existing_location:
         raise HTTPException(
@@ -225,24 +285,22 @@ async def assign_project_to_location(db: Session, location_id: str, project_id:
     location.project_id = project_id
     location.is_assigned = True
     location.updated_by = current_user.id
-    location.updated_at = datetime.utcnow()
     
     # Update project with location
     project.location_id = location_id
     project.updated_by = current_user.id
-    project.updated_at = datetime.utcnow()
     
     # Commit changes
-    db.commit()
-    db.refresh(location)
+    await db.commit()
+    await db.refresh(location)
     
     return location
 
 # Unassign project from location
-async def unassign_project_from_location(db: Session, location_id: str, current_user: User) -> LocationResponse:
+async def unassign_project_from_location(db: AsyncSession, location_id: str, current_user: User) -> LocationResponse:
     """Unassign a project from a location"""
     # Get location by its string ID
-    location = db.query(Location).filter(Location.location_id == location_id).first()
+    location = await db.scalar(select(Location).where(Location.location_id == location_id))
     if not location:
         raise HTTPException(status_code=404, detail="Location not found")
     
@@ -257,17 +315,30 @@ async def unassign_project_from_location(db: Session, location_id: str, current_
     location.project_id = None
     location.is_assigned = False
     location.updated_by = current_user.id
-    location.updated_at = datetime.utcnow()
     
     # Update project
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
     if project:
         project.location_id = None
         project.updated_by = current_user.id
-        project.updated_at = datetime.utcnow()
     
     # Commit changes
-    db.commit()
-    db.refresh(location)
+    await db.commit()
+    await db.refresh(location)
     
-    return location
\ No newline at end of file
+    return location
+
+# Export locations to CSV
+def export_locations_to_csv(db: AsyncSession, batch_size: int = 1000) -> AsyncIterator[str]:
+    """Export locations as CSV, streamed in batches from a server-side cursor"""
+    statement = select(
+        Location.id, Location.location_id, Location.section, Location.position,
+        Location.department_id, Location.event_id, Location.project_id, Location.is_assigned
+    ).order_by(Location.section, Location.position)
+    return stream_csv(
+        db,
+        ["ID", "Location ID", "Section", "Position", "Department", "Event", "Project", "Assigned"],
+        statement,
+        tuple,
+        batch_size
+    )
@@ -1,34 +1,50 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select, func
+from sqlalchemy.orm import selectinload, raiseload
+from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
-from datetime import datetime
 
+from app.database import utcnow
 from app.models.user import User
-from app.models.team import Team
+from app.models.team import Team, TeamMember
 from app.models.department import Department
+from app.utils.csv_export import stream_csv
+from app.utils.pagination import keyset_page
 from app.schemas import (
     TeamCreate, TeamUpdate, TeamResponse, TeamMemberCreate,
     PaginatedResponse, PaginatedMeta
 )
 
+# TeamResponse and the member helpers read team.members, which an async
+# session cannot lazy load; any other relationship access raises
+TEAM_RESPONSE_OPTIONS = (selectinload(Team.members), raiseload("*"))
+
+async def _get_team_or_404(db: AsyncSession, team_id: str) -> Team:
+    """Load a team with its members or raise 404"""
+    team = await db.get(Team, team_id, options=TEAM_RESPONSE_OPTIONS)
+    if not team:
+        raise HTTPException(status_code=404, detail="Team not found")
+    return team
+
 # Get all teams with pagination
 async def get_teams(
-    db: Session, 
+    db: AsyncSession, 
     page: int = 1, 
     limit: int = 10
 ) -> PaginatedResponse[List[TeamResponse]]:
     """Get all teams with pagination"""
-    query = db.query(Team)
+    query = select(Team)
     
     # Get total count for pagination
-    total = query.count()
+    total = await db.scalar(select(func.count()).select_from(Team))
     
     # Apply pagination
-    query = query.offset((page - 1) * limit).limit(limit)
+    query = query.options(*TEAM_RESPONSE_OPTIONS).offset((page - 1) * limit).limit(limit)
     
     # Execute query
-    teams = query.all()
+    result = await db.execute(query)
+    teams = list(result.scalars().all())
     
     # Create pagination metadata
     meta = PaginatedMeta(
@@ -45,20 +61,15 @@ async def get_teams(
     }
 
 # Get a single team by ID
-async def get_team(db: Session, team_id: str) -> TeamResponse:
+async def get_team(db: AsyncSession, team_id: str) -> TeamResponse:
     """Get a single team"""
-    team = db.query(Team).filter(Team.id == team_id).first()
-    
-    if not team:
-        raise HTTPException(status_code=404, detail="Team not found")
-    
-    return team
+    return await _get_team_or_404(db, team_id)
 
 # Create a new team
-async def create_team(db: Session, team_data: TeamCreate, current_user: User) -> TeamResponse:
+async def create_team(db: AsyncSession, team_data: TeamCreate, current_user: User) -> TeamResponse:
     """Create a new team"""
     # Validate department
-    department = db.query(Department).filter(Department.id == team_data.department_id).first()
+    department = await db.get(Department, team_data.department_id)
     if not department:
         raise HTTPException(status_code=404, detail="Department not found")
     
@@ -75,18 +86,16 @@ async def create_team(db: Session, team_data: TeamCreate, current_user: User) ->
     
     # Add to database
     db.add(new_team)
-    db.commit()
-    db.refresh(new_team)
+    await db.commit()
+    await db.refresh(new_team, ["members"])
     
     return new_team
 
 # Update an existing team
-async def update_team(db: Session, team_id: str, team_data: TeamUpdate, current_user: User) -> TeamResponse:
+async def update_team(db: AsyncSession, team_id: str, team_data: TeamUpdate, current_user: User) -> TeamResponse:
     """Update an existing team"""
     # Get team
-    team = db.query(Team).filter(Team.id == team_id).first()
-    if not team:
-        raise HTTPException(status_code=404, detail="Team not found")
+    team = await _get_team_or_404(db, team_id)
     
     # Update team attributes - only if provided in the request
     update_data = team_data.dict(exclude_unset=True)
@@ -94,78 +103,83 @@ async def update_team(db: Session, team_id: str, team_data: TeamUpdate, current_
     for key, value in update_data.items():
         setattr(team, key, value)
     
-    # Set updated_by and updated_at
+    # Set updated_by; updated_at comes from the database
     team.updated_by = current_user.id
-    team.updated_at = datetime.utcnow()
     
     # Commit changes
-    db.commit()
-    db.refresh(team)
+    await db.commit()
+    await db.refresh(team, ["members"])
     
     return team
 
 # Delete a team
-async def delete_team(db: Session, team_id: str) -> None:
+async def delete_team(db: AsyncSession, team_id: str) -> None:
     """Delete a team"""
-    team = db.query(Team).filter(Team.id == team_id).first()
-    if not team:
-        raise HTTPException(status_code=404, detail="Team not found")
+    team = await _get_team_or_404(db, team_id)
     
-    db.delete(team)
-    db.commit()
+    await db.delete(team)
+    await db.commit()
 
 # Get teams by department
-async def get_teams_by_department(db: Session, department_id: str) -> List[TeamResponse]:
+async def get_teams_by_department(db: AsyncSession, department_id: str) -> List[TeamResponse]:
     """Get teams for a specific department"""
-    teams = db.query(Team).filter(Team.department_id == department_id).all()
-    return teams
+    result = await db.execute(
+        select(Team).options(*TEAM_RESPONSE_OPTIONS).where(Team.department_id == department_id)
+    )
+    return list(result.scalars().all())
+
+# Get one page of a department's teams
+async def get_teams_by_department_page(
+    db: AsyncSession,
+    department_id: str,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None
+) -> Tuple[List[TeamResponse], Optional[str]]:
+    """Get the page of a department's teams after `cursor`, by name, with the next page's cursor"""
+    query = select(Team).options(*TEAM_RESPONSE_OPTIONS).where(Team.department_id == department_id)
+    return await keyset_page(db, query, Team.id, sort_columns=[Team.name], cursor=cursor, limit=limit)
 
 # Get teams by event
-async def get_teams_by_event(db: Session, event_id: str) -> List[TeamResponse]:
+async def get_teams_by_event(db: AsyncSession, event_id: str) -> List[TeamResponse]:
     """Get teams for a specific event"""
-    teams = db.query(Team).filter(Team.event_id == event_id).all()
-    return teams
+    result = await db.execute(
+        select(Team).options(*TEAM_RESPONSE_OPTIONS).where(Team.event_id == event_id)
+    )
+    return list(result.scalars().all())
 
 # Get team members
-async def get_team_members(db: Session, team_id: str) -> List[Dict[str, Any]]:
+async def get_team_members(db: AsyncSession, team_id: str) -> List[Dict[str, Any]]:
     """Get members of a specific team"""
-    team = db.query(Team).filter(Team.id == team_id).first()
-    if not team:
-        raise HTTPException(status_code=404, detail="Team not found")
+    team = await _get_team_or_404(db, team_id)
     
     return team.members
 
 # Add team member
-async def add_team_member(db: Session, team_id: str, member_data: TeamMemberCreate, current_user: User) -> TeamResponse:
+async def add_team_member(db: AsyncSession, team_id: str, member_data: TeamMemberCreate, current_user: User) -> TeamResponse:
     """Add a member to a team"""
-    team = db.query(Team).filter(Team.id == team_id).first()
-    if not team:
-        raise HTTPException(status_code=404, detail="Team not found")
+    team = await _get_team_or_404(db, team_id)
     
     # Check if user already in team
-    for member in team.members:
-        if member["user_id"] == member_data.user_id:
-            raise HTTPException(status_code=400, detail="User already in team")
+    if any(member.user_id == member_data.user_id for member in team.members):
+        raise HTTPException(status_code=400, detail="User already in team")
     
     # Add member
-    team.members.append(member_data.dict())
+    team.members.append(TeamMember(**member_data.model_dump()))
     
-    # Update metadata
+    # Only member rows changed, so bump updated_at on the database clock
     team.updated_by = current_user.id
-    team.updated_at = datetime.utcnow()
+    team.updated_at = utcnow()
     
     # Save changes
-    db.commit()
-    db.refresh(team)
+    await db.commit()
+    await db.refresh(team, ["members"])
     
     return team
 
 # Remove team member
-async def remove_team_member(db: Session, team_id: str, user_id: str, current_user: User) -> TeamResponse:
+async def remove_team_member(db: AsyncSession, team_id: str, user_id: str, current_user: User) -> TeamResponse:
     """Remove a member from a team"""
-    team = db.query(Team).filter(Team.id == team_id).first()
-    if not team:
-        raise HTTPException(status_code=404, detail="Team not found")
+    team = await _get_team_or_404(db, team_id)
     
     # Find member
     member_index = None
@@ -180,22 +194,20 @@ async def remove_team_member(db: Session, team_id: str, user_id: str, current_us
     # Remove member
     team.members.pop(member_index)
     
-    # Update metadata
+    # Only member rows changed, so bump updated_at on the database clock
     team.updated_by = current_user.id
-    team.updated_at = datetime.utcnow()
+    team.updated_at = utcnow()
     
     # Save changes
-    db.commit()
-    db.refresh(team)
+    await db.commit()
+    await db.refresh(team, ["members"])
     
     return team
 
 # Set team leader
-async def set_team_leader(db: Session, team_id: str, user_id: str, current_user: User) -> TeamResponse:
+async def set_team_leader(db: AsyncSession, team_id: str, user_id: str, current_user: User) -> TeamResponse:
     """Set a team member as the leader"""
-    team = db.query(Team).filter(Team.id == team_id).first()
-    if not team:
-        raise HTTPException(status_code=404, detail="Team not found")
+    team = await _get_team_or_404(db, team_id)
     
     # Find member and update leader status
     found = False
@@ -210,12 +222,36 @@ async def set_team_leader(db: Session, team_id: str, user_id: str, current_user:
     if not found:
         raise HTTPException(status_code=404, detail="Member not found in team")
     
-    # Update metadata
+    # Only member rows changed, so bump updated_at on the database clock
     team.updated_by = current_user.id
-    team.updated_at = datetime.utcnow()
+    team.updated_at = utcnow()
     
     # Save changes
-    db.commit()
-    db.refresh(team)
+    await db.commit()
+    await db.refresh(team, ["members"])
     
-    return team
\ No newline at end of file
+    return team
+
+# Export teams to CSV
+def export_teams_to_csv(db: AsyncSession, batch_size: int = 1000) -> AsyncIterator[str]:
+    """Export teams as CSV, streamed in batches from a server-side cursor"""
+    member_count = (
+        select(func.count(TeamMember.id))
+        .where(TeamMember.team_id == Team.id)
+        .scalar_subquery()
+    )
+    statement = select(
+        Team.id, Team.name, Team.department_id, Team.event_id, member_count,
+        Team.created_at, Team.updated_at
+    )
+    return stream_csv(
+        db,
+        ["ID", "Name", "Department", "Event", "Members", "Created At", "Updated At"],
+        statement,
+        lambda row: (
+            *row[:5],
+            row.created_at.isoformat() if row.created_at else "",
+            row.updated_at.isoformat() if row.updated_at else ""
+        ),
+        batch_size
+    )
@@ -1,25 +1,75 @@
-from typing import List, Dict, Any, Optional
-from fastapi import HTTPException, UploadFile, Response
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, distinct
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple, Union
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from pydantic import TypeAdapter
+from sqlalchemy import func, desc, distinct, select, delete, insert, tuple_, literal
+from sqlalchemy.orm import selectinload, raiseload
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
 import csv
 import io
+import itertools
 import uuid
 from datetime import datetime
 # Removing pandas dependency
 from collections import defaultdict
 
 from app.models.user import User
-from app.models.result import Result
+from app.models.result import Result, ResultSubject
+from app.models.student import Student
 from app.schemas import (
     ResultCreate, ResultResponse, ResultAnalysis, BatchResponse,
-    PaginatedResponse, PaginatedMeta, ResponseBase, DataResponse
+    ResponseBase, DataResponse, SubjectBase
 )
 from app.middleware.error import AppError
+from app.utils.csv_export import stream_csv
+from app.utils.pagination import apply_keyset, decode_cursor, offset_page, split_page
+
+# Rows written per INSERT batch when importing CSV files
+IMPORT_BATCH_SIZE = 1000
+
+# Validators for a batch of imported CSV rows, compiled once so each batch
+# is parsed and type-converted in a single pydantic-core call
+result_rows_adapter = TypeAdapter(List[ResultCreate])
+subject_rows_adapter = TypeAdapter(List[SubjectBase])
+
+# ResultResponse reads the subjects; async sessions cannot lazy load them
+RESULT_RESPONSE_OPTIONS = (selectinload(Result.subjects), raiseload("*"))
+
+def _filter_results(
+    query,
+    search: Optional[str],
+    branch: Optional[str],
+    semester: Optional[int],
+    exam_type: Optional[str]
+):
+    """Apply the result list filters to a Result select"""
+    if search:
+        query = query.where(Result.name.ilike(f"%{search}%") | 
+                          Result.enrollment_no.ilike(f"%{search}%"))
+    if branch:
+        query = query.where(Result.branch_name == branch)
+    if semester:
+        query = query.where(Result.semester == semester)
+    if exam_type:
+        query = query.where(Result.extype == exam_type)
+    
+    return query
+
+async def _attach_subjects(db: Union[AsyncSession, AsyncConnection], results: List[Dict[str, Any]]) -> None:
+    """Attach the subjects of a page of result dicts with one extra query"""
+    if not results:
+        return
+    
+    by_id = {result["id"]: result for result in results}
+    subjects = await db.execute(
+        select(*ResultSubject.__table__.c).where(ResultSubject.result_id.in_(by_id))
+    )
+    for subject in subjects.mappings():
+        by_id[subject["result_id"]]["subjects"].append(dict(subject))
 
 # Get all results with pagination and filtering
 async def get_results(
-    db: Session, 
+    db: AsyncSession, 
     page: int = 1, 
     limit: int = 10,
     search: Optional[str] = None,
@@ -27,20 +77,11 @@ async def get_results(
     semester: Optional[int] = None,
     exam_type: Optional[str] = None,
     sort_by: str = "declaration_date"
-) -> PaginatedResponse[List[ResultResponse]]:
-    """Get all results with pagination and filtering"""
-    query = db.query(Result)
-    
-    # Apply filters
-    if search:
-        query = query.filter(Result.name.ilike(f"%{search}%") | 
-                          Result.enrollment_no.ilike(f"%{search}%"))
-    if branch:
-        query = query.filter(Result.branch_name == branch)
-    if semester:
-        query = query.filter(Result.semester == semester)
-    if exam_type:
-        query = query.filter(Result.extype == exam_type)
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Get a page of results matching the filters, and the total number of matches"""
+    # Plain column selects skip ORM identity-map and instance hydration; the
+    # page is returned as dicts with the subjects attached
+    query = _filter_results(select(*Result.__table__.c), search, branch, semester, exam_type)
     
     # Apply sorting
     if sort_by == "declaration_date":
@@ -52,41 +93,76 @@ async def get_results(
     elif sort_by == "semester":
         query = query.order_by(Result.semester)
     
-    # Get total count for pagination
-    total = query.count()
-    
-    # Apply pagination
-    query = query.offset((page - 1) * limit).limit(limit)
+    # Fetch the page and the total count in one statement; the trailing
+    # total_count column is dropped from each row
+    rows, total = await offset_page(db, query, (page - 1) * limit, limit)
+    results = [dict(zip(row._fields, row[:-1]), subjects=[]) for row in rows]
+    await _attach_subjects(db, results)
     
-    # Execute query
-    results = query.all()
+    return results, total
+
+async def get_results_page(
+    db: AsyncSession,
+    cursor: Optional[str] = None,
+    limit: int = 10,
+    search: Optional[str] = None,
+    branch: Optional[str] = None,
+    semester: Optional[int] = None,
+    exam_type: Optional[str] = None,
+    sort_by: str = "declaration_date"
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Get the page of results after `cursor`, ordered by (sort_by, id), with the next page's cursor"""
+    query = _filter_results(select(*Result.__table__.c), search, branch, semester, exam_type)
+    
+    descending = sort_by not in ("name", "enrollment_no", "semester")
+    if descending:
+        # Newest first; undated results sort last instead of breaking the
+        # row comparison with NULL
+        sort_column = func.coalesce(Result.declaration_date, datetime.min)
+    else:
+        sort_column = getattr(Result, sort_by)
+    
+    cursor_key = None
+    if cursor:
+        after = decode_cursor(cursor)
+        cursor_key = tuple_(
+            select(sort_column).where(Result.id == after).scalar_subquery(),
+            literal(after, Result.id.type)
+        )
     
-    # Create pagination metadata
-    meta = PaginatedMeta(
-        total=total,
-        page=page,
-        limit=limit,
-        pages=(total + limit - 1) // limit  # Ceiling division
+    query = apply_keyset(query, [sort_column, Result.id], cursor_key, descending)
+    result = await db.execute(query.limit(limit + 1))
+    results, next_cursor = split_page(
+        [dict(row, subjects=[]) for row in result.mappings()], limit, lambda row: row["id"]
     )
+    await _attach_subjects(db, results)
     
-    # Return paginated response
-    return {
-        "data": results,
-        "meta": meta
-    }
+    return results, next_cursor
 
 # Get a single result by ID
-async def get_result(db: Session, result_id: str) -> ResultResponse:
-    """Get a single result by ID"""
-    result = db.query(Result).filter(Result.id == result_id).first()
+async def get_result(conn: AsyncConnection, result_id: str) -> Dict[str, Any]:
+    """Get a single result by ID as a plain dict with its subjects, without the ORM"""
+    row = (await conn.execute(
+        select(*Result.__table__.c).where(Result.id == result_id)
+    )).mappings().first()
     
-    if not result:
+    if not row:
         raise HTTPException(status_code=404, detail="Result not found")
     
+    result = dict(row, subjects=[])
+    await _attach_subjects(conn, [result])
     return result
 
+async def get_result_owner(db: Union[AsyncSession, AsyncConnection], result_id: str) -> Optional[str]:
+    """Get the enrollment number a result belongs to, or None if there is no such result"""
+    return await db.scalar(select(Result.enrollment_no).where(Result.id == result_id))
+
+async def get_user_enrollment_no(db: Union[AsyncSession, AsyncConnection], user_id: str) -> Optional[str]:
+    """Get the enrollment number of the student linked to a user, if any"""
+    return await db.scalar(select(Student.enrollment_no).where(Student.user_id == user_id))
+
 # Create a new result
-async def create_result(db: Session, result_data: ResultCreate) -> ResultResponse:
+async def create_result(db: AsyncSession, result_data: ResultCreate) -> ResultResponse:
     """Create a new result"""
     # Create new result
     new_result = Result(
@@ -104,87 +180,116 @@ async def create_result(db: Session, result_data: ResultCreate) -> ResultRespons
         earned_credits=result_data.earned_credits,
         spi=result_data.spi,
         cpi=result_data.cpi,
-        result=result_data.result,
-        created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow()
+        result=result_data.result
     )
     
     # Add to database
     db.add(new_result)
-    db.commit()
-    db.refresh(new_result)
+    await db.commit()
+    await db.refresh(new_result)
     
     return new_result
 
 # Delete a result
-async def delete_result(db: Session, result_id: str) -> ResponseBase:
+async def delete_result(db: AsyncSession, result_id: str) -> ResponseBase:
     """Delete a result"""
-    result = db.query(Result).filter(Result.id == result_id).first()
+    result = await db.get(Result, result_id)
     if not result:
         raise HTTPException(status_code=404, detail="Result not found")
     
-    db.delete(result)
-    db.commit()
+    await db.delete(result)
+    await db.commit()
     
     return {"status": "success", "message": "Result deleted successfully"}
 
 # Import results from CSV
-async def import_results(db: Session, file: UploadFile) -> ResponseBase:
-    """Import results from CSV file"""
-    content = await file.read()
-    
+def _read_result_rows(
+    reader: csv.DictReader, size: int, batch_id: str
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Parse up to `size` result rows, and their subject rows, from the CSV reader"""
+    subject_columns = [col for col in reader.fieldnames if col.startswith('subject_')]
+    # subject_<code> marks a subject; subject_name_<code> and friends are its details
+    code_columns = [col for col in subject_columns if col.count('_') == 1]
+    result_ids = []
+    raw_results = []
+    subject_result_ids = []
+    raw_subjects = []
+    
+    for row in itertools.islice(reader, size):
+        result_id = str(uuid.uuid4())
+        result_ids.append(result_id)
+        
+        # Extract subjects if they are in separate columns
+        for col in code_columns:
+            if row[col]:
+                code = col.split('_')[1]
+                subject = {"code": code, "name": row.get(f"subject_name_{code}", "")}
+                credits = row.get(f"subject_credits_{code}")
+                if credits:
+                    subject["credits"] = credits
+                grade = row.get(f"subject_grade_{code}")
+                if grade:
+                    subject["grade"] = grade
+                subject_result_ids.append(result_id)
+                raw_subjects.append(subject)
+        
+        # Blank cells are left out so the schema defaults apply
+        raw_results.append({
+            key: value for key, value in row.items()
+            if key not in subject_columns and value != ''
+        })
+    
+    # Validate and type-convert the whole batch at once
+    results = result_rows_adapter.validate_python(raw_results)
+    subjects = subject_rows_adapter.validate_python(raw_subjects)
+    
+    result_rows = [
+        {
+            **result.model_dump(exclude={"subjects"}),
+            "id": result_id,
+            # Add batch ID to track this upload
+            "upload_batch": batch_id
+        }
+        for result, result_id in zip(results, result_ids)
+    ]
+    subject_rows = [
+        {**subject.model_dump(), "id": str(uuid.uuid4()), "result_id": result_id}
+        for subject, result_id in zip(subjects, subject_result_ids)
+    ]
+    
+    return result_rows, subject_rows
+
+async def import_results(db: AsyncSession, file: UploadFile) -> ResponseBase:
+    """Import results from CSV file, committing IMPORT_BATCH_SIZE rows at a time"""
     # Generate batch ID for this upload
     batch_id = str(uuid.uuid4())
+    imported_count = 0
+    
+    # Decode the spooled upload incrementally instead of reading it into memory
+    await file.seek(0)
+    text = io.TextIOWrapper(file.file, encoding='utf-8', newline='')
     
     try:
-        # Process CSV
-        rows = content.decode('utf-8').splitlines()
-        reader = csv.DictReader(rows)
+        reader = csv.DictReader(text)
         
         # Validate data (basic check)
-        if 'enrollment_no' not in reader.fieldnames or 'name' not in reader.fieldnames or 'semester' not in reader.fieldnames:
+        fieldnames = reader.fieldnames or []
+        if 'enrollment_no' not in fieldnames or 'name' not in fieldnames or 'semester' not in fieldnames:
             raise HTTPException(status_code=400, detail="Invalid CSV format. Required columns missing.")
         
-        # Process each row
-        imported_count = 0
-        for row in reader:
-            # Create result object
-            result_dict = row
-            
-            # Extract subjects if they are in separate columns
-            subject_columns = [col for col in reader.fieldnames if col.startswith('subject_')]
-            subjects = []
-            for col in subject_columns:
-                if row[col]:
-                    parts = col.split('_')
-                    code = parts[1] if len(parts) > 1 else ""
-                    subjects.append({
-                        "code": code,
-                        "name": row.get(f"subject_name_{code}", ""),
-                        "credits": float(row.get(f"subject_credits_{code}", 0)),
-                        "grade": row.get(f"subject_grade_{code}", "")
-                    })
-            
-            # Add batch ID to track this upload
-            result_dict['upload_batch'] = batch_id
-            
-            # Convert basic data to expected types
-            if 'semester' in result_dict:
-                result_dict['semester'] = int(result_dict['semester'])
-            
-            # Create result
-            new_result = Result(
-                id=str(uuid.uuid4()),
-                **result_dict,
-                subjects=subjects,
-                created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow()
+        # Parse a batch off the event loop, then send it as multi-row INSERTs;
+        # a failing batch is rolled back on its own, earlier batches stay committed
+        while True:
+            result_rows, subject_rows = await run_in_threadpool(
+                _read_result_rows, reader, IMPORT_BATCH_SIZE, batch_id
             )
-            
-            db.add(new_result)
-            imported_count += 1
-        
-        db.commit()
+            if not result_rows:
+                break
+            await db.execute(insert(Result), result_rows)
+            if subject_rows:
+                await db.execute(insert(ResultSubject), subject_rows)
+            await db.commit()
+            imported_count += len(result_rows)
         
         return {
             "status": "success",
@@ -192,63 +297,54 @@ async def import_results(db: Session, file: UploadFile) -> ResponseBase:
             "data": {"count": imported_count, "batch_id": batch_id}
         }
     
+    except HTTPException:
+        raise
     except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=400, detail=f"Error importing results: {str(e)}")
+        await db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail=f"Error importing results after {imported_count} records (batch {batch_id}): {str(e)}"
+        )
+    finally:
+        # Hand the upload back untouched so UploadFile can close it
+        text.detach()
 
 # Export results to CSV
-async def export_results(db: Session) -> Response:
-    """Export results to CSV"""
-    # Get all results
-    results = db.query(Result).all()
-    
-    # Create CSV in memory
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Write header
-    writer.writerow([
-        "ID", "Enrollment No", "Name", "Exam Type", "Semester",
-        "Branch", "SPI", "CPI", "Result", "Declaration Date"
-    ])
-    
-    # Write data
-    for result in results:
-        writer.writerow([
-            result.id,
-            result.enrollment_no,
-            result.name,
-            result.extype,
-            result.semester,
-            result.branch_name,
-            result.spi,
-            result.cpi,
-            result.result,
-            result.declaration_date.isoformat() if result.declaration_date else ""
-        ])
-    
-    # Create response with CSV content
-    response = Response(content=output.getvalue())
-    response.headers["Content-Disposition"] = "attachment; filename=results_export.csv"
-    response.headers["Content-Type"] = "text/csv"
-    
-    return response
+def export_results(db: AsyncSession, batch_size: int = 1000) -> AsyncIterator[str]:
+    """Export results as CSV, streamed in batches from a server-side cursor"""
+    statement = select(
+        Result.id, Result.enrollment_no, Result.name, Result.extype, Result.semester,
+        Result.branch_name, Result.spi, Result.cpi, Result.result, Result.declaration_date
+    )
+    return stream_csv(
+        db,
+        [
+            "ID", "Enrollment No", "Name", "Exam Type", "Semester",
+            "Branch", "SPI", "CPI", "Result", "Declaration Date"
+        ],
+        statement,
+        lambda row: (
+            *row[:9],
+            row.declaration_date.isoformat() if row.declaration_date else ""
+        ),
+        batch_size
+    )
 
 # Get branch-wise analysis
-async def get_branch_analysis(db: Session) -> List[ResultAnalysis]:
+async def get_branch_analysis(db: AsyncSession) -> List[ResultAnalysis]:
     """Get branch-wise analysis of results"""
     # Get distinct branches and semesters
-    branch_semesters = db.query(Result.branch_name, Result.semester).distinct().all()
+    branch_semesters = (await db.execute(select(Result.branch_name, Result.semester).distinct())).all()
     
     # Prepare analysis
     analysis = []
     
     for branch_name, semester in branch_semesters:
         # Get all results for this branch and semester
-        results = db.query(Result).filter(
+        results = (await db.execute(select(Result).where(
             Result.branch_name == branch_name,
             Result.semester == semester
-        ).all()
+        ))).scalars().all()
         
         total_students = len(results)
         if total_students == 0:
@@ -289,10 +385,10 @@ async def get_branch_analysis(db: Session) -> List[ResultAnalysis]:
     return analysis
 
 # Get upload batches
-async def get_upload_batches(db: Session) -> List[BatchResponse]:
+async def get_upload_batches(db: AsyncSession) -> List[BatchResponse]:
     """Get list of uploaded result batches"""
     # Get distinct batch IDs
-    batches = db.query(Result.upload_batch).distinct().all()
+    batches = (await db.execute(select(Result.upload_batch).distinct())).all()
     
     batch_list = []
     for (batch_id,) in batches:
@@ -300,8 +396,8 @@ async def get_upload_batches(db: Session) -> List[BatchResponse]:
             continue
         
         # Get count and latest upload date for this batch
-        count = db.query(Result).filter(Result.upload_batch == batch_id).count()
-        latest = db.query(func.max(Result.created_at)).filter(Result.upload_batch == batch_id).scalar()
+        count = await db.scalar(select(func.count()).where(Result.upload_batch == batch_id))
+        latest = await db.scalar(select(func.max(Result.created_at)).where(Result.upload_batch == batch_id))
         
         batch_info = BatchResponse(
             batch_id=batch_id,
@@ -317,16 +413,16 @@ async def get_upload_batches(db: Session) -> List[BatchResponse]:
     return batch_list
 
 # Delete results by batch
-async def delete_results_by_batch(db: Session, batch_id: str) -> ResponseBase:
+async def delete_results_by_batch(db: AsyncSession, batch_id: str) -> ResponseBase:
     """Delete all results from a specific batch"""
     # Check if batch exists
-    count = db.query(Result).filter(Result.upload_batch == batch_id).count()
+    count = await db.scalar(select(func.count()).where(Result.upload_batch == batch_id))
     if count == 0:
         raise HTTPException(status_code=404, detail="Batch not found")
     
     # Delete all results from this batch
-    db.query(Result).filter(Result.upload_batch == batch_id).delete()
-    db.commit()
+    await db.execute(delete(Result).where(Result.upload_batch == batch_id))
+    await db.commit()
     
     return {
         "status": "success", 
@@ -334,11 +430,14 @@ async def delete_results_by_batch(db: Session, batch_id: str) -> ResponseBase:
     }
 
 # Get student results
-async def get_student_results(db: Session, enrollment_no: str) -> List[ResultResponse]:
+async def get_student_results(db: AsyncSession, enrollment_no: str) -> List[ResultResponse]:
     """Get all results for a specific student"""
-    results = db.query(Result).filter(
-        Result.enrollment_no == enrollment_no
-    ).order_by(Result.semester).all()
+    results = (await db.execute(
+        select(Result)
+        .options(*RESULT_RESPONSE_OPTIONS)
+        .where(Result.enrollment_no == enrollment_no)
+        .order_by(Result.semester)
+    )).scalars().all()
     
     if not results:
         raise HTTPException(status_code=404, detail="No results found for this student")
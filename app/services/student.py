@@ -1,9 +1,13 @@
-from typing import List, Optional, Dict, Any, Tuple
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, func
+from typing import List, Optional, Dict, Any, Tuple, AsyncIterator
+from sqlalchemy.orm import Session, selectinload, raiseload
+from sqlalchemy import String, cast, or_, func, select, insert, tuple_, literal
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import UploadFile, status
+from fastapi.concurrency import run_in_threadpool
 import csv
 import io
+import itertools
 import uuid
 import datetime
 
@@ -12,17 +16,38 @@ from app.models.student import (
     StudentEducation, StudentSemesterStatus
 )
 from app.models.department import Department
-from app.models.user import User, Role
+from app.models.user import User, Role, user_roles, hash_password
 from app.schemas.student import (
     StudentCreate, StudentUpdate, SemesterStatus, 
     EducationBase, GuardianBase, ContactBase
 )
 from app.middleware.error import AppError
 from app.services.user import get_user_by_email
+from app.utils.csv_export import stream_csv
+from app.utils.pagination import apply_keyset, decode_cursor, offset_page, split_page
 
-def get_student(db: Session, student_id: str) -> Optional[Student]:
+# Rows written per INSERT batch when importing CSV files
+IMPORT_BATCH_SIZE = 1000
+
+# Relationships read by StudentResponse; async sessions cannot lazy load them
+STUDENT_RESPONSE_RELATIONSHIPS = ["guardian", "contact", "education_background", "semester_status"]
+STUDENT_RESPONSE_OPTIONS = (
+    selectinload(Student.guardian),
+    selectinload(Student.contact),
+    selectinload(Student.education_background),
+    selectinload(Student.semester_status),
+    raiseload("*"),
+)
+
+# StudentWithUser additionally reads the user and department
+STUDENT_WITH_USER_OPTIONS = (
+    selectinload(Student.user).selectinload(User.roles),
+    selectinload(Student.department),
+) + STUDENT_RESPONSE_OPTIONS
+
+async def get_student(db: AsyncSession, student_id: str) -> Optional[Student]:
     """Get a student by ID"""
-    return db.query(Student).filter(Student.id == student_id).first()
+    return await db.get(Student, student_id, options=STUDENT_WITH_USER_OPTIONS)
 
 def get_student_by_user_id(db: Session, user_id: str) -> Optional[Student]:
     """Get a student by user ID"""
@@ -32,42 +57,34 @@ def get_student_by_enrollment_no(db: Session, enrollment_no: str) -> Optional[St
     """Get a student by enrollment number"""
     return db.query(Student).filter(Student.enrollment_no == enrollment_no).first()
 
-def get_students(
-    db: Session,
-    skip: int = 0,
-    limit: int = 100,
-    search: Optional[str] = None,
-    department_id: Optional[str] = None,
-    batch: Optional[str] = None,
-    semester: Optional[int] = None,
-    semester_status: Optional[str] = None,
-    category: Optional[str] = None,
-    sort_by: str = "enrollment_no",
-    sort_order: str = "asc"
-) -> Tuple[List[Student], int]:
-    """Get all students with filtering and pagination"""
-    query = db.query(Student)
-    
-    # Apply filters
+def _filter_students(
+    query,
+    search: Optional[str],
+    department_id: Optional[str],
+    batch: Optional[str],
+    semester: Optional[int],
+    semester_status: Optional[str],
+    category: Optional[str]
+):
+    """Apply the student list filters to a Student select"""
     if department_id and department_id != 'all':
-        query = query.filter(Student.department_id == department_id)
+        query = query.where(Student.department_id == department_id)
     
     if batch and batch != 'all':
-        query = query.filter(Student.batch == batch)
+        query = query.where(Student.batch == batch)
     
     if semester and not isinstance(semester, str):
-        query = query.filter(Student.semester == semester)
+        query = query.where(Student.semester == semester)
     
     if category and category != 'all':
-        query = query.filter(Student.category == category)
+        query = query.where(Student.category == category)
     
     # Search in student fields
     if search:
-        # Find users whose names match the search
-        user_ids = db.query(User.id).filter(User.name.ilike(f"%{search}%")).all()
-        user_ids = [uid[0] for uid in user_ids]
+        # Users whose names match the search, as a subquery of the same statement
+        user_ids = select(User.id).where(User.name.ilike(f"%{search}%"))
         
-        query = query.filter(or_(
+        query = query.where(or_(
             Student.enrollment_no.ilike(f"%{search}%"),
             Student.first_name.ilike(f"%{search}%"),
             Student.middle_name.ilike(f"%{search}%"),
@@ -85,12 +102,29 @@ def get_students(
         query = query.join(
             StudentSemesterStatus,
             Student.id == StudentSemesterStatus.student_id
-        ).filter(
+        ).where(
             getattr(StudentSemesterStatus, semester_field) == semester_status
         )
     
-    # Get total count for pagination
-    total = query.count()
+    return query
+
+async def get_students(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    search: Optional[str] = None,
+    department_id: Optional[str] = None,
+    batch: Optional[str] = None,
+    semester: Optional[int] = None,
+    semester_status: Optional[str] = None,
+    category: Optional[str] = None,
+    sort_by: str = "enrollment_no",
+    sort_order: str = "asc"
+) -> Tuple[List[Student], int]:
+    """Get all students with filtering and pagination"""
+    query = _filter_students(
+        select(Student), search, department_id, batch, semester, semester_status, category
+    )
     
     # Apply sorting
     if sort_by == "userId.name":
@@ -107,10 +141,46 @@ def get_students(
         else:
             query = query.order_by(getattr(Student, sort_by).asc())
     
-    # Apply pagination
-    query = query.offset(skip).limit(limit)
+    # Fetch the page and the total count in one statement
+    rows, total = await offset_page(db, query.options(*STUDENT_WITH_USER_OPTIONS), skip, limit)
+    return [row[0] for row in rows], total
+
+async def get_students_page(
+    db: AsyncSession,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    search: Optional[str] = None,
+    department_id: Optional[str] = None,
+    batch: Optional[str] = None,
+    semester: Optional[int] = None,
+    semester_status: Optional[str] = None,
+    category: Optional[str] = None,
+    sort_by: str = "enrollment_no",
+    sort_order: str = "asc"
+) -> Tuple[List[Student], Optional[str]]:
+    """Get the page of students after `cursor`, ordered by (sort_by, id), with the next page's cursor"""
+    query = _filter_students(
+        select(Student), search, department_id, batch, semester, semester_status, category
+    )
+    after = decode_cursor(cursor) if cursor else None
     
-    return query.all(), total
+    if sort_by == "userId.name":
+        query = query.join(User, Student.user_id == User.id)
+        sort_column = User.name
+        after_key = (
+            select(User.name)
+            .join(Student, Student.user_id == User.id)
+            .where(Student.id == after)
+            .scalar_subquery()
+        )
+    else:
+        sort_column = getattr(Student, sort_by)
+        after_key = select(sort_column).where(Student.id == after).scalar_subquery()
+    
+    cursor_key = tuple_(after_key, literal(after, Student.id.type)) if after else None
+    query = apply_keyset(query, [sort_column, Student.id], cursor_key, sort_order.lower() == "desc")
+    result = await db.execute(query.options(*STUDENT_WITH_USER_OPTIONS).limit(limit + 1))
+    return split_page(list(result.scalars().all()), limit)
 
 def create_student(db: Session, student: StudentCreate) -> Student:
     """Create a new student and associated user if needed"""
@@ -264,7 +334,7 @@ def create_student(db: Session, student: StudentCreate) -> Student:
 
 def delete_student(db: Session, student_id: str) -> bool:
     """Delete a student and optionally the associated user"""
-    student = get_student(db, student_id)
+    student = db.get(Student, student_id)
     if not student:
         return False
     
@@ -300,9 +370,12 @@ def delete_student(db: Session, student_id: str) -> bool:
     db.commit()
     return True
 
-def get_students_by_department(db: Session, department_id: str) -> List[Student]:
+async def get_students_by_department(db: AsyncSession, department_id: str) -> List[Student]:
     """Get all students for a specific department"""
-    return db.query(Student).filter(Student.department_id == department_id).all()
+    result = await db.execute(
+        select(Student).options(*STUDENT_RESPONSE_OPTIONS).where(Student.department_id == department_id)
+    )
+    return list(result.scalars().all())
 
 def sync_student_users(db: Session) -> Dict[str, Any]:
     """Sync all users with student role to ensure they have student records"""
@@ -374,188 +447,248 @@ def sync_student_users(db: Session) -> Dict[str, Any]:
     db.commit()
     return result
 
-def import_students_from_csv(db: Session, file: UploadFile) -> Dict[str, Any]:
-    """Import students from a CSV file"""
+def _parse_student_row(
+    row: Dict[str, str],
+    row_number: int,
+    department_ids: Dict[str, str],
+    errors: List[Dict[str, Any]],
+    warnings: List[Dict[str, Any]]
+) -> Optional[Dict[str, Any]]:
+    """Map one CSV row to student column values, or None if it has to be skipped"""
+    enrollment_no = row.get('enrollment_no') or row.get('Enrollment No') or row.get('MAP_NUMBER')
+    if not enrollment_no:
+        errors.append({"row": row_number, "error": "Missing enrollment number"})
+        return None
+    
+    # Handle names
+    full_name = row.get('Name') or row.get('name') or row.get('full_name') or row.get('Full Name') or ''
+    if not full_name:
+        warnings.append({"row": row_number, "warning": "Missing student name"})
+    
+    # Generate emails
+    institutional_email = row.get('institutional_email') or row.get('Institutional Email') or f"{enrollment_no.lower()}@gppalanpur.in"
+    personal_email = row.get('personal_email') or row.get('Personal Email') or row.get('Email') or ''
+    
+    # Get department, by code first and then by name
+    department_code = row.get('BR_CODE') or row.get('Department Code') or row.get('branch_code')
+    department_name = row.get('BR_NAME') or row.get('Department') or row.get('Department Name') or row.get('branch_name')
+    department_id = (
+        (department_code and department_ids.get(department_code)) or
+        (department_name and department_ids.get(f"name:{department_name}"))
+    )
+    
+    if not department_id:
+        warnings.append({
+            "row": row_number, 
+            "warning": f"Department not found for: code={department_code}, name={department_name}"
+        })
+        return None
+    
+    # Extract name parts
+    names = full_name.split(' ', 2)
+    first_name = names[0] if len(names) > 0 else ""
+    middle_name = names[1] if len(names) > 1 else ""
+    last_name = names[2] if len(names) > 2 else ""
+    
+    # Parse other fields
+    try:
+        semester = int(row.get('semester') or row.get('Semester') or row.get('sem') or '1')
+    except ValueError:
+        semester = 1
+        warnings.append({"row": row_number, "warning": "Invalid semester value, using default (1)"})
+    
+    try:
+        admission_year = int(row.get('admission_year') or row.get('Admission Year') or row.get('admissionYear') or '')
+    except (ValueError, TypeError):
+        # Try to extract from enrollment number
+        try:
+            admission_year = int(enrollment_no[:4])
+        except ValueError:
+            admission_year = datetime.datetime.now().year
+            warnings.append({"row": row_number, "warning": "Could not determine admission year, using current year"})
+    
+    # Determine batch (usually admission year to admission year + program length)
+    batch = row.get('batch') or row.get('Batch') or f"{admission_year}-{admission_year + 3}"
+    
+    # Determine gender
+    gender_map = {
+        'M': 'M', 'MALE': 'M', 'm': 'M', 'male': 'M',
+        'F': 'F', 'FEMALE': 'F', 'f': 'F', 'female': 'F',
+        'O': 'O', 'OTHER': 'O', 'o': 'O', 'other': 'O',
+        'NB': 'NB', 'NON-BINARY': 'NB', 'non-binary': 'NB', 'nonbinary': 'NB'
+    }
+    gender_raw = row.get('gender') or row.get('Gender') or ''
+    gender = gender_map.get(gender_raw.upper(), 'P')  # Default to 'Prefer not to say'
+    
+    return {
+        "department_id": department_id,
+        "enrollment_no": enrollment_no,
+        "first_name": first_name,
+        "middle_name": middle_name,
+        "last_name": last_name,
+        "full_name": full_name,
+        "personal_email": personal_email,
+        "institutional_email": institutional_email,
+        "batch": batch,
+        "semester": semester,
+        "admission_year": admission_year,
+        "gender": gender
+    }
+
+def _read_student_batch(
+    csv_reader: csv.DictReader,
+    first_row: int,
+    department_ids: Dict[str, str],
+    errors: List[Dict[str, Any]],
+    warnings: List[Dict[str, Any]]
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Read and parse up to IMPORT_BATCH_SIZE rows, returning the students and the number of rows read"""
+    batch = list(itertools.islice(csv_reader, IMPORT_BATCH_SIZE))
+    students = []
+    for row_number, row in enumerate(batch, first_row):
+        try:
+            student = _parse_student_row(row, row_number, department_ids, errors, warnings)
+            if student:
+                students.append(student)
+        except Exception as e:
+            errors.append({"row": row_number, "error": str(e)})
+    return students, len(batch)
+
+def _hash_passwords(passwords: List[str]) -> List[str]:
+    """Hash a batch of passwords; bcrypt is slow, so callers run this in the threadpool"""
+    return [hash_password(password) for password in passwords]
+
+def _write_student_batch(
+    db: Session,
+    user_rows: List[Dict[str, Any]],
+    role_rows: List[Dict[str, Any]],
+    new_students: List[Dict[str, Any]],
+    updated_students: List[Dict[str, Any]]
+) -> None:
+    """Write one import batch of users, role links and students"""
+    db.bulk_insert_mappings(User, user_rows)
+    if role_rows:
+        db.execute(insert(user_roles), role_rows)
+    db.bulk_insert_mappings(Student, new_students)
+    # Add default semester status
+    db.bulk_insert_mappings(
+        StudentSemesterStatus,
+        [{"student_id": student["id"]} for student in new_students]
+    )
+    db.bulk_update_mappings(Student, updated_students)
+
+async def import_students_from_csv(db: AsyncSession, file: UploadFile) -> Dict[str, Any]:
+    """Import students from a CSV file, writing and committing IMPORT_BATCH_SIZE rows at a time"""
     if not file.filename.endswith('.csv'):
         raise AppError(
             message="File must be a CSV",
             status_code=status.HTTP_400_BAD_REQUEST
         )
     
-    # Read CSV file
-    content = file.file.read().decode('utf-8')
-    csv_reader = csv.DictReader(io.StringIO(content))
+    # Departments (keyed by code and by "name:<name>") and the student role
+    # are looked up once for the whole file
+    department_ids = {}
+    for department_id, code, name in await db.execute(select(Department.id, Department.code, Department.name)):
+        department_ids[code] = department_id
+        department_ids[f"name:{name}"] = department_id
+    has_student_role = await db.scalar(select(Role.name).where(Role.name == "student")) is not None
+    
+    # Decode the spooled upload incrementally instead of reading it into memory
+    upload = io.TextIOWrapper(file.file, encoding='utf-8', newline='')
+    csv_reader = csv.DictReader(upload)
     
     # Process rows
     processed_students = []
     errors = []
     warnings = []
-    
-    # Group operations by department to minimize DB lookups
-    department_cache = {}
-    
-    for i, row in enumerate(csv_reader):
-        try:
-            enrollment_no = row.get('enrollment_no') or row.get('Enrollment No') or row.get('MAP_NUMBER')
-            if not enrollment_no:
-                errors.append({"row": i + 1, "error": "Missing enrollment number"})
-                continue
-            
-            # Handle names
-            full_name = row.get('Name') or row.get('name') or row.get('full_name') or row.get('Full Name') or ''
-            if not full_name:
-                warnings.append({"row": i + 1, "warning": "Missing student name"})
-            
-            # Generate emails
-            institutional_email = row.get('institutional_email') or row.get('Institutional Email') or f"{enrollment_no.lower()}@gppalanpur.in"
-            personal_email = row.get('personal_email') or row.get('Personal Email') or row.get('Email') or ''
-            
-            # Get department
-            department_code = row.get('BR_CODE') or row.get('Department Code') or row.get('branch_code')
-            department_name = row.get('BR_NAME') or row.get('Department') or row.get('Department Name') or row.get('branch_name')
+    row_number = 0
+    # Lower-cased email -> id of every user known to be in the database
+    user_ids = {}
+    
+    try:
+        while True:
+            # Reading and parsing block on the spooled file; keep them off the event loop
+            first_row = row_number + 1
+            students, rows_read = await run_in_threadpool(
+                _read_student_batch, csv_reader, first_row, department_ids, errors, warnings
+            )
+            if not rows_read:
+                break
+            row_number += rows_read
             
-            # Try to find department
-            department_id = None
+            # One lookup per batch for existing users and students
+            emails = {(student["personal_email"] or student["institutional_email"]).lower() for student in students}
+            unknown_emails = [email for email in emails if email not in user_ids]
+            if unknown_emails:
+                user_ids.update((await db.execute(
+                    select(func.lower(User.email), User.id).where(func.lower(User.email).in_(unknown_emails))
+                )).all())
+            student_ids = dict((await db.execute(
+                select(Student.enrollment_no, Student.id)
+                .where(Student.enrollment_no.in_([student["enrollment_no"] for student in students]))
+            )).all())
             
-            # Try by code first
-            if department_code:
-                if department_code in department_cache:
-                    department_id = department_cache[department_code]
+            user_rows = []
+            passwords = []
+            role_rows = []
+            batch_user_ids = {}
+            new_students = {}
+            updated_students = {}
+            for student in students:
+                enrollment_no = student["enrollment_no"]
+                
+                # Create user if needed
+                email = student["personal_email"] or student["institutional_email"]
+                user_id = user_ids.get(email.lower()) or batch_user_ids.get(email.lower())
+                if not user_id:
+                    user_id = str(uuid.uuid4())
+                    user_rows.append({
+                        "id": user_id,
+                        "name": student["full_name"],
+                        "email": email,
+                        "department_id": student["department_id"],
+                        "selected_role": "student" if has_student_role else None
+                    })
+                    # Use enrollment number as default password
+                    passwords.append(enrollment_no)
+                    if has_student_role:
+                        role_rows.append({"user_id": user_id, "role_name": "student"})
+                    batch_user_ids[email.lower()] = user_id
+                
+                # Update the student if this enrollment number already exists;
+                # later rows win when it appears twice
+                if enrollment_no in student_ids:
+                    updated_students[enrollment_no] = {**student, "id": student_ids[enrollment_no], "user_id": user_id}
+                elif enrollment_no in new_students:
+                    new_students[enrollment_no].update(student, user_id=user_id)
                 else:
-                    department = db.query(Department).filter(Department.code == department_code).first()
-                    if department:
-                        department_id = department.id
-                        department_cache[department_code] = department_id
+                    new_students[enrollment_no] = {**student, "id": str(uuid.uuid4()), "user_id": user_id, "status": "active"}
             
-            # Try by name if code didn't work
-            if not department_id and department_name:
-                cache_key = f"name:{department_name}"
-                if cache_key in department_cache:
-                    department_id = department_cache[cache_key]
-                else:
-                    department = db.query(Department).filter(Department.name == department_name).first()
-                    if department:
-                        department_id = department.id
-                        department_cache[cache_key] = department_id
+            # bcrypt takes a quarter second per hash; run the batch in the threadpool
+            for user_row, password in zip(user_rows, await run_in_threadpool(_hash_passwords, passwords)):
+                user_row["password"] = password
             
-            if not department_id:
-                warnings.append({
-                    "row": i + 1, 
-                    "warning": f"Department not found for: code={department_code}, name={department_name}"
-                })
-                continue
-            
-            # Extract name parts
-            names = full_name.split(' ', 2)
-            first_name = names[0] if len(names) > 0 else ""
-            middle_name = names[1] if len(names) > 1 else ""
-            last_name = names[2] if len(names) > 2 else ""
-            
-            # Parse other fields
+            # A failing batch is rolled back on its own; earlier batches stay committed
             try:
-                semester = int(row.get('semester') or row.get('Semester') or row.get('sem') or '1')
-            except ValueError:
-                semester = 1
-                warnings.append({"row": i + 1, "warning": "Invalid semester value, using default (1)"})
-            
-            try:
-                admission_year = int(row.get('admission_year') or row.get('Admission Year') or row.get('admissionYear') or '')
-            except (ValueError, TypeError):
-                # Try to extract from enrollment number
-                try:
-                    admission_year = int(enrollment_no[:4])
-                except ValueError:
-                    admission_year = datetime.datetime.now().year
-                    warnings.append({"row": i + 1, "warning": "Could not determine admission year, using current year"})
-            
-            # Determine batch (usually admission year to admission year + program length)
-            batch = row.get('batch') or row.get('Batch') or f"{admission_year}-{admission_year + 3}"
-            
-            # Determine gender
-            gender_map = {
-                'M': 'M', 'MALE': 'M', 'm': 'M', 'male': 'M',
-                'F': 'F', 'FEMALE': 'F', 'f': 'F', 'female': 'F',
-                'O': 'O', 'OTHER': 'O', 'o': 'O', 'other': 'O',
-                'NB': 'NB', 'NON-BINARY': 'NB', 'non-binary': 'NB', 'nonbinary': 'NB'
-            }
-            gender_raw = row.get('gender') or row.get('Gender') or ''
-            gender = gender_map.get(gender_raw.upper(), 'P')  # Default to 'Prefer not to say'
-            
-            # Create or update user
-            email = personal_email or institutional_email
-            
-            user = get_user_by_email(db, email)
-            if not user:
-                # Create new user
-                user = User(
-                    name=full_name,
-                    email=email,
-                    department_id=department_id
-                )
-                user.set_password(enrollment_no)  # Use enrollment number as default password
-                
-                # Add student role
-                student_role = db.query(Role).filter(Role.name == "student").first()
-                if student_role:
-                    user.roles = [student_role]
-                    user.selected_role = "student"
-                
-                db.add(user)
-                db.flush()
-            
-            # Check if student with this enrollment number already exists
-            existing_student = get_student_by_enrollment_no(db, enrollment_no)
-            if existing_student:
-                # Update existing student
-                existing_student.user_id = user.id
-                existing_student.department_id = department_id
-                existing_student.first_name = first_name
-                existing_student.middle_name = middle_name
-                existing_student.last_name = last_name
-                existing_student.full_name = full_name
-                existing_student.personal_email = personal_email
-                existing_student.institutional_email = institutional_email
-                existing_student.batch = batch
-                existing_student.semester = semester
-                existing_student.admission_year = admission_year
-                existing_student.gender = gender
-                
-                processed_students.append(existing_student)
-            else:
-                # Create new student
-                student = Student(
-                    user_id=user.id,
-                    department_id=department_id,
-                    enrollment_no=enrollment_no,
-                    first_name=first_name,
-                    middle_name=middle_name,
-                    last_name=last_name,
-                    full_name=full_name,
-                    personal_email=personal_email,
-                    institutional_email=institutional_email,
-                    batch=batch,
-                    semester=semester,
-                    admission_year=admission_year,
-                    gender=gender,
-                    status="active"
-                )
-                
-                db.add(student)
-                db.flush()
-                
-                # Add default semester status
-                semester_status = StudentSemesterStatus(
-                    student_id=student.id
+                await db.run_sync(
+                    _write_student_batch, user_rows, role_rows,
+                    list(new_students.values()), list(updated_students.values())
                 )
-                db.add(semester_status)
-                
-                processed_students.append(student)
+                await db.commit()
+            except SQLAlchemyError as e:
+                await db.rollback()
+                errors.append({"row": f"{first_row}-{row_number}", "error": str(e)})
+                continue
             
-        except Exception as e:
-            errors.append({"row": i + 1, "error": str(e)})
-    
-    # Commit all changes
-    db.commit()
+            # Only users that were committed can be reused by later batches
+            user_ids.update(batch_user_ids)
+            processed_students.extend(
+                {"id": student["id"], "enrollment_no": student["enrollment_no"], "full_name": student["full_name"]}
+                for student in (*new_students.values(), *updated_students.values())
+            )
+    finally:
+        # Hand the upload back untouched so UploadFile can close it
+        upload.detach()
     
     return {
         "results": processed_students,
@@ -564,70 +697,53 @@ def import_students_from_csv(db: Session, file: UploadFile) -> Dict[str, Any]:
         "warnings": warnings if warnings else None
     }
 
-def export_students_to_csv(db: Session) -> str:
-    """Export students to a CSV file"""
-    students = db.query(Student).join(
-        User, Student.user_id == User.id, isouter=True
-    ).join(
-        Department, Student.department_id == Department.id, isouter=True
-    ).join(
-        StudentGuardian, Student.id == StudentGuardian.student_id, isouter=True
-    ).join(
-        StudentContact, Student.id == StudentContact.student_id, isouter=True
-    ).all()
-    
-    # Prepare CSV data
-    output = io.StringIO()
-    fieldnames = [
-        'Enrollment No', 'Name', 'Email', 'Department', 'Batch', 'Semester',
-        'Status', 'Admission Year', 'Mobile', 'Contact Email', 'Address',
-        'City', 'State', 'Pincode', 'Guardian Name', 'Guardian Relation',
-        'Guardian Contact', 'Guardian Occupation', 'Education Background'
-    ]
-    writer = csv.DictWriter(output, fieldnames=fieldnames)
-    writer.writeheader()
-    
-    for student in students:
-        user = student.user
-        department = student.department
-        guardian = student.guardian
-        contact = student.contact
-        
-        # Get education background
-        education_str = "; ".join([
-            f"{edu.degree}|{edu.institution}|{edu.board}|{edu.percentage}|{edu.year_of_passing}"
-            for edu in student.education_background
-        ]) if student.education_background else ""
-        
-        # Write row
-        writer.writerow({
-            'Enrollment No': student.enrollment_no,
-            'Name': student.full_name or (user.name if user else ''),
-            'Email': user.email if user else student.personal_email or student.institutional_email,
-            'Department': department.name if department else '',
-            'Batch': student.batch or '',
-            'Semester': student.semester or '',
-            'Status': student.status or '',
-            'Admission Year': student.admission_year or '',
-            'Mobile': contact.mobile if contact else '',
-            'Contact Email': contact.email if contact else '',
-            'Address': contact.address if contact else '',
-            'City': contact.city if contact else '',
-            'State': contact.state if contact else '',
-            'Pincode': contact.pincode if contact else '',
-            'Guardian Name': guardian.name if guardian else '',
-            'Guardian Relation': guardian.relation if guardian else '',
-            'Guardian Contact': guardian.contact if guardian else '',
-            'Guardian Occupation': guardian.occupation if guardian else '',
-            'Education Background': education_str
-        })
-    
-    return output.getvalue()
+def export_students_to_csv(db: AsyncSession, batch_size: int = 1000) -> AsyncIterator[str]:
+    """Export students as CSV, streamed in batches from a server-side cursor"""
+    # Education rows are folded into one column in SQL, so each student is one row
+    education = (
+        select(func.aggregate_strings(
+            StudentEducation.degree + "|" + StudentEducation.institution + "|" +
+            StudentEducation.board + "|" + cast(StudentEducation.percentage, String) + "|" +
+            cast(StudentEducation.year_of_passing, String),
+            "; "
+        ))
+        .where(StudentEducation.student_id == Student.id)
+        .scalar_subquery()
+    )
+    statement = (
+        select(
+            Student.enrollment_no,
+            func.coalesce(Student.full_name, User.name, ""),
+            func.coalesce(User.email, Student.personal_email, Student.institutional_email),
+            Department.name, Student.batch, Student.semester, Student.status, Student.admission_year,
+            StudentContact.mobile, StudentContact.email, StudentContact.address,
+            StudentContact.city, StudentContact.state, StudentContact.pincode,
+            StudentGuardian.name, StudentGuardian.relation,
+            StudentGuardian.contact, StudentGuardian.occupation,
+            education
+        )
+        .outerjoin(User, Student.user_id == User.id)
+        .outerjoin(Department, Student.department_id == Department.id)
+        .outerjoin(StudentGuardian, Student.id == StudentGuardian.student_id)
+        .outerjoin(StudentContact, Student.id == StudentContact.student_id)
+    )
+    return stream_csv(
+        db,
+        [
+            'Enrollment No', 'Name', 'Email', 'Department', 'Batch', 'Semester',
+            'Status', 'Admission Year', 'Mobile', 'Contact Email', 'Address',
+            'City', 'State', 'Pincode', 'Guardian Name', 'Guardian Relation',
+            'Guardian Contact', 'Guardian Occupation', 'Education Background'
+        ],
+        statement,
+        lambda row: ('' if value is None else value for value in row),
+        batch_size
+    )
 
 def update_student(db: Session, student_id: str, student_data: StudentUpdate) -> Optional[Student]:
     """Update an existing student"""
     # Get student
-    db_student = get_student(db, student_id)
+    db_student = db.get(Student, student_id)
     if not db_student:
         return None
     
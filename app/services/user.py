@@ -1,37 +1,65 @@
-from typing import List, Optional, Dict, Any, Tuple
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, func
+from typing import List, Optional, Dict, Any, Tuple, AsyncIterator, Union
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import or_, func, select, text, tuple_, literal, insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
 from fastapi import UploadFile, HTTPException, status
 
-from app.models.user import User, Role
+from app.models.user import User, Role, user_roles, hash_password
+from app.models.department import Department
 from app.schemas.user import UserCreate, UserUpdate
 from app.middleware.error import AppError
+from app.utils.csv_export import stream_csv
+from app.utils.pagination import apply_keyset, decode_cursor, offset_page, split_page
 import csv
 import io
+import itertools
 import uuid
+from datetime import datetime
+
+# Rows written per INSERT batch when importing CSV files
+IMPORT_BATCH_SIZE = 1000
 
 def get_user(db: Session, user_id: str) -> Optional[User]:
-    """Get a user by ID"""
-    return db.query(User).filter(User.id == user_id).first()
+    """Get a user by ID with roles loaded"""
+    return db.execute(
+        select(User).options(selectinload(User.roles)).where(User.id == user_id)
+    ).scalar_one_or_none()
+
+async def get_user_async(db: AsyncSession, user_id: str) -> Optional[User]:
+    """Get a user by ID with roles loaded, for use on an async session"""
+    result = await db.execute(
+        select(User).options(selectinload(User.roles)).where(User.id == user_id)
+    )
+    return result.scalar_one_or_none()
 
 def get_user_by_email(db: Session, email: str) -> Optional[User]:
-    """Get a user by email"""
-    return db.query(User).filter(User.email == email).first()
+    """Get a user by email with roles loaded"""
+    return db.execute(
+        select(User)
+        .options(selectinload(User.roles))
+        .where(func.lower(User.email) == email.lower())
+    ).scalar_one_or_none()
 
-def get_users(
-    db: Session, 
-    skip: int = 0, 
-    limit: int = 100,
-    search: Optional[str] = None,
-    role: Optional[str] = None,
-    department_id: Optional[str] = None,
-    sort_by: str = "name",
-    sort_order: str = "asc"
-) -> Tuple[List[User], int]:
-    """Get all users with filtering and pagination"""
-    query = db.query(User)
-    
-    # Apply filters
+async def get_user_by_email_async(db: AsyncSession, email: str) -> Optional[User]:
+    """Get a user by email with roles loaded, for use on an async session"""
+    result = await db.execute(
+        select(User)
+        .options(selectinload(User.roles))
+        .where(func.lower(User.email) == email.lower())
+    )
+    return result.scalars().first()
+
+async def get_user_credentials(db: AsyncSession, email: str):
+    """Get just the (id, password, selected_role) row needed to issue a token"""
+    result = await db.execute(
+        select(User.id, User.password, User.selected_role)
+        .where(func.lower(User.email) == email.lower())
+    )
+    return result.first()
+
+def _filter_users(query, search: Optional[str], role: Optional[str], department_id: Optional[str]):
+    """Apply the admin user list filters to a User query"""
     if search:
         query = query.filter(
             or_(
@@ -46,8 +74,93 @@ def get_users(
     if department_id and department_id != "all":
         query = query.filter(User.department_id == department_id)
     
-    # Get total count for pagination
-    total = query.count()
+    return query
+
+def get_users_page(
+    db: Session,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    search: Optional[str] = None,
+    role: Optional[str] = None,
+    department_id: Optional[str] = None
+) -> Tuple[List[User], Optional[str]]:
+    """Get the page of users after `cursor`, ordered by (name, id), with the next page's cursor"""
+    query = _filter_users(db.query(User), search, role, department_id)
+    
+    cursor_key = None
+    if cursor:
+        after = decode_cursor(cursor)
+        cursor_key = tuple_(
+            select(User.name).where(User.id == after).scalar_subquery(),
+            literal(after, User.id.type)
+        )
+    
+    query = apply_keyset(query, [User.name, User.id], cursor_key)
+    return split_page(query.options(selectinload(User.roles)).limit(limit + 1).all(), limit)
+
+def count_users(
+    db: Session,
+    search: Optional[str] = None,
+    role: Optional[str] = None,
+    department_id: Optional[str] = None
+) -> int:
+    """Count users, using planner statistics when no filters are applied"""
+    if search or (role and role != "all") or (department_id and department_id != "all"):
+        return _filter_users(db.query(User), search, role, department_id).count()
+    return estimate_user_count(db)
+
+def estimate_user_count(db: Session) -> int:
+    """Approximate number of users from planner statistics, falling back to COUNT(*)"""
+    if db.get_bind().dialect.name == "postgresql":
+        estimate = db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE relname = 'users'")
+        ).scalar()
+        if estimate is not None and estimate >= 0:
+            return estimate
+    return db.query(func.count(User.id)).scalar()
+
+# Columns of the user list and detail rows read as plain Core rows
+USER_ROW_COLUMNS = (
+    User.id, User.name, User.email, User.department_id,
+    User.selected_role, User.created_at, User.updated_at
+)
+
+async def _attach_role_names(db: Union[AsyncSession, AsyncConnection], users: List[Dict[str, Any]]) -> None:
+    """Attach the role names of a page of user dicts with one extra query"""
+    if not users:
+        return
+    
+    by_id = {user["id"]: user for user in users}
+    roles = await db.execute(
+        select(user_roles.c.user_id, user_roles.c.role_name)
+        .where(user_roles.c.user_id.in_(by_id))
+    )
+    for user_id, role_name in roles:
+        by_id[user_id]["roles"].append(role_name)
+
+async def get_user_row(conn: AsyncConnection, user_id: str) -> Optional[Dict[str, Any]]:
+    """Get a user by ID as a plain dict with its role names, without the ORM"""
+    row = (await conn.execute(select(*USER_ROW_COLUMNS).where(User.id == user_id))).mappings().first()
+    if row is None:
+        return None
+    
+    user = dict(row, roles=[])
+    await _attach_role_names(conn, [user])
+    return user
+
+async def get_users(
+    db: AsyncSession, 
+    skip: int = 0, 
+    limit: int = 100,
+    search: Optional[str] = None,
+    role: Optional[str] = None,
+    department_id: Optional[str] = None,
+    sort_by: str = "name",
+    sort_order: str = "asc"
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Get all users with filtering and pagination, as plain dicts"""
+    # Select only the listed columns so rows skip ORM instance hydration
+    query = _filter_users(select(*USER_ROW_COLUMNS), search, role, department_id)
     
     # Apply sorting
     if sort_order.lower() == "desc":
@@ -55,13 +168,17 @@ def get_users(
     else:
         query = query.order_by(getattr(User, sort_by).asc())
     
-    # Apply pagination
-    query = query.offset(skip).limit(limit)
+    # Fetch the page and the total count in one statement; the trailing
+    # total_count column is dropped from each row
+    rows, total = await offset_page(db, query, skip, limit)
+    users = [dict(zip(row._fields, row[:-1]), roles=[]) for row in rows]
+    
+    await _attach_role_names(db, users)
     
-    return query.all(), total
+    return users, total
 
-def create_user(db: Session, user: UserCreate) -> User:
-    """Create a new user"""
+def create_user(db: Session, user: UserCreate, password_hash: str) -> User:
+    """Create a new user; the caller hashes the password off the event loop"""
     # Check if email already exists
     existing_user = get_user_by_email(db, user.email)
     if existing_user:
@@ -86,8 +203,7 @@ def create_user(db: Session, user: UserCreate) -> User:
         selected_role=user.selected_role or user.roles[0] if user.roles else None
     )
     
-    # Set password
-    db_user.set_password(user.password)
+    db_user.password = password_hash
     
     # Add to database
     db.add(db_user)
@@ -151,73 +267,90 @@ def delete_user(db: Session, user_id: str) -> bool:
     return True
 
 def import_users_from_csv(db: Session, file: UploadFile) -> Dict[str, Any]:
-    """Import users from a CSV file"""
+    """Import users from a CSV file, inserting and committing IMPORT_BATCH_SIZE rows at a time"""
     if not file.filename.endswith('.csv'):
         raise AppError(
             message="File must be a CSV",
             status_code=status.HTTP_400_BAD_REQUEST
         )
     
-    # Read CSV file
-    content = file.file.read().decode('utf-8')
-    csv_reader = csv.DictReader(io.StringIO(content))
+    # Every imported user gets the same default password, so hash it once
+    password_hash = hash_password("User@123")
+    known_roles = set(db.scalars(select(Role.name)))
     
-    # Process rows
     users = []
     errors = []
-    for i, row in enumerate(csv_reader):
+    
+    # Decode the spooled upload incrementally instead of reading it into memory
+    upload = io.TextIOWrapper(file.file, encoding='utf-8', newline='')
+    csv_reader = csv.DictReader(upload)
+    row_number = 0
+    
+    while True:
+        batch = list(itertools.islice(csv_reader, IMPORT_BATCH_SIZE))
+        if not batch:
+            break
+        
+        # One lookup per batch for emails that are already taken
+        taken_emails = set(db.scalars(
+            select(func.lower(User.email))
+            .where(func.lower(User.email).in_([(row.get('Email') or '').lower() for row in batch]))
+        ))
+        
+        user_rows = []
+        role_rows = []
+        for row in batch:
+            row_number += 1
+            try:
+                # Validate required fields
+                required_fields = ['Name', 'Email']
+                for field in required_fields:
+                    if field not in row or not row[field]:
+                        raise ValueError(f"Missing required field: {field}")
+                
+                # Map friendly column names to actual data
+                name = row['Name']
+                email = row['Email']
+                roles = [role.strip() for role in row.get('Roles', 'student').split(',')]
+                
+                # Check if user with email already exists
+                if email.lower() in taken_emails:
+                    errors.append(f"Skipping user {name}: Email '{email}' already exists")
+                    continue
+                taken_emails.add(email.lower())
+                
+                user_id = str(uuid.uuid4())
+                user_rows.append({
+                    "id": user_id,
+                    "name": name,
+                    "email": email,
+                    "password": password_hash,
+                    "department_id": row.get('Department') or None,
+                    "selected_role": row.get('Selected Role', roles[0] if roles else 'student')
+                })
+                role_rows.extend(
+                    {"user_id": user_id, "role_name": role_name}
+                    for role_name in roles if role_name in known_roles
+                )
+                
+            except Exception as e:
+                errors.append(f"Error in row {row_number}: {str(e)}")
+        
+        # A failing batch is rolled back on its own; earlier batches stay committed
         try:
-            # Validate required fields
-            required_fields = ['Name', 'Email']
-            for field in required_fields:
-                if field not in row or not row[field]:
-                    raise ValueError(f"Missing required field: {field}")
-            
-            # Map friendly column names to actual data
-            name = row.get('Name', '')
-            email = row.get('Email', '')
-            department_id = row.get('Department', '')
-            roles_str = row.get('Roles', 'student')
-            roles = [role.strip() for role in roles_str.split(',')]
-            selected_role = row.get('Selected Role', roles[0] if roles else 'student')
-            
-            # Check if user with email already exists
-            existing_user = get_user_by_email(db, email)
-            if existing_user:
-                errors.append(f"Skipping user {name}: Email '{email}' already exists")
-                continue
-            
-            # Create new user with default password
-            password = "User@123"  # Default password
-            db_user = User(
-                name=name,
-                email=email,
-                department_id=department_id,
-                selected_role=selected_role
-            )
-            db_user.set_password(password)
-            
-            # Get roles
-            user_roles = []
-            for role_name in roles:
-                role = db.query(Role).filter(Role.name == role_name).first()
-                if role:
-                    user_roles.append(role)
-            
-            db_user.roles = user_roles
-            
-            # Add to database
-            db.add(db_user)
-            users.append(db_user)
-            
-        except Exception as e:
-            errors.append(f"Error in row {i+1}: {str(e)}")
-    
-    # Commit all changes
-    if users:
-        db.commit()
-        for user in users:
-            db.refresh(user)
+            db.bulk_insert_mappings(User, user_rows)
+            if role_rows:
+                db.execute(insert(user_roles), role_rows)
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            errors.append(f"Error in rows {row_number - len(batch) + 1}-{row_number}: {str(e)}")
+            continue
+        
+        users.extend({"id": row["id"], "name": row["name"], "email": row["email"]} for row in user_rows)
+    
+    # Hand the upload back untouched so UploadFile can close it
+    upload.detach()
     
     return {
         "users": users,
@@ -225,35 +358,52 @@ def import_users_from_csv(db: Session, file: UploadFile) -> Dict[str, Any]:
         "summary": f"Successfully imported {len(users)} users. {len(errors)} errors encountered."
     }
 
-def export_users_to_csv(db: Session) -> str:
-    """Export users to a CSV file"""
-    users = db.query(User).all()
-    
-    # Prepare CSV data
-    output = io.StringIO()
-    fieldnames = ['Name', 'Email', 'Department', 'Roles', 'Selected Role', 'Created At']
-    writer = csv.DictWriter(output, fieldnames=fieldnames)
-    writer.writeheader()
-    
-    for user in users:
-        department_name = user.department.name if user.department else ''
-        roles = ', '.join([role.name for role in user.roles])
-        
-        writer.writerow({
-            'Name': user.name,
-            'Email': user.email,
-            'Department': department_name,
-            'Roles': roles,
-            'Selected Role': user.selected_role,
-            'Created At': user.created_at.isoformat() if user.created_at else ''
-        })
-    
-    return output.getvalue()
+def export_users_to_csv(db: AsyncSession, batch_size: int = 1000) -> AsyncIterator[str]:
+    """Export users as CSV, streamed in batches from a server-side cursor"""
+    roles = (
+        select(func.aggregate_strings(user_roles.c.role_name, ", "))
+        .where(user_roles.c.user_id == User.id)
+        .scalar_subquery()
+    )
+    statement = (
+        select(User.name, User.email, Department.name, roles, User.selected_role, User.created_at)
+        .outerjoin(Department, User.department_id == Department.id)
+    )
+    return stream_csv(
+        db,
+        ['Name', 'Email', 'Department', 'Roles', 'Selected Role', 'Created At'],
+        statement,
+        lambda row: (
+            row[0], row[1], row[2] or '', row[3] or '', row.selected_role,
+            row.created_at.isoformat() if row.created_at else ''
+        ),
+        batch_size
+    )
 
 def get_roles(db: Session) -> List[Role]:
     """Get all roles"""
     return db.query(Role).all()
 
+async def get_role_rows(db: AsyncSession) -> List[Tuple[str, str, str, Optional[datetime]]]:
+    """Get (name, description, permissions, created_at) tuples for all roles"""
+    result = await db.execute(
+        select(Role.name, Role.description, Role.permissions, Role.created_at)
+    )
+    return result.all()
+
+async def get_roles_version(db: AsyncSession) -> Tuple[Optional[datetime], int]:
+    """Get (latest updated_at, row count) for roles, which changes whenever roles do"""
+    result = await db.execute(select(func.max(Role.updated_at), func.count()).select_from(Role))
+    return tuple(result.one())
+
+async def get_roles_iter(db: AsyncSession, batch_size: int = 500) -> AsyncIterator[Role]:
+    """Iterate over all roles, fetching rows from the cursor in batches"""
+    result = await db.stream_scalars(
+        select(Role).execution_options(yield_per=batch_size)
+    )
+    async for role in result:
+        yield role
+
 def get_role(db: Session, role_name: str) -> Optional[Role]:
     """Get a role by name"""
     return db.query(Role).filter(Role.name == role_name).first()
@@ -320,6 +470,33 @@ def update_role(db: Session, role_name: str, description: Optional[str] = None,
     
     return db_role
 
+def bulk_upsert_roles(db: Session, roles_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Create or update many roles with a single lookup query and one commit"""
+    # Later rows win when the same role name appears more than once
+    roles_by_name = {role["name"]: role for role in roles_data}
+    existing_names = set(
+        db.scalars(select(Role.name).where(Role.name.in_(roles_by_name))).all()
+    )
+    
+    inserts = []
+    updates = []
+    for name, role in roles_by_name.items():
+        mapping = {
+            "name": name,
+            "description": role["description"],
+            "permissions": role["permissions"]
+        }
+        if name in existing_names:
+            updates.append(mapping)
+        else:
+            inserts.append(mapping)
+    
+    db.bulk_insert_mappings(Role, inserts)
+    db.bulk_update_mappings(Role, updates)
+    db.commit()
+    
+    return list(roles_by_name.values())
+
 def delete_role(db: Session, role_name: str) -> bool:
     """Delete a role"""
     db_role = get_role(db, role_name)
@@ -337,17 +514,18 @@ def assign_roles(db: Session, user_id: str, roles: List[str]) -> Optional[User]:
     if not db_user:
         return None
     
-    # Get roles
-    user_roles = []
-    for role_name in roles:
-        role = get_role(db, role_name)
-        if role:
-            user_roles.append(role)
-        else:
-            raise AppError(
-                message=f"Role {role_name} does not exist",
-                status_code=status.HTTP_404_NOT_FOUND
-            )
+    # Get roles in a single query and fail before touching the user if any are missing
+    found_roles = {
+        role.name: role
+        for role in db.scalars(select(Role).where(Role.name.in_(roles))).all()
+    }
+    missing_roles = [role_name for role_name in roles if role_name not in found_roles]
+    if missing_roles:
+        raise AppError(
+            message=f"Role {missing_roles[0]} does not exist",
+            status_code=status.HTTP_404_NOT_FOUND
+        )
+    user_roles = [found_roles[role_name] for role_name in dict.fromkeys(roles)]
     
     # Update user roles
     db_user.roles = user_roles
@@ -357,9 +535,48 @@ def assign_roles(db: Session, user_id: str, roles: List[str]) -> Optional[User]:
         db_user.selected_role = roles[0] if roles else None
     
     db.commit()
-    db.refresh(db_user)
     
-    return db_user
+    # Reload the user together with its roles so callers don't lazy-load them
+    return db.query(User).options(selectinload(User.roles)).filter(User.id == user_id).first()
+
+def bulk_assign_roles(db: Session, assignments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Assign roles to many users in a single transaction, returning a status per user"""
+    user_ids = {assignment["user_id"] for assignment in assignments}
+    role_names = {name for assignment in assignments for name in assignment["roles"]}
+    
+    users = {
+        user.id: user
+        for user in db.scalars(
+            select(User).options(selectinload(User.roles)).where(User.id.in_(user_ids))
+        ).all()
+    }
+    found_roles = {
+        role.name: role
+        for role in db.scalars(select(Role).where(Role.name.in_(role_names))).all()
+    }
+    
+    results = []
+    for assignment in assignments:
+        user_id = assignment["user_id"]
+        roles = list(dict.fromkeys(assignment["roles"]))
+        db_user = users.get(user_id)
+        missing_roles = [role_name for role_name in roles if role_name not in found_roles]
+        
+        if not db_user:
+            results.append({"user_id": user_id, "status": "error", "message": "User not found"})
+        elif not roles:
+            results.append({"user_id": user_id, "status": "error", "message": "At least one role is required"})
+        elif missing_roles:
+            results.append({"user_id": user_id, "status": "error", "message": f"Role {missing_roles[0]} does not exist"})
+        else:
+            db_user.roles = [found_roles[role_name] for role_name in roles]
+            if not db_user.selected_role or db_user.selected_role not in roles:
+                db_user.selected_role = roles[0]
+            results.append({"user_id": user_id, "status": "success", "roles": roles})
+    
+    db.commit()
+    
+    return results
 
 def export_roles_to_csv(db: Session) -> str:
     """Export roles to a CSV file"""
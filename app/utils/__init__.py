@@ -0,0 +1,9 @@
+from app.utils.cache import TTLCache
+from app.utils.csv_export import stream_csv
+from app.utils.pagination import encode_cursor, decode_cursor, keyset_page, apply_keyset, split_page
+from app.utils.responses import ORJSONResponse, orjson_default
+
+__all__ = [
+    "TTLCache", "stream_csv", "encode_cursor", "decode_cursor", "keyset_page", "apply_keyset", "split_page",
+    "ORJSONResponse", "orjson_default"
+]
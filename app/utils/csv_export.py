@@ -0,0 +1,35 @@
+import csv
+import io
+from typing import Any, AsyncIterator, Callable, Iterable, Sequence
+
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def stream_csv(
+    db: AsyncSession,
+    header: Sequence[str],
+    statement: Select,
+    format_row: Callable[[Any], Iterable[Any]],
+    batch_size: int = 1000
+) -> AsyncIterator[str]:
+    """
+    Run a SELECT on a server-side cursor and yield CSV text, one chunk per
+    batch of rows, so memory stays flat however large the table is
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> str:
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return data
+
+    writer.writerow(header)
+    yield flush()
+
+    result = await db.stream(statement.execution_options(yield_per=batch_size))
+    async for rows in result.partitions():
+        writer.writerows(format_row(row) for row in rows)
+        yield flush()
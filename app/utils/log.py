@@ -0,0 +1,38 @@
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+_listener: Optional[QueueListener] = None
+
+
+def setup_queue_logging(level: int = logging.INFO) -> None:
+    """
+    Route root logger records through a queue so stream writes happen on a
+    background thread instead of the event loop
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    root = logging.getLogger()
+    handlers = root.handlers[:] or [logging.StreamHandler()]
+    for handler in handlers:
+        root.removeHandler(handler)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_queue_logging() -> None:
+    """
+    Flush and stop the background logging thread
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
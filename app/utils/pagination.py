@@ -0,0 +1,113 @@
+import base64
+import binascii
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import Row, Select, func, literal, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Page size for a cursor request that does not name a limit
+DEFAULT_KEYSET_LIMIT = 50
+
+
+def encode_cursor(row_id: str) -> str:
+    """Encode a row id as an opaque, URL-safe page cursor"""
+    return base64.urlsafe_b64encode(row_id.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> str:
+    """Decode a page cursor back to the row id it points at"""
+    try:
+        return base64.b64decode(cursor + "=" * (-len(cursor) % 4), altchars=b"-_", validate=True).decode()
+    except (binascii.Error, UnicodeDecodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+def apply_keyset(
+    query: Any,
+    key_columns: Sequence[Any],
+    cursor_key: Optional[Any] = None,
+    descending: bool = False
+) -> Any:
+    """
+    Order `query` by the `key_columns` row value and, given the key of the
+    cursor row, seek past it instead of using OFFSET
+    """
+    if cursor_key is not None:
+        key = tuple_(*key_columns)
+        query = query.where(key < cursor_key if descending else key > cursor_key)
+    return query.order_by(*(column.desc() if descending else column.asc() for column in key_columns))
+
+def split_page(
+    rows: List[Any],
+    limit: int,
+    row_id: Callable[[Any], str] = lambda row: row.id
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Trim a page fetched with limit + 1 rows; the extra row only tells that
+    another page exists, and the last kept row becomes the next cursor
+    """
+    if len(rows) > limit:
+        return rows[:limit], encode_cursor(row_id(rows[limit - 1]))
+    return rows, None
+
+async def keyset_page(
+    db: AsyncSession,
+    query: Select,
+    id_column: Any,
+    sort_columns: Sequence[Any] = (),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    descending: bool = False
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Fetch the page of rows that follows `cursor`, ordered by (sort_columns, id).
+    Seeks past the cursor row instead of using OFFSET, and reads one extra row
+    to tell whether another page exists, so no COUNT(*) is needed. With
+    neither a cursor nor a limit every row is returned, in the same order.
+    
+    A NULL never compares in the row-value seek, so a row with a NULL sort key
+    could never be paged past; nullable sort columns are rejected instead
+    """
+    nullable = [column.key for column in sort_columns if column.nullable]
+    if nullable:
+        raise ValueError(f"Keyset sort columns must be NOT NULL: {', '.join(nullable)}")
+    key_columns = [*sort_columns, id_column]
+
+    if cursor is None and limit is None:
+        result = await db.execute(apply_keyset(query, key_columns, descending=descending))
+        return list(result.scalars().all()), None
+
+    cursor_key = None
+    if cursor:
+        after_id = decode_cursor(cursor)
+        cursor_key = tuple_(
+            *(select(column).where(id_column == after_id).scalar_subquery() for column in sort_columns),
+            literal(after_id, id_column.type)
+        )
+
+    limit = limit or DEFAULT_KEYSET_LIMIT
+    query = apply_keyset(query, key_columns, cursor_key, descending)
+    result = await db.execute(query.limit(limit + 1))
+    return split_page(list(result.scalars().all()), limit)
+
+async def offset_page(
+    db: AsyncSession,
+    query: Select,
+    skip: int = 0,
+    limit: int = 100
+) -> Tuple[List[Row], int]:
+    """
+    Fetch one OFFSET page of `query` together with the number of rows it
+    matches. The total rides along as a COUNT(*) OVER () column on the page
+    rows, so both come back in a single round trip; a separate COUNT is only
+    run when the page is empty. Each returned row ends with that column
+    """
+    page_query = query.add_columns(func.count().over().label("total_count"))
+    rows = list((await db.execute(page_query.offset(skip).limit(limit))).all())
+    
+    if rows:
+        return rows, rows[0].total_count
+    if not skip:
+        return rows, 0
+    
+    total = await db.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+    return rows, total
@@ -0,0 +1,31 @@
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def orjson_default(obj: Any) -> Any:
+    """
+    Fallback serializer for types orjson does not handle natively
+    (datetime, date, UUID and Enum are already covered by orjson itself)
+    """
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson, skipping FastAPI's jsonable_encoder pass
+    """
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=orjson_default,
+            option=orjson.OPT_NON_STR_KEYS
+        )
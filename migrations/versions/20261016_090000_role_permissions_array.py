@@ -0,0 +1,43 @@
+"""Store role permissions as a text array
+
+Revision ID: 3f1c2a9d7b10
+Revises: 84dc168a62c7
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9d7b10'
+down_revision = '84dc168a62c7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing values are either "read,create" or "{read,create}" (lists that
+    # were stringified on insert), so strip braces before splitting. Empty
+    # values split to NULL, which the NOT NULL column rejects, so they
+    # become an empty array
+    op.alter_column(
+        'roles', 'permissions',
+        existing_type=sa.String(length=500),
+        type_=postgresql.ARRAY(sa.String(length=50)),
+        existing_nullable=False,
+        postgresql_using=(
+            "coalesce(string_to_array(nullif(trim(both '{}' from permissions), ''), ',')::varchar(50)[], "
+            "'{}'::varchar(50)[])"
+        )
+    )
+
+
+def downgrade() -> None:
+    op.alter_column(
+        'roles', 'permissions',
+        existing_type=postgresql.ARRAY(sa.String(length=50)),
+        type_=sa.String(length=500),
+        existing_nullable=False,
+        postgresql_using="array_to_string(permissions, ',')"
+    )
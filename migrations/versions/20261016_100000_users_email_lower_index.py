@@ -0,0 +1,28 @@
+"""Add a unique index on lower(users.email)
+
+Revision ID: 7a2d4c8e1b35
+Revises: 3f1c2a9d7b10
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '7a2d4c8e1b35'
+down_revision = '3f1c2a9d7b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_users_email_lower',
+        'users',
+        [sa.text('lower(email)')],
+        unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_email_lower', table_name='users')
@@ -0,0 +1,47 @@
+"""Index the project, team, location and event list filters
+
+Revision ID: 5c9e1f3a2d47
+Revises: 7a2d4c8e1b35
+Create Date: 2026-10-16 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '5c9e1f3a2d47'
+down_revision = '7a2d4c8e1b35'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_projects_department_event', 'projects', ['department_id', 'event_id'], {}),
+    ('ix_projects_event_id', 'projects', ['event_id'], {}),
+    ('ix_projects_team_id', 'projects', ['team_id'], {}),
+    ('ix_projects_title_trgm', 'projects', ['title'], {
+        'postgresql_using': 'gin',
+        'postgresql_ops': {'title': 'gin_trgm_ops'},
+    }),
+    ('ix_project_teams_department_id', 'project_teams', ['department_id'], {}),
+    ('ix_project_teams_event_id', 'project_teams', ['event_id'], {}),
+    ('ix_project_locations_section_position', 'project_locations', ['section', 'position'], {}),
+    ('ix_project_locations_event_id', 'project_locations', ['event_id'], {}),
+    ('ix_project_events_active_date', 'project_events', ['event_date'], {
+        'postgresql_where': sa.text('is_active = true'),
+    }),
+]
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # CONCURRENTLY cannot run inside a transaction, but avoids locking out
+    # writes while the indexes build
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, **kwargs)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,60 @@
+"""Index the student, user and result list filters and sort keys
+
+Revision ID: 8b3f6d2e9a14
+Revises: 5c9e1f3a2d47
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '8b3f6d2e9a14'
+down_revision = '5c9e1f3a2d47'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_results_branch_semester', 'results', ['branch_name', 'semester'], {}),
+    ('ix_results_declaration_date', 'results', ['declaration_date'], {}),
+    ('ix_results_extype', 'results', ['extype'], {}),
+    ('ix_results_name_trgm', 'results', ['name'], {
+        'postgresql_using': 'gin',
+        'postgresql_ops': {'name': 'gin_trgm_ops'},
+    }),
+    ('ix_results_enrollment_no_trgm', 'results', ['enrollment_no'], {
+        'postgresql_using': 'gin',
+        'postgresql_ops': {'enrollment_no': 'gin_trgm_ops'},
+    }),
+    ('ix_result_subjects_result_id', 'result_subjects', ['result_id'], {}),
+    ('ix_students_department_batch', 'students', ['department_id', 'batch'], {}),
+    ('ix_students_semester', 'students', ['semester'], {}),
+    ('ix_students_enrollment_no_id', 'students', ['enrollment_no', 'id'], {}),
+    ('ix_students_user_id', 'students', ['user_id'], {}),
+    ('ix_users_department_id', 'users', ['department_id'], {}),
+    ('ix_users_name_id', 'users', ['name', 'id'], {}),
+    ('ix_users_name_trgm', 'users', ['name'], {
+        'postgresql_using': 'gin',
+        'postgresql_ops': {'name': 'gin_trgm_ops'},
+    }),
+    ('ix_users_email_trgm', 'users', ['email'], {
+        'postgresql_using': 'gin',
+        'postgresql_ops': {'email': 'gin_trgm_ops'},
+    }),
+    ('ix_user_roles_role_name', 'user_roles', ['role_name'], {}),
+]
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # CONCURRENTLY cannot run inside a transaction, but avoids locking out
+    # writes while the indexes build
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, **kwargs)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
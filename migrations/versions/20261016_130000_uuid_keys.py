@@ -0,0 +1,86 @@
+"""Store id and foreign key columns as native uuid
+
+Revision ID: 2e7b5a9c4f61
+Revises: 8b3f6d2e9a14
+Create Date: 2026-10-16 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2e7b5a9c4f61'
+down_revision = '8b3f6d2e9a14'
+branch_labels = None
+depends_on = None
+
+# Every varchar(36) column that holds a uuid4 string
+ID_COLUMNS = {
+    'users': ['id', 'department_id'],
+    'user_roles': ['user_id'],
+    'departments': ['id', 'hod_id'],
+    'faculties': ['id', 'user_id', 'department_id'],
+    'faculty_qualifications': ['id', 'faculty_id'],
+    'students': ['id', 'user_id', 'department_id'],
+    'student_guardians': ['id', 'student_id'],
+    'student_contacts': ['id', 'student_id'],
+    'student_education': ['id', 'student_id'],
+    'student_semester_status': ['id', 'student_id'],
+    'results': ['id', 'upload_batch'],
+    'result_subjects': ['id', 'result_id'],
+    'project_events': ['id', 'created_by', 'updated_by'],
+    'event_departments': ['event_id', 'department_id'],
+    'event_schedules': ['id', 'event_id', 'coordinator_id'],
+    'project_teams': ['id', 'department_id', 'event_id', 'created_by', 'updated_by'],
+    'team_members': ['id', 'team_id', 'user_id'],
+    'project_locations': ['id', 'department_id', 'event_id', 'project_id', 'created_by', 'updated_by'],
+    'projects': [
+        'id', 'department_id', 'guide_user_id', 'guide_department_id', 'team_id',
+        'event_id', 'location_id', 'created_by', 'updated_by'
+    ],
+    'department_evaluations': ['id', 'project_id', 'jury_id'],
+    'central_evaluations': ['id', 'project_id', 'jury_id'],
+}
+
+
+def _id_foreign_keys():
+    """Foreign keys between id columns; they must be dropped while the types change"""
+    inspector = sa.inspect(op.get_bind())
+    return [
+        (table, fk)
+        for table, columns in ID_COLUMNS.items()
+        for fk in inspector.get_foreign_keys(table)
+        if set(fk['constrained_columns']) <= set(columns)
+    ]
+
+
+def _convert(from_type, to_type, cast: str) -> None:
+    foreign_keys = _id_foreign_keys()
+    for table, fk in foreign_keys:
+        op.drop_constraint(fk['name'], table, type_='foreignkey')
+
+    for table, columns in ID_COLUMNS.items():
+        for column in columns:
+            op.alter_column(
+                table, column,
+                existing_type=from_type,
+                type_=to_type,
+                postgresql_using=f'"{column}"::{cast}'
+            )
+
+    for table, fk in foreign_keys:
+        op.create_foreign_key(
+            fk['name'], table, fk['referred_table'],
+            fk['constrained_columns'], fk['referred_columns'],
+            **fk.get('options', {})
+        )
+
+
+def upgrade() -> None:
+    # 16-byte keys instead of 36-character text; the application keeps
+    # reading and writing them as strings
+    _convert(sa.String(length=36), sa.Uuid(), 'uuid')
+
+
+def downgrade() -> None:
+    _convert(sa.Uuid(), sa.String(length=36), 'varchar(36)')
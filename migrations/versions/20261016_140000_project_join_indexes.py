@@ -0,0 +1,45 @@
+"""Index the project schedule, member and location lookups
+
+Revision ID: 6d4a8f2c1e93
+Revises: 2e7b5a9c4f61
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '6d4a8f2c1e93'
+down_revision = '2e7b5a9c4f61'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_event_schedules_event_id', 'event_schedules', ['event_id'], {}),
+    ('ix_team_members_team_id', 'team_members', ['team_id'], {}),
+    ('ix_project_locations_event_section_position', 'project_locations', ['event_id', 'section', 'position'], {}),
+    ('ix_project_locations_department_section_position', 'project_locations', ['department_id', 'section', 'position'], {}),
+    ('ix_projects_status', 'projects', ['status'], {}),
+]
+
+# Superseded by ix_project_locations_event_section_position
+REPLACED = [
+    ('ix_project_locations_event_id', 'project_locations', ['event_id']),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction, but avoids locking out
+    # writes while the indexes build
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, **kwargs)
+        for name, table, _ in REPLACED:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in REPLACED:
+            op.create_index(name, table, columns, postgresql_concurrently=True)
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,34 @@
+"""Index faculty specializations for containment filters
+
+Revision ID: 9c1e7b3d5a28
+Revises: 6d4a8f2c1e93
+Create Date: 2026-10-16 15:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '9c1e7b3d5a28'
+down_revision = '6d4a8f2c1e93'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_faculties_specializations', 'faculties', ['specializations'], {
+        'postgresql_using': 'gin',
+    }),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction, but avoids locking out
+    # writes while the indexes build
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, **kwargs)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,37 @@
+"""Fill created_at/updated_at on the database side
+
+Revision ID: 4b8e2d6f0a57
+Revises: 9c1e7b3d5a28
+Create Date: 2026-10-16 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '4b8e2d6f0a57'
+down_revision = '9c1e7b3d5a28'
+branch_labels = None
+depends_on = None
+
+TIMESTAMPED_TABLES = [
+    'users', 'roles', 'departments', 'faculties', 'students', 'results',
+    'project_events', 'project_teams', 'project_locations', 'projects',
+    'feedback_analysis',
+]
+
+# Naive UTC, matching the datetime.utcnow values already stored
+UTC_NOW = sa.text("TIMEZONE('utc', CURRENT_TIMESTAMP)")
+
+
+def upgrade() -> None:
+    # Only the column defaults change, so no table is rewritten
+    for table in TIMESTAMPED_TABLES:
+        for column in ('created_at', 'updated_at'):
+            op.alter_column(table, column, existing_type=sa.DateTime(), server_default=UTC_NOW)
+
+
+def downgrade() -> None:
+    for table in TIMESTAMPED_TABLES:
+        for column in ('created_at', 'updated_at'):
+            op.alter_column(table, column, existing_type=sa.DateTime(), server_default=None)
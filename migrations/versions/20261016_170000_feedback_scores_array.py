@@ -0,0 +1,41 @@
+"""Store feedback question scores in one float array
+
+Revision ID: 1a5c9e3b7d42
+Revises: 4b8e2d6f0a57
+Create Date: 2026-10-16 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '1a5c9e3b7d42'
+down_revision = '4b8e2d6f0a57'
+branch_labels = None
+depends_on = None
+
+# The q1_score .. q12_score columns the array replaces, in question order
+SCORE_COLUMNS = [f'q{i}_score' for i in range(1, 13)]
+
+
+def upgrade() -> None:
+    op.add_column('feedback_analysis', sa.Column('scores', postgresql.ARRAY(sa.Float()), nullable=True))
+    op.execute(f"UPDATE feedback_analysis SET scores = ARRAY[{', '.join(SCORE_COLUMNS)}]")
+    op.alter_column('feedback_analysis', 'scores', nullable=False)
+
+    for column in SCORE_COLUMNS:
+        op.drop_column('feedback_analysis', column)
+
+
+def downgrade() -> None:
+    for column in SCORE_COLUMNS:
+        op.add_column('feedback_analysis', sa.Column(column, sa.Float(), nullable=True))
+
+    # PostgreSQL arrays are 1-based, so scores[i] is question i
+    assignments = ', '.join(f'{column} = scores[{i}]' for i, column in enumerate(SCORE_COLUMNS, 1))
+    op.execute(f"UPDATE feedback_analysis SET {assignments}")
+
+    for column in SCORE_COLUMNS:
+        op.alter_column('feedback_analysis', column, nullable=False)
+    op.drop_column('feedback_analysis', 'scores')
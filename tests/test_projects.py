@@ -0,0 +1,240 @@
+import asyncio
+import io
+from datetime import datetime
+from typing import List
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.database import Base
+from app.models.user import User
+from app.models.department import Department
+from app.models.project import (
+    Project, ProjectTeam, TeamMember, ProjectEvent, ProjectLocation,
+    DepartmentEvaluation, CentralEvaluation
+)
+from app.schemas import (
+    ProjectResponse, ProjectWithDetails, TeamResponse, EventResponse, LocationResponse
+)
+from app.services.project import (
+    get_project, get_projects_by_department, get_projects_by_team, get_projects_by_event,
+    get_event_winners, import_projects_from_csv, export_projects_to_csv
+)
+from app.services.project_team import get_team, get_teams_by_department
+from app.services.project_event import get_event, get_events, get_events_page, get_active_events
+from app.utils.pagination import encode_cursor, keyset_page
+from app.services.project_location import get_location, get_locations_by_event, get_locations_page
+
+# Only the tables the project services touch; the full metadata includes
+# PostgreSQL-only column types that SQLite cannot create
+PROJECT_TABLES = [
+    "users", "departments", "project_events", "event_departments", "event_schedules",
+    "project_teams", "team_members", "project_locations", "projects",
+    "department_evaluations", "central_evaluations"
+]
+
+engine = create_async_engine(
+    "sqlite+aiosqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingAsyncSessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+def run(coro):
+    return asyncio.run(coro)
+
+async def _seed():
+    tables = [Base.metadata.tables[name] for name in PROJECT_TABLES]
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=tables)
+
+    async with TestingAsyncSessionLocal() as db:
+        user = User(name="Jury User", email="jury@example.com", password="x")
+        department = Department(name="Computer", code="CE", description="", established_date=datetime(2000, 1, 1))
+        db.add_all([user, department])
+        await db.flush()
+
+        event = ProjectEvent(
+            name="Expo", description="", academic_year="2024-25",
+            event_date=datetime(2025, 3, 1),
+            registration_start_date=datetime(2025, 1, 1),
+            registration_end_date=datetime(2025, 2, 1),
+            created_by=user.id, updated_by=user.id
+        )
+        event.departments.append(department)
+        # Two more events, one on the same date, to page through by (event_date, id)
+        other_events = [
+            ProjectEvent(
+                name=name, description="", academic_year="2024-25", event_date=event_date,
+                registration_start_date=datetime(2025, 1, 1),
+                registration_end_date=datetime(2025, 2, 1),
+                created_by=user.id, updated_by=user.id
+            )
+            for name, event_date in [("Expo Day 2", datetime(2025, 3, 1)), ("Fair", datetime(2024, 3, 1))]
+        ]
+        db.add_all([event, *other_events])
+        await db.flush()
+
+        team = ProjectTeam(
+            name="Team A", department_id=department.id, event_id=event.id,
+            created_by=user.id, updated_by=user.id
+        )
+        team.members.append(TeamMember(user_id=user.id, name="Member", enrollment_no="1", is_leader=True))
+        location = ProjectLocation(
+            location_id="A-01", section="A", position=1,
+            department_id=department.id, event_id=event.id,
+            created_by=user.id, updated_by=user.id
+        )
+        db.add_all([team, location])
+        await db.flush()
+
+        project = Project(
+            title="Project", category="IoT", abstract="", department_id=department.id,
+            guide_user_id=user.id, guide_name="Guide", guide_department_id=department.id,
+            guide_contact="0", team_id=team.id, event_id=event.id, location_id=location.id,
+            created_by=user.id, updated_by=user.id
+        )
+        project.dept_evaluation = DepartmentEvaluation(score=8)
+        project.central_evaluation = CentralEvaluation(score=9)
+        db.add(project)
+        await db.commit()
+
+        return {
+            "project": project.id, "team": team.id, "event": event.id,
+            "location": location.id, "department": department.id, "user": user.id
+        }
+
+@pytest.fixture(scope="module")
+def project_ids():
+    ids = run(_seed())
+    yield ids
+    run(engine.dispose())
+
+def _serialize(schema, loader):
+    """Run a service call in a fresh session and dump the result through its response schema"""
+    adapter = TypeAdapter(List[schema])
+    async def go():
+        async with TestingAsyncSessionLocal() as db:
+            result = await loader(db)
+            items = result if isinstance(result, list) else [result]
+            return adapter.dump_python(adapter.validate_python(items, from_attributes=True), mode="json")
+    return run(go())
+
+# Each service must eager load everything its response schema reads; a
+# missing load hits raiseload("*") and fails here
+def test_project_services_eager_load(project_ids):
+    projects = _serialize(ProjectResponse, lambda db: get_project(db, project_ids["project"]))
+    assert projects[0]["dept_evaluation"]["score"] == 8
+
+    _serialize(ProjectResponse, lambda db: get_projects_by_department(db, project_ids["department"]))
+    _serialize(ProjectResponse, lambda db: get_projects_by_event(db, project_ids["event"]))
+
+    team_projects = _serialize(ProjectResponse, lambda db: get_projects_by_team(db, project_ids["team"]))
+    assert [project["id"] for project in team_projects] == [project_ids["project"]]
+
+    winners = _serialize(ProjectResponse, lambda db: get_event_winners(db, project_ids["event"]))
+    assert winners[0]["central_evaluation"]["score"] == 9
+
+def test_project_details_eager_load(project_ids):
+    async def go():
+        async with TestingAsyncSessionLocal() as db:
+            project = await get_project(db, project_ids["project"], include_details=True)
+            return ProjectWithDetails.model_validate(project)
+    project = run(go())
+    assert project.team.members[0].is_leader is True
+    assert (project.event.name, project.location.location_id) == ("Expo", "A-01")
+
+def test_team_event_location_services_eager_load(project_ids):
+    teams = _serialize(TeamResponse, lambda db: get_team(db, project_ids["team"]))
+    assert len(teams[0]["members"]) == 1
+    _serialize(TeamResponse, lambda db: get_teams_by_department(db, project_ids["department"]))
+
+    events = _serialize(EventResponse, lambda db: get_event(db, project_ids["event"]))
+    assert events[0]["departments"][0]["code"] == "CE"
+    _serialize(EventResponse, get_events)
+    _serialize(EventResponse, get_active_events)
+
+    _serialize(LocationResponse, lambda db: get_location(db, project_ids["location"]))
+
+    async def go():
+        async with TestingAsyncSessionLocal() as db:
+            return await get_locations_by_event(db, project_ids["event"])
+    assert run(go())["total_locations"] == 1
+
+def test_keyset_page_cursor(project_ids):
+    async def go():
+        async with TestingAsyncSessionLocal() as db:
+            first, _ = await get_locations_page(db, limit=1)
+            after_first, next_cursor = await get_locations_page(db, cursor=encode_cursor(first[0].id), limit=1)
+            return first, after_first, next_cursor
+    first, after_first, next_cursor = run(go())
+    assert [location.location_id for location in first] == ["A-01"]
+    assert after_first == [] and next_cursor is None
+
+def test_keyset_page_descending(project_ids):
+    async def go():
+        async with TestingAsyncSessionLocal() as db:
+            everything, no_cursor = await get_events_page(db)
+            pages, cursor = [], None
+            while True:
+                page, cursor = await get_events_page(db, cursor=cursor, limit=1)
+                pages.append(page)
+                if cursor is None:
+                    return everything, no_cursor, pages
+    everything, no_cursor, pages = run(go())
+    
+    # Without a cursor or limit the whole list comes back, newest first
+    assert no_cursor is None
+    assert [event.event_date for event in everything] == sorted((event.event_date for event in everything), reverse=True)
+    
+    # Paging one row at a time visits every event once, in the same order,
+    # including the two that share a date
+    assert [page[0].id for page in pages] == [event.id for event in everything]
+    assert len(everything) == 3
+
+def test_keyset_page_rejects_nullable_sort_key(project_ids):
+    async def go():
+        async with TestingAsyncSessionLocal() as db:
+            await keyset_page(db, select(User), User.id, sort_columns=[User.department_id], limit=10)
+    
+    # A row with a NULL sort key could never be paged past, so the call fails
+    # up front instead of leaving such rows off every page
+    with pytest.raises(ValueError, match="department_id"):
+        run(go())
+
+def test_project_csv_round_trip(project_ids):
+    importer = User(id=project_ids["user"])
+    
+    async def go():
+        async with TestingAsyncSessionLocal() as db:
+            exported = "".join([chunk async for chunk in export_projects_to_csv(db)])
+            upload = UploadFile(io.BytesIO(exported.encode()), filename="projects.csv")
+            result = await import_projects_from_csv(db, upload, importer)
+            projects = await get_projects_by_team(db, project_ids["team"])
+            return result, projects
+    result, projects = run(go())
+    
+    # The exported file imports as-is, creating a copy of every project
+    assert result["count"] == 1
+    copy = next(project for project in projects if project.id != project_ids["project"])
+    assert (copy.title, copy.guide_user_id, copy.created_by) == ("Project", project_ids["user"], importer.id)
+
+def test_project_csv_import_requires_guide(project_ids):
+    csv_text = (
+        "Title,Category,Abstract,Department,Team,Event\n"
+        f"Orphan,IoT,,{project_ids['department']},{project_ids['team']},{project_ids['event']}\n"
+    )
+    
+    async def go():
+        async with TestingAsyncSessionLocal() as db:
+            upload = UploadFile(io.BytesIO(csv_text.encode()), filename="projects.csv")
+            await import_projects_from_csv(db, upload, User(id=project_ids["user"]))
+    
+    with pytest.raises(HTTPException) as exc_info:
+        run(go())
+    assert exc_info.value.status_code == 400
+    assert "Line 2: missing Guide User" in exc_info.value.detail
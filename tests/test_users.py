@@ -0,0 +1,83 @@
+import pytest
+from sqlalchemy import JSON, MetaData, create_engine, select
+from sqlalchemy.orm import sessionmaker, selectinload
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models.user import Role, User
+from app.services.user import bulk_assign_roles
+
+engine = create_engine(
+    "sqlite://",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autoflush=False, bind=engine)
+
+# roles.permissions is a PostgreSQL text[]; SQLite gets the same table with
+# the permissions stored as JSON instead
+roles_table = Role.__table__.to_metadata(MetaData())
+roles_table.c.permissions.type = JSON()
+
+@pytest.fixture
+def db():
+    roles_table.create(engine)
+    Base.metadata.create_all(engine, tables=[Base.metadata.tables[name] for name in ("users", "user_roles")])
+    with engine.begin() as conn:
+        conn.execute(roles_table.insert(), [
+            {"name": name, "description": f"{name} role", "permissions": ["read"]}
+            for name in ("admin", "student", "faculty")
+        ])
+
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+
+    Base.metadata.drop_all(engine, tables=[Base.metadata.tables[name] for name in ("user_roles", "users")])
+    roles_table.drop(engine)
+
+def _add_user(db, email: str, selected_role: str) -> str:
+    user = User(name=email, email=email, password="x", selected_role=selected_role)
+    db.add(user)
+    db.commit()
+    return user.id
+
+def _role_names(db, user_id: str) -> list:
+    db.expire_all()
+    user = db.scalar(select(User).options(selectinload(User.roles)).where(User.id == user_id))
+    return sorted(role.name for role in user.roles)
+
+def test_bulk_assign_roles_reports_each_user(db):
+    ok_id = _add_user(db, "ok@example.com", "student")
+    bad_role_id = _add_user(db, "bad@example.com", "student")
+
+    results = bulk_assign_roles(db, [
+        {"user_id": ok_id, "roles": ["student", "faculty", "student"]},
+        {"user_id": bad_role_id, "roles": ["student", "dean"]},
+        {"user_id": "00000000-0000-0000-0000-000000000000", "roles": ["admin"]},
+        {"user_id": ok_id, "roles": []},
+    ])
+
+    # Duplicate role names collapse, keeping their first position
+    assert results[0] == {"user_id": ok_id, "status": "success", "roles": ["student", "faculty"]}
+    assert results[1] == {"user_id": bad_role_id, "status": "error", "message": "Role dean does not exist"}
+    assert results[2]["status"] == "error" and results[2]["message"] == "User not found"
+    assert results[3]["message"] == "At least one role is required"
+
+    # Failed entries leave the user untouched; the rest commit together
+    assert _role_names(db, ok_id) == ["faculty", "student"]
+    assert _role_names(db, bad_role_id) == []
+
+def test_bulk_assign_roles_fixes_selected_role(db):
+    moved_id = _add_user(db, "moved@example.com", "admin")
+    kept_id = _add_user(db, "kept@example.com", "faculty")
+
+    bulk_assign_roles(db, [
+        {"user_id": moved_id, "roles": ["faculty", "student"]},
+        {"user_id": kept_id, "roles": ["student", "faculty"]},
+    ])
+
+    # A selected role the user no longer holds falls back to the first one
+    db.expire_all()
+    assert db.get(User, moved_id).selected_role == "faculty"
+    assert db.get(User, kept_id).selected_role == "faculty"